@@ -0,0 +1,28 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Writes a columnar (parquet) copy of each raw `p2876_*.csv` extract.
+# Ingest scripts read the copy instead of the csv while it is fresh.
+#
+#
+from sources import convert_source, is_fresh
+
+
+if __name__ == '__main__':
+
+    # File Type
+    ftype = 'u'
+
+    files = ['p2876_demographics.csv', 'p2876_ndc.csv'] + ['p2876_meds_{fid:02d}_{ftype:s}.csv'.format(fid=fid, ftype=ftype) for fid in range(1, 13)]
+
+    for file in files:
+        filepath = '../data/{file:s}'.format(file=file)
+        if is_fresh(filepath):
+            print('Skipping (file: {file:s}); columnar copy is fresh'.format(file=file))
+            continue
+        print('Converting (file: {file:s})'.format(file=file))
+        n = convert_source(filepath)
+        print('> {n:,d} rows'.format(n=n))
+
+    print('Done.')
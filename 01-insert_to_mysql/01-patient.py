@@ -10,79 +10,136 @@ import numpy as np
 import pandas as pd
 import sqlalchemy
 from sqlalchemy import event
-from utils import add_own_encoders
-import swifter
-
-
-def preprocessing_zip(x):
-    """ Preprocesses the raw ZIP field"""
-    x = str(x)
+from utils import add_own_encoders, no_phase
+from checkpoint import load_checkpointed
+from delta import row_hash, read_hashes, diff_rows, apply_upserts, delete_rows, record_changed_patients
+from sources import read_source
+import vocabulary
+from vocabulary import normalize_categories
+
+
+def normalize_zip(zips):
+    """ Normalizes the raw ZIP field into integer `ZIP5` and `ZIP4` columns.
+    Only unique raw values are normalized; results are mapped back to every row.
+    """
+    codes, uniques = pd.factorize(zips)
+    x = pd.Series(uniques, dtype=str)
     # Remove Zips with \x00
-    x = x.replace("\X00", '')
-    x = x.replace(" ", '')
-    x = x.replace("-", '')
+    x = x.str.replace("\\X00", '', regex=False)
+    x = x.str.replace(" ", '', regex=False)
+    x = x.str.replace("-", '', regex=False)
 
     # remove zero at the begining of the string (e.g., '062390000').
-    while x.startswith('0'):
-        x = x[1:]
+    x = x.str.lstrip('0')
+    n = x.str.len()
 
     # length < 5 ; NaN
-    if len(x) < 5:
-        x = ''
-
-    # length == 5; but zeros
-    elif len(x) == 5:
-        if x == '00000':
-            x = ''
-
-    # length == 6, 7, 8;
-    elif len(x) in [6, 7, 8]:
-        x = x[:5]
-
-    # length == 9; but zeros
-    elif len(x) == 9:
-        if x[-4:] == '0000':
-            x = x[:5]
-
-    # all normed, insert hiphen
-    if len(x) == 9:
-        # Split into '12345-1234' if '123451234'
-        x = x[:5] + '-' + x[-4:]
-    return x
-
-
-def handle_duplicated_patients(dfg):
-    if len(dfg) > 1:
-        # DOB
-        vc_dob = dfg['DOB'].value_counts()
-        dob = vc_dob.index[0] if len(vc_dob) else None
-        # Gender
-        vc_gender = dfg['GENDER'].value_counts()
-        gender = vc_gender.index[0] if len(vc_gender) else None
-        # Ethnicity
-        vc_ethnicity = dfg['ETHNICITY'].value_counts()
-        ethnicity = vc_ethnicity.index[0] if len(vc_ethnicity) else None
-        # Race
-        vc_race = dfg['RACE'].value_counts()
-        race = vc_race.index[0] if len(vc_race) else None
-        # ZIP5
-        vc_zip5 = dfg['ZIP5'].value_counts()
-        zip5 = vc_zip5.index[0] if len(vc_zip5) else None
-        # ZIP4
-        vc_zip4 = dfg['ZIP4'].value_counts()
-        zip4 = vc_zip4.index[0] if len(vc_zip4) else None
-        #
-        return pd.Series({
-            'STUDY_ID': dfg['STUDY_ID'].iloc[0],
-            'DOB': dob,
-            'GENDER': gender,
-            'ETHNICITY': ethnicity,
-            'RACE': race,
-            'ZIP5': zip5,
-            'ZIP4': zip4
-        }).to_frame().T
-    else:
-        return dfg
+    # length == 6, 7, 8, 9; first five
+    # length > 9; kept as is
+    zip5 = x.where(n > 9, x.str[:5]).where(n >= 5, '')
+
+    # length == 9; last four, but zeros
+    zip4 = x.str[-4:].where((n == 9) & (x.str[-4:] != '0000'), '')
+
+    zip5 = pd.to_numeric(zip5, errors='coerce').to_numpy(dtype='float64')
+    zip4 = pd.to_numeric(zip4, errors='coerce').to_numpy(dtype='float64')
+    # Unique values back to rows (`-1` is a missing raw ZIP)
+    zip5 = np.append(zip5, np.nan)[codes]
+    zip4 = np.append(zip4, np.nan)[codes]
+    return pd.DataFrame({
+        'ZIP5': pd.array(zip5, dtype='Int64'),
+        'ZIP4': pd.array(zip4, dtype='Int64')
+    }, index=zips.index)
+
+
+def consolidate_duplicated_patients(df, columns=['DOB', 'GENDER', 'ETHNICITY', 'RACE', 'ZIP5', 'ZIP4']):
+    """ Collapses rows sharing a `STUDY_ID` into one, keeping the most frequent value of each column.
+    Ties go to the value seen first, as `value_counts().index[0]` does. Only duplicated ids are grouped.
+    """
+    is_dup = df['STUDY_ID'].duplicated(keep=False)
+    dfd = df.loc[is_dup, ['STUDY_ID'] + columns]
+
+    dfc = pd.DataFrame(index=pd.Index(dfd['STUDY_ID'].unique(), name='STUDY_ID'))
+    order = np.arange(len(dfd))
+    for column in columns:
+        # (STUDY_ID, value) counts and first appearance, across all duplicated ids at once
+        dfv = pd.DataFrame({'STUDY_ID': dfd['STUDY_ID'].values, 'value': dfd[column].values, 'order': order})
+        dfv = dfv.dropna(subset=['value'])
+        dfv = dfv.groupby(['STUDY_ID', 'value'], sort=False, observed=True)['order'].agg(['size', 'min']).reset_index()
+        dfv = dfv.sort_values(['STUDY_ID', 'size', 'min'], ascending=[True, False, True])
+        dfv = dfv.drop_duplicates(subset='STUDY_ID', keep='first').set_index('STUDY_ID')
+        dfc[column] = dfv['value']
+    dfc.reset_index(inplace=True)
+
+    df = pd.concat([df.loc[~is_dup, :], dfc], axis='index', ignore_index=True)
+    return df.sort_values('STUDY_ID', kind='mergesort').reset_index(drop=True)
+
+
+def load_patient(engine, delta=False, chunksize=100000, resume=True, method='auto', phase=no_phase):
+    """ Loads `p2876_demographics.csv` into `patient`, in checkpointed chunks (see `checkpoint.py`) or, with `delta`,
+    as a delta ingest (see `delta.py`). `phase` times each step (see `benchmark.py`). Returns the rows loaded.
+    """
+    # Load Data
+    print('Loading Data')
+    with phase('read') as record:
+        df = read_source('../data/p2876_demographics.csv')
+        record['rows'] = len(df)
+
+    # PreProcessing
+    print('PreProcessing')
+    with phase('normalize') as record:
+        # Gender, Ethnicity and Race (mapped on categories, see `vocabulary.py`)
+        df['GENDER'] = normalize_categories(df['GENDER'], vocabulary.GENDER)
+        df['ETHNICITY'] = normalize_categories(df['ETHNICITY'], vocabulary.ETHNICITY)
+        df['RACE'] = normalize_categories(df['RACE'], vocabulary.RACE)
+
+        # Zip
+        df[['ZIP5', 'ZIP4']] = normalize_zip(df['ZIP'])
+        df.drop('ZIP', axis='columns', inplace=True)
+
+        # Handle duplicates
+        df = consolidate_duplicated_patients(df)
+
+        # DOB is parsed on read (see `schema.py`)
+
+        df.rename(columns={
+            'STUDY_ID': 'id_patient',
+            'DOB': 'dob',
+            'GENDER': 'gender',
+            'ETHNICITY': 'ethnicity',
+            'RACE': 'race',
+            'ZIP5': 'zip5',
+            'ZIP4': 'zip4'
+        }, inplace=True)
+        df = df.loc[:, ['id_patient', 'dob', 'gender', 'ethnicity', 'race', 'zip5', 'zip4']]
+        df['row_hash'] = row_hash(df, ['dob', 'gender', 'ethnicity', 'race', 'zip5', 'zip4'])
+        record['rows'] = len(df)
+
+    #
+    print('Insert to MySQL (this may take a while)')
+    if not delta:
+        with phase('load') as record:
+            record['rows'] = n = load_checkpointed(df, 'patient', engine, job='01-patient', chunksize=chunksize, resume=resume, id_column='id_patient', method=method)
+        return n
+
+    with phase('join') as record:
+        dfH = read_hashes(engine, 'patient', ['id_patient', 'row_hash'])
+        dfU, deleted = diff_rows(df, dfH, 'id_patient')
+        record['rows'] = len(df)
+    print('> {n:,d} new or changed patients, {nd:,d} removed'.format(n=len(dfU), nd=len(deleted)))
+    with phase('load') as record:
+        apply_upserts(dfU, 'patient', engine, key='id_patient')
+        # Removed patients take their medications with them (`medication_drug` rows first); no foreign key cascade is assumed
+        if len(deleted):
+            sql = "SELECT id_medication FROM medication WHERE id_patient IN ({ids:s})".format(ids=', '.join(str(int(id_patient)) for id_patient in deleted))
+            medications = pd.read_sql(sql, con=engine)['id_medication']
+            delete_rows(engine, 'medication_drug', 'id_medication', medications)
+            delete_rows(engine, 'medication', 'id_medication', medications)
+            delete_rows(engine, 'medication_patient_range', 'id_patient', deleted)
+        delete_rows(engine, 'patient', 'id_patient', deleted)
+        record_changed_patients(engine, np.concatenate([dfU['id_patient'].to_numpy(dtype='int64'), deleted.astype('int64')]))
+        record['rows'] = len(dfU) + len(deleted)
+    return len(dfU) + len(deleted)
 
 
 if __name__ == '__main__':
@@ -90,93 +147,16 @@ if __name__ == '__main__':
     # DB
     cfg = configparser.ConfigParser()
     cfg.read('../config.ini')
-    url = 'mysql+pymysql://%(user)s:%(pass)s@%(host)s/%(db)s?charset=utf8' % cfg['IU-RDC-MySQL']
+    url = 'mysql+pymysql://%(user)s:%(pass)s@%(host)s/%(db)s?charset=utf8&local_infile=1' % cfg['IU-RDC-MySQL']
     engine = sqlalchemy.create_engine(url, encoding='utf-8')
     event.listen(engine, "before_cursor_execute", add_own_encoders)
 
-    # Truncate table
-    print('Truncating Table')
-    Q = engine.execute("TRUNCATE TABLE patient")
+    # Only apply new, changed and removed patients (see `delta.py`), instead of truncating and reloading the table
+    DELTA = False
+    # Otherwise, insert in chunks of CHUNKSIZE rows, each committed with its checkpoint; a failed load resumes (see `checkpoint.py`)
+    CHUNKSIZE = 100000
+    RESUME = True
 
-    # Load Data
-    print('Loading Data')
-    df = pd.read_csv('../data/p2876_demographics.csv', index_col=None, nrows=None, dtype={'ZIP': str})
+    load_patient(engine, delta=DELTA, chunksize=CHUNKSIZE, resume=RESUME)
 
-    # PreProcessing
-    print('PreProcessing')
-
-    # Gender
-    df['GENDER'] = df['GENDER'].replace(
-        {
-            'Unknown': np.nan,
-            'Unspecified': np.nan
-        })
-
-    # Ethnicity
-    df['ETHNICITY'] = df['ETHNICITY'].replace(
-        {
-            'Not Hispanic or Latino': 'Not Hispanic/Latino',
-            'Not Hispanic, Latino/a, or Spanish Origin': 'Not Hispanic/Latino/Spanish',
-            'Hispanic or Latino': 'Hispanic/Latino',
-            'Unknown': np.nan,
-            'Unreported/Refused to Report': np.nan,
-            'Declined': np.nan
-        })
-
-    # Race
-    df['RACE'] = df['RACE'].replace(
-        {
-            # White
-            'White': 'White',
-            'CAUCASIAN': 'White',
-            # Black/AA
-            'Black or African American': 'Black',
-            # Hispanic
-            'HISPANIC': 'Hispanic',
-            # Asian
-            'Asian': 'Asian',
-            'Other Asian': 'Asian',
-            # Native
-            'American Indian or Alaska Native': 'Indian',
-            'NATIVE ALASKAN': 'Indian',
-            # Islander
-            'Native Hawaiian': 'Islander',
-            'Other Pacific Islander': 'Islander',
-            'Native Hawaiian or Other Pacific Islande': 'Islander',
-            'Native Hawaiian or Other Pacific Islander': 'Islander',
-            # >1 Race
-            'More than one race': 'Bi-racial',
-            'BI-RACIAL': 'Bi-racial',
-            # Other
-            'Unknown': np.nan,
-            'Refused': np.nan,
-            'Unreported/Refused to report race': np.nan,
-            'Decline to Answer': np.nan,
-        })
-
-    # Zip
-    df['ZIP'] = df['ZIP'].swifter.apply(preprocessing_zip)
-    df['ZIP5'] = df['ZIP'].swifter.apply(lambda x: pd.to_numeric(x.split('-')[0]))
-    df['ZIP4'] = df['ZIP'].swifter.apply(lambda x: pd.to_numeric(x.split('-')[1]) if len(x.split('-')) > 1 else np.nan)
-    df.drop('ZIP', axis='columns', inplace=True)
-
-    # Handle duplicates
-    df = df.groupby('STUDY_ID').swifter.apply(handle_duplicated_patients)
-    df.reset_index(drop=True, inplace=True)
-
-    # DOB
-    df['DOB'] = pd.to_datetime(df['DOB'], format='%Y-%m-%d')
-
-    #
-    print('Insert to MySQL (this may take a while)')
-    df.rename(columns={
-        'STUDY_ID': 'id_patient',
-        'DOB': 'dob',
-        'GENDER': 'gender',
-        'ETHNICITY': 'ethnicity',
-        'RACE': 'race',
-        'ZIP5': 'zip5',
-        'ZIP4': 'zip4'
-    }, inplace=True)
-    df = df.loc[:, ['id_patient', 'dob', 'gender', 'ethnicity', 'race', 'zip5', 'zip4']]
-    df.to_sql(name='patient', con=engine, if_exists='append', index=False, chunksize=5000, method='multi')
+    print('Done.')
@@ -6,10 +6,51 @@
 #
 #
 import configparser
-import pandas as pd
 import sqlalchemy
 from sqlalchemy import event
-from utils import add_own_encoders
+from utils import add_own_encoders, no_phase
+from ddiindy.bulkload import bulk_load
+from checkpoint import truncate_table
+from sources import read_source
+from ndc import dedup_ndc, write_ndc_lookup
+
+
+def load_ndc(engine, method='auto', phase=no_phase):
+    """ Loads `p2876_ndc.csv` into `ndc`, with canonical NDCs, and exports the `id_catalog -> ndc` lookup.
+    `phase` times each step (see `benchmark.py`). Returns the rows loaded.
+    """
+    # Truncate table
+    print('Truncating Table')
+    truncate_table(engine, 'ndc')
+
+    # Load Data
+    file = 'p2876_ndc.csv'
+    print('Loading Data (file: {file:s})'.format(file=file))
+    with phase('read') as record:
+        df = read_source('../data/{file:s}'.format(file=file))
+        record['rows'] = len(df)
+
+    with phase('normalize') as record:
+        df.rename(columns={
+            'CATALOGCVCD': 'id_catalog',
+            'NDC': 'ndc',
+        }, inplace=True)
+        df = df.loc[:, ['id_catalog', 'ndc']]
+
+        # Canonical NDCs (see `ndc.py`); repeats are dropped here, instead of being rejected by `ux_ndc`
+        print('Normalizing NDCs')
+        n = len(df)
+        df = dedup_ndc(df)
+        print('> {n:,d} unique rows ({nd:,d} duplicates dropped)'.format(n=len(df), nd=n - len(df)))
+        record['rows'] = len(df)
+
+    print('Exporting id_catalog -> ndc lookup')
+    write_ndc_lookup(df)
+
+    print('Insert to MySQL (this may take a while)')
+    with phase('load') as record:
+        record['rows'] = n = bulk_load(df, 'ndc', engine, method=method)
+    return n
 
 
 if __name__ == '__main__':
@@ -17,25 +58,9 @@ if __name__ == '__main__':
     # DB
     cfg = configparser.ConfigParser()
     cfg.read('../config.ini')
-    url = 'mysql+pymysql://%(user)s:%(pass)s@%(host)s:%(port)s/%(db)s?charset=utf8' % cfg['IU-RDC-MySQL']
+    url = 'mysql+pymysql://%(user)s:%(pass)s@%(host)s:%(port)s/%(db)s?charset=utf8&local_infile=1' % cfg['IU-RDC-MySQL']
     engine = sqlalchemy.create_engine(url, encoding='utf-8')
     query = engine.execute("SELECT 1+1")
     event.listen(engine, "before_cursor_execute", add_own_encoders)
 
-    # Truncate table
-    print('Truncating Table')
-    Q = engine.execute("TRUNCATE TABLE ndc")
-
-    # Load Data
-    file = 'p2876_ndc.csv'
-    print('Loading Data (file: {file:s})'.format(file=file))
-    dtype = {}
-    df = pd.read_csv('../data/{file:s}'.format(file=file), index_col=None, nrows=None, dtype=dtype)
-
-    print('Insert to MySQL (this may take a while)')
-    df.rename(columns={
-        'CATALOGCVCD': 'id_catalog',
-        'NDC': 'ndc',
-    }, inplace=True)
-    df = df.loc[:, ['id_catalog', 'ndc']]
-    df.to_sql(name='ndc', con=engine, if_exists='append', index=False, chunksize=1000, method='multi')
+    load_ndc(engine)
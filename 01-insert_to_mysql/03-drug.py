@@ -3,18 +3,98 @@
 # Date: April 01, 2020
 #
 # Description:
-# Parses the DrugBank XML and load drugs to MySQL.
+# Parses the DrugBank XML and load drugs and drug-drug interactions to MySQL.
 #
 import configparser
+import numpy as np
 import pandas as pd
 pd.set_option('display.max_rows', 50)
 pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
 import sqlalchemy
 from sqlalchemy import event
-from utils import add_own_encoders
-from xml.etree import ElementTree as ET
-from zipfile import ZipFile
+from utils import add_own_encoders, no_phase
+from ddiindy.bulkload import bulk_load
+from checkpoint import truncate_table
+from drugbank import cache_drugbank, read_cache, iter_cache, count_cache, iter_interactions, build_alias_index, read_severity, DRUGBANK_FILE, DRUGBANK_MEMBER, READ_BATCH_SIZE
+import multiprocessing as mp
+
+
+def load_drug(engine, filep=DRUGBANK_FILE, member=DRUGBANK_MEMBER, parallel=True, n_cpu=None, refresh=False, debug=False, batch_size=READ_BATCH_SIZE, method='auto', phase=no_phase):
+    """ Loads DrugBank drugs into `drug` and their interactions into `drugbank_interaction`.
+    The XML is parsed into the cache as it is read (see `drugbank.py`); rows are loaded from there, `batch_size` at a time.
+    `phase` times each step (see `benchmark.py`). Returns the rows loaded.
+    """
+    # Truncate table
+    print('Truncating Table')
+    truncate_table(engine, 'drug')
+    truncate_table(engine, 'drugbank_interaction')
+
+    print('Parsing XML (or loading parsed cache)')
+    with phase('read') as record:
+        version, exported_on, path = cache_drugbank(filep, member, parallel=parallel, n_cpu=n_cpu, refresh=refresh)
+        record['rows'] = count_cache(path, 'drug') + count_cache(path, 'interaction')
+    print('Version:', version)
+    print('Release Date:', exported_on)
+
+    #
+    # Insert to MysSQL
+    #
+    print('Insert to MySQL (this may take a while)')
+    n = 0
+    for dfd in iter_cache(path, 'drug', batch_size):
+        if debug:
+            print(dfd[['id_drug', 'name']])
+        with phase('load') as record:
+            record['rows'] = bulk_load(dfd, 'drug', engine, method=method, verbose=False)
+        n += record['rows']
+    print('> {n:,d} drugs inserted'.format(n=n))
+
+    with phase('normalize') as record:
+        #
+        # Map secondary ids to their primary id. All loaders share this id space.
+        # Drugs are keyed by their primary id already; only references to other drugs are remapped.
+        #
+        alias = build_alias_index(read_cache(path, ['drug', 'secondary']))
+        print('Alias Index: {n:,d} secondary ids'.format(n=len(alias)))
+        record['rows'] = len(alias)
+
+    with phase('join') as record:
+        # Load Severity Score
+        dfS = read_severity('data/drugs.com-severity.csv', alias)
+        record['rows'] = len(dfS)
+    is_matched = np.zeros(len(dfS), dtype=bool)
+
+    #
+    # Interactions (parsed in the same pass as drugs)
+    #
+    m = 0
+    batches = iter_interactions(path, alias, batch_size)
+    while True:
+        with phase('normalize') as record:
+            dfi = next(batches, None)
+            record['rows'] = 0 if dfi is None else len(dfi)
+        if dfi is None:
+            break
+        with phase('join') as record:
+            dfi = dfi.join(dfS, on=['id_drug_i', 'id_drug_j'], how='left')
+            is_matched |= dfS.index.isin(pd.MultiIndex.from_frame(dfi[['id_drug_i', 'id_drug_j']]))
+            record['rows'] = len(dfi)
+        with phase('load') as record:
+            record['rows'] = bulk_load(dfi, 'drugbank_interaction', engine, method=method, verbose=False)
+        m += record['rows']
+
+    # Outer join: pairs annotated only on drugs.com are kept, without a DrugBank description
+    with phase('join') as record:
+        dfo = dfS.loc[~is_matched].reset_index()
+        dfo.insert(2, 'description', None)
+        record['rows'] = len(dfo)
+    print('> {n:,d} interactions only on drugs.com'.format(n=len(dfo)))
+    with phase('load') as record:
+        record['rows'] = bulk_load(dfo, 'drugbank_interaction', engine, method=method, verbose=False)
+    m += record['rows']
+    print('> {n:,d} interactions inserted'.format(n=m))
+    return n + m
 
 
 if __name__ == '__main__':
@@ -22,110 +102,24 @@ if __name__ == '__main__':
     # DB
     cfg = configparser.ConfigParser()
     cfg.read('../config.ini')
-    url = 'mysql+pymysql://%(user)s:%(pass)s@%(host)s:%(port)s/%(db)s?charset=utf8' % cfg['IU-RDC-MySQL']
+    url = 'mysql+pymysql://%(user)s:%(pass)s@%(host)s:%(port)s/%(db)s?charset=utf8&local_infile=1' % cfg['IU-RDC-MySQL']
     engine = sqlalchemy.create_engine(url, encoding='utf-8')
     event.listen(engine, "before_cursor_execute", add_own_encoders)
 
-    # Truncate table
-    print('Truncating Table')
-    Q = engine.execute("TRUNCATE TABLE drug")
-
     # Init
     DEBUG = False
-    ns = {'ns': 'http://www.drugbank.ca'}
+    # Parse shards of the XML in a process pool
+    PARALLEL = True
+    n_cpu = mp.cpu_count()
+    # Ignore the parsed-artifact cache and re-parse the XML
+    REFRESH = False
 
     # XML
-    print('Loading XML(zip) File')
     if DEBUG:
-        filep = '../data/drugbank-v5.1.5/full database debug.xml'
-        file = open(filep, 'r')
+        filep, member = '../data/drugbank-v5.1.5/full database debug.xml', None
     else:
-        zfilep = '../data/drugbank-v5.1.5/drugbank_all_full_database.xml.zip'
-        zfile = ZipFile(zfilep, 'r')
-        file = zfile.open('full database.xml')
-
-    print('Parsing XML File')
-    tree = ET.parse(file)
-    root = tree.getroot()
-
-    print('Version:', root.attrib['version'])
-    print('Release Date:', root.attrib['exported-on'])
-
-    #
-    # Loop all drugs
-    #
-    d = []
-    i = []
-    for drug in root:
-        #
-        # Drugs
-        #
-        try:
-            id_drugbank = drug.find("ns:drugbank-id[@primary='true']", ns).text
-        except TypeError:
-            print(drug.findall('ns:drugbank-id', ns))
-            continue
-        id_drugbank_short = id_drugbank[2:]
-
-        name = drug.find("ns:name", ns).text
-
-        if DEBUG:
-            print('- {:s}: {:s}'.format(id_drugbank, name))
-
-        dtype = drug.attrib['type']
-        description = drug.find("ns:description", ns).text
-
-        # Class / SubClass
-        xml_classification = drug.find("ns:classification", ns)
-        if xml_classification is not None:
-            dclass = xml_classification.find("ns:class", ns).text
-            dsubclass = xml_classification.find("ns:subclass", ns).text
-
-        # Groups
-        xml_groups = drug.find("ns:groups", ns)
-        groups = []
-        for xml_group in xml_groups:
-            groups.append(xml_group.text)
-        groups = ','.join(groups)
-
-        d.append((id_drugbank, name, dtype, dclass, dsubclass, description, groups))
-
-        #
-        # Interactions
-        #
-        """
-        interactions = drug.find("ns:drug-interactions", ns)
-        for interaction in interactions:
-            id_drugbank_j = interaction.find("ns:drugbank-id", ns).text
-            id_drugbank_j_short = id_drugbank_j[2:]
-            description = interaction.find("ns:description", ns).text
+        filep, member = DRUGBANK_FILE, DRUGBANK_MEMBER
 
-            # If current drug id is bigger than interacting drug, skip
-            if id_drugbank_short > id_drugbank_j_short:
-                continue
-            else:
-                i.append(id_drugbank, id_drugbank_j, description)
-        """
-
-    #
-    dfd = pd.DataFrame(d, columns=['id_drug', 'name', 'type', 'class', 'subclass', 'description', 'groups'])
-
-    #
-    # Update a few IDs to match old drugbank. These ids are secondary ids.
-    #
-    # Secretin
-    dfd.loc[(dfd['id_drug'] == 'DB09532'), 'id_drug'] = 'DB00021'
-    # Aliskiren
-    dfd.loc[(dfd['id_drug'] == 'DB09026'), 'id_drug'] = 'DB01258'
-    # Bismuth
-    dfd.loc[(dfd['id_drug'] == 'DB01294'), 'id_drug'] = 'DB01402'
-
-    # dfi = pd.DataFrame(i, columns=['id_drug_i', 'id_drug_j', 'description'])
-
-    #
-    # Insert to MysSQL
-    #
-    print('Insert to MySQL (this may take a while)')
-    dfd.to_sql(name='drug', con=engine, if_exists='append', index=False, chunksize=500, method='multi')
+    load_drug(engine, filep, member, parallel=PARALLEL, n_cpu=n_cpu, refresh=REFRESH, debug=DEBUG)
 
-    # dfi.to_sql(name='interaction', con=engine, if_exists='append', index=False, chunksize=500, method='multi')
+    print('Done.')
@@ -3,6 +3,8 @@
 # Date: March 17, 2020
 #
 # Description: Inserts `drugbank-interaction.csv` and `drugs.com-severity.csv` to MySQL.
+# Note: `03-drug.py` now loads `drugbank_interaction` straight from the DrugBank XML.
+# This script is kept to load interactions from the legacy csv export.
 #
 #
 import configparser
@@ -13,6 +15,8 @@ pd.set_option('display.width', 1000)
 import sqlalchemy
 from sqlalchemy import event
 from utils import add_own_encoders
+from checkpoint import load_checkpointed
+from drugbank import load_drugbank, build_alias_index, split_pair_labels, normalize_pairs, read_severity, DRUGBANK_FILE, DRUGBANK_MEMBER
 
 
 if __name__ == '__main__':
@@ -20,74 +24,36 @@ if __name__ == '__main__':
     # DB
     cfg = configparser.ConfigParser()
     cfg.read('../config.ini')
-    url = 'mysql+pymysql://%(user)s:%(pass)s@%(host)s:%(port)s/%(db)s?charset=utf8' % cfg['IU-RDC-MySQL']
+    url = 'mysql+pymysql://%(user)s:%(pass)s@%(host)s:%(port)s/%(db)s?charset=utf8&local_infile=1' % cfg['IU-RDC-MySQL']
     engine = sqlalchemy.create_engine(url, encoding='utf-8')
     event.listen(engine, "before_cursor_execute", add_own_encoders)
 
-    # Truncate table
-    print('Truncating Table')
-    Q = engine.execute("TRUNCATE TABLE drugbank_interaction")
+    # Insert in chunks of CHUNKSIZE rows, each committed with its checkpoint; a failed load resumes (see `checkpoint.py`)
+    CHUNKSIZE = 100000
+    RESUME = True
 
     # Load Interactions
     dfI = pd.read_csv('data/drugbank-interaction.csv.gz', index_col=None, usecols=['label', 'interaction'])
 
-    # Split Label string 'DB0001 DB0002' into tuple ('DB0001', 'DB00002')
-    def split_drugbank_ids(x):
-        i, j = tuple(x.split(' '))
-        if i > j:
-            i, j = j, i
-        return pd.Series({'id_drug_i': i, 'id_drug_j': j})
-
-    dfI[['id_drug_i', 'id_drug_j']] = dfI['label'].apply(split_drugbank_ids)
+    # Split Label string 'DB0001 DB0002' into ('DB0001', 'DB00002'); pairs are ordered by `normalize_pairs`
+    dfI[['id_drug_i', 'id_drug_j']] = split_pair_labels(dfI['label'])
     dfI.drop('label', axis='columns', inplace=True)
 
-
     #
-    # Update a few IDs to match old drugbank. These ids are secondary ids.
-    #
-    # Rauwolfia serpentina root
-    dfI.loc[(dfI['id_drug_i'] == 'DB00386'), 'id_drug_i'] = 'DB09363'
-    dfI.loc[(dfI['id_drug_j'] == 'DB00386'), 'id_drug_j'] = 'DB09363'
-    # Valproic Acid
-    dfI.loc[(dfI['id_drug_i'] == 'DB00510'), 'id_drug_i'] = 'DB00313'
-    dfI.loc[(dfI['id_drug_j'] == 'DB00510'), 'id_drug_j'] = 'DB00313'
-    # Ergoloid mesylate
-    dfI.loc[(dfI['id_drug_i'] == 'DB01287'), 'id_drug_i'] = 'DB01049'
-    dfI.loc[(dfI['id_drug_j'] == 'DB01287'), 'id_drug_j'] = 'DB01049'
-    # Bismuth
-    dfI.loc[(dfI['id_drug_i'] == 'DB01294'), 'id_drug_i'] = 'DB01402'
-    dfI.loc[(dfI['id_drug_j'] == 'DB01294'), 'id_drug_j'] = 'DB01402'
-    # Insulin glargine
-    dfI.loc[(dfI['id_drug_i'] == 'DB01308'), 'id_drug_i'] = 'DB00047'
-    dfI.loc[(dfI['id_drug_j'] == 'DB01308'), 'id_drug_j'] = 'DB00047'
-    # Insulin lispro
-    dfI.loc[(dfI['id_drug_i'] == 'DB01310'), 'id_drug_i'] = 'DB00046'
-    dfI.loc[(dfI['id_drug_j'] == 'DB01310'), 'id_drug_j'] = 'DB00046'
-    # Doxacurium
-    dfI.loc[(dfI['id_drug_i'] == 'DB01334'), 'id_drug_i'] = 'DB01135'
-    dfI.loc[(dfI['id_drug_j'] == 'DB01334'), 'id_drug_j'] = 'DB01135'
-    # Troleandomycin
-    dfI.loc[(dfI['id_drug_i'] == 'DB01361'), 'id_drug_i'] = 'DB13179'
-    dfI.loc[(dfI['id_drug_j'] == 'DB01361'), 'id_drug_j'] = 'DB13179'
-    # Salicylic acid
-    dfI.loc[(dfI['id_drug_i'] == 'DB01398'), 'id_drug_i'] = 'DB00936'
-    dfI.loc[(dfI['id_drug_j'] == 'DB01398'), 'id_drug_j'] = 'DB00936'
-    # Belladona
-    dfI.loc[(dfI['id_drug_i'] == 'DB01617'), 'id_drug_i'] = 'DB13913'
-    dfI.loc[(dfI['id_drug_j'] == 'DB01617'), 'id_drug_j'] = 'DB13913'
-    # Ribavirin
-    dfI.loc[(dfI['id_drug_i'] == 'DB01693'), 'id_drug_i'] = 'DB00811'
-    dfI.loc[(dfI['id_drug_j'] == 'DB01693'), 'id_drug_j'] = 'DB00811'
-
+    # Map secondary ids to their primary id (same id space as the `drug` table)
     #
+    print('Loading DrugBank alias index')
+    version, exported_on, artifacts = load_drugbank(DRUGBANK_FILE, DRUGBANK_MEMBER, artifacts=['drug', 'secondary'])
+    alias = build_alias_index(artifacts)
+    # Remapping may invert the pair order, or create duplicated pairs
+    dfI = normalize_pairs(dfI, alias)
     dfI.set_index(['id_drug_i', 'id_drug_j'], inplace=True)
-    dfI = dfI.loc[~dfI.index.duplicated(keep='first'), :]
 
     # Load Severity Score
-    dfS = pd.read_csv('data/drugs.com-severity.csv', index_col=['id_drug_i', 'id_drug_j'])
+    dfS = read_severity('data/drugs.com-severity.csv', alias)
 
     # Combine DFs
-    df = pd.concat([dfI, dfS['severity']], axis='columns')
+    df = pd.concat([dfI, dfS], axis='columns')
 
     print('Insert to MySQL')
     df.rename(columns={
@@ -95,4 +61,4 @@ if __name__ == '__main__':
     }, inplace=True)
     df.reset_index(inplace=True)
     #
-    df.to_sql(name='drugbank_interaction', con=engine, if_exists='append', index=False, chunksize=1, method='multi')
+    load_checkpointed(df, 'drugbank_interaction', engine, job='04-interaction', chunksize=CHUNKSIZE, resume=RESUME)
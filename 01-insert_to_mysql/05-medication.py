@@ -5,124 +5,113 @@
 # Description: Inserts `p2876_meds_{d}_u.csv` to MySQL.
 #
 #
+import os
+import shutil
+import tempfile
 import configparser
 import numpy as np
 import pandas as pd
 pd.set_option('display.max_rows', 10)
 pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
+import pyarrow as pa
+import pyarrow.parquet as pq
 import sqlalchemy
 from sqlalchemy import event
-from utils import add_own_encoders
-import swifter
+from utils import add_own_encoders, concat_categorical, no_phase
+from ddiindy.bulkload import bulk_load
+from checkpoint import start_load, save_checkpoint, finish_load, truncate_table
+from delta import row_hash, first_occurrences, read_hashes, diff_counts, select_inserts, apply_upserts, delete_rows, record_changed_patients
+from sources import iter_source, read_source, read_sources
+import vocabulary
+from vocabulary import normalize_categories
+import multiprocessing as mp
+from drugbank import load_drugbank, build_alias_index, apply_alias, DRUGBANK_FILE, DRUGBANK_MEMBER
 
 
-def calculates_date_end(r):
-    start = r['ORDERING_DATE']
-    duration = r['DURATION']
-    unit = r['DURATIONUNIT']
-
-    # If no duration, assume same day treatment
-    if pd.isnull(duration) or pd.isnull(unit):
-        return start
-    else:
-        if unit == 'Minutes':
-            timedelta = pd.Timedelta(value=duration, unit='minutes')
-        elif unit == 'Hours':
-            timedelta = pd.Timedelta(value=duration, unit='hours')
-        elif unit == 'Days':
-            timedelta = pd.Timedelta(value=duration, unit='days')
-        elif unit == 'Weeks':
-            timedelta = pd.Timedelta(value=duration * 7, unit='days')
-        elif unit == 'Months':
-            timedelta = pd.Timedelta(value=duration * 30, unit='days')
-        ##
-        elif unit == 'Treatments':
-                timedelta = pd.Timedelta(value=duration, unit='days')
-        elif unit == 'Doses':
-                timedelta = pd.Timedelta(value=duration, unit='days')
-        elif unit == 'Times':
-                timedelta = pd.Timedelta(value=duration, unit='days')
-        #
-    return start + timedelta
+# Length of each DURATIONUNIT
+DURATION_UNIT_LENGTH = {
+    'Minutes': pd.Timedelta(minutes=1),
+    'Hours': pd.Timedelta(hours=1),
+    'Days': pd.Timedelta(days=1),
+    'Weeks': pd.Timedelta(days=7),
+    'Months': pd.Timedelta(days=30),
+    #
+    'Treatments': pd.Timedelta(days=1),
+    'Doses': pd.Timedelta(days=1),
+    'Times': pd.Timedelta(days=1),
+}
 
+# Normalized order fields; their hash identifies an order across refreshes (see `delta.py`)
+# Orders regrouped by patient, while a streaming load runs (see `spill_medication_orders`)
+SPILL_DIR = '../data/cache/spill'
 
-if __name__ == '__main__':
+ORDER_COLUMNS = [
+    'STUDY_ID', 'ORDERING_DATE', 'ORDER_STATUS', 'MED_NAME', 'CATALOGCVCD',
+    'STRENGTHDOSE', 'STRENGTHDOSEUNIT', 'DISPENSEQTY', 'DISPENSEQTYUNIT', 'REFILLQTY', 'NBRREFILLS', 'DURATION', 'DURATIONUNIT'
+]
 
-    # DB
-    cfg = configparser.ConfigParser()
-    cfg.read('../config.ini')
-    url = 'mysql+pymysql://%(user)s:%(pass)s@%(host)s:%(port)s/%(db)s?charset=utf8' % cfg['IU-RDC-MySQL']
-    engine = sqlalchemy.create_engine(url, encoding='utf-8')
-    event.listen(engine, "before_cursor_execute", add_own_encoders)
 
-    # Truncate table
-    print('Truncating Table')
-    Q = engine.execute("TRUNCATE TABLE medication")
-    Q = engine.execute("TRUNCATE TABLE medication_drug")
+def calculates_date_end(dfM):
+    """ ORDERING_DATE + DURATION * DURATIONUNIT, for all rows at once"""
+    # Unit length in nanoseconds; NaN for missing units
+    length = dfM['DURATIONUNIT'].map({unit: td.value for unit, td in DURATION_UNIT_LENGTH.items()}).astype('float64')
+    # If no duration, assume same day treatment
+    timedelta = pd.to_timedelta((dfM['DURATION'].astype('float64') * length).fillna(0), unit='ns')
+    return dfM['ORDERING_DATE'] + timedelta
 
-    # File Type
-    ftype = 'u'
 
-    # Map Dictionary
-    print("Load Mapping File.")
+def load_mapping(alias):
+    """ Loads the MED_NAME -> DrugBank map. Returns the flags (one row per MED_NAME) and the MED_CODE -> ID_DRUG map.
+    `MED_CODE` is the position of MED_NAME in the flags index; medication orders are coded the same way (see `encode_med_name`).
+    """
     dfD = pd.read_csv('data/map-drug-name-drugbank.csv', usecols=['ID_DRUGBANK', 'TOPIC', 'OPHTHALMO', 'VACCINE', 'MED_NAME'], na_values='None')
     dfD['MED_NAME'] = dfD['MED_NAME'].str.strip()
     dfD['ID_DRUGBANK'] = dfD['ID_DRUGBANK'].str.strip()
     dfD.dropna(subset=['ID_DRUGBANK'], inplace=True)
-    dfDd = dfD.copy()
 
     # Unique Index
-    dfD.set_index('MED_NAME', inplace=True)
-
-    # Duplicated Index
-    n_ids = []
-    n_data = []
-    dfDd['ID_DRUGBANK'] = dfDd['ID_DRUGBANK'].str.split(',')
-    dfDd = dfDd.set_index('ID_DRUGBANK')
-    for (ids, data) in zip(dfDd.index, dfDd.values):
-        if isinstance(ids, list):
-            for id in ids:
-                n_ids.append(id)
-                n_data.append(data)
-        else:
-            n_ids.append(ids)
-            n_data.append(data)
-    dfDd = pd.DataFrame.from_records(data=n_data, index=pd.Series(n_ids, name='ID_DRUG'), columns=['TOPIC', 'OPHTHALMO', 'VACCINE', 'MED_NAME'])
-    dfDd = dfDd.reset_index().set_index('MED_NAME')
+    dfF = dfD.drop_duplicates(subset='MED_NAME', keep='first').set_index('MED_NAME')
+
+    # One row per (MED_NAME, ID_DRUG)
+    dfDd = dfD[['MED_NAME']].assign(ID_DRUG=dfD['ID_DRUGBANK'].str.split(',')).explode('ID_DRUG')
     dfDd = dfDd.loc[dfDd['ID_DRUG'] != 'None', :]  # Remove ID_DRUG == 'None'
+    dfDd = pd.DataFrame({
+        'MED_CODE': dfF.index.get_indexer(dfDd['MED_NAME']),
+        # Map secondary ids to their primary id (same id space as the `drug` table)
+        'ID_DRUG': apply_alias(dfDd['ID_DRUG'], alias).to_numpy(),
+    })
+    # A name listing both a secondary id and its primary id maps to that drug once (it is the key of `medication_drug`)
+    dfDd = dfDd.drop_duplicates(subset=['MED_CODE', 'ID_DRUG'], keep='first')
+    # Drugs of each code are contiguous, in file order
+    dfDd = dfDd.sort_values('MED_CODE', kind='mergesort').reset_index(drop=True)
+    return dfF, dfDd
 
-    print("Load Medicine Files.")
-    dtype = {
-        'STRENGTHDOSEUNIT': 'object',
-        'DISPENSEQTYUNIT': 'object',
-        'DURATIONUNIT': 'object'
-    }
-    ldf = []
-    for fid in range(1, 13):
-        file = 'p2876_meds_{fid:02d}_{ftype:s}.csv'.format(fid=fid, ftype=ftype)
 
-        # Load Data
-        print('Loading Data (file: {file:s})'.format(file=file))
+def encode_med_name(med_names, names):
+    """ Integer code of each MED_NAME: its position in `names`, or `-1` if it is not mapped. Only unique names are looked up."""
+    codes, uniques = pd.factorize(med_names)
+    # Code `-1` is a missing MED_NAME
+    return np.append(names.get_indexer(uniques), -1)[codes]
 
-        dft = pd.read_csv('../data/{file:s}'.format(file=file), index_col=None, nrows=None, dtype=dtype)
-        ldf.append(dft)
-        # break
 
-    print("Concatenating DataFrames")
-    dfM = pd.concat(ldf, axis='index', ignore_index=True, verify_integrity=False)
-    dfM['ID_MEDICATION'] = np.arange(1, len(dfM) + 1)
-    # PreProcessing
-    print('PreProcessing')
+def clustered_ids(study_id, ordering_date, start=1):
+    """ Medication IDs in (STUDY_ID, ORDERING_DATE) order, so the orders of each patient have contiguous IDs. Ties keep row order."""
+    study_id = np.asarray(study_id, dtype='int64')
+    ordering_date = np.asarray(ordering_date, dtype='datetime64[ns]').view('int64')
+    order = np.lexsort((ordering_date, study_id))
+    ids = np.empty(len(order), dtype='int64')
+    ids[order] = np.arange(start, start + len(order))
+    return ids
 
-    # Catalog CVCD
-    dfM['CATALOGCVCD'] = pd.to_numeric(dfM['CATALOGCVCD'])
 
-    # Order Date
-    dfM['ORDERING_DATE'] = pd.to_datetime(dfM['ORDERING_DATE'], format='%Y-%m-%d')
+def preprocess_medication(dfM):
+    """ Normalizes the medication order columns.
+    Numbers and dates (CATALOGCVCD, ORDERING_DATE, STRENGTHDOSE, DISPENSEQTY) are typed on read (see `schema.py`).
+    """
 
-    # Swifter to Speed up apply
-    dfM['END_DATE'] = dfM[['ORDERING_DATE', 'DURATION', 'DURATIONUNIT']].swifter.apply(calculates_date_end, axis='columns')
+    # End Date
+    dfM['END_DATE'] = calculates_date_end(dfM)
 
     """
     dfM['ORDER_STATUS'] = dfM['ORDER_STATUS'].replace({
@@ -133,54 +122,108 @@ if __name__ == '__main__':
     })
     """
 
-    # Dose Strength
-    dfM['STRENGTHDOSE'] = pd.to_numeric(dfM['STRENGTHDOSE'].str.replace(',', ''))
-
-    # Dose Strength Unit
-    dfM['STRENGTHDOSEUNIT'] = dfM['STRENGTHDOSEUNIT'].replace({
-        'inhalation': 'Inhalation',
-        'IntlUnits': 'Intl Units',
-        'Unit(s)': 'Units',
-        'MillionUnits': 'Million Units',
-        'Milliunits/m': 'Million Units/m'
-    })
-
-    # Quantity dispensed
-    dfM['DISPENSEQTY'] = pd.to_numeric(dfM['DISPENSEQTY'].str.replace(',', ''))
-
-    # Quantity dispensed unit
-    dfM['DISPENSEQTYUNIT'] = dfM['DISPENSEQTYUNIT'].replace({
-        'AUC(Carboplatin)': 'AUC (Carboplatin)',
-        'inhalation': 'Inhalation',
-        'Pack': 'Packet',
-        'packet(s)': 'Packet',
-        'kit(s)': 'Kit',
-        'Units': 'Unit',
-        'Unit(s)': 'Unit',
-        'MillionUnits': 'Million Units'
-    })
+    # Dose Strength Unit and Quantity dispensed unit (mapped on categories, see `vocabulary.py`)
+    dfM['STRENGTHDOSEUNIT'] = normalize_categories(dfM['STRENGTHDOSEUNIT'], vocabulary.STRENGTHDOSEUNIT)
+    dfM['DISPENSEQTYUNIT'] = normalize_categories(dfM['DISPENSEQTYUNIT'], vocabulary.DISPENSEQTYUNIT)
 
     # Remove name left/right whitespace
     dfM['MED_NAME'] = dfM['MED_NAME'].str.strip()
 
-    # Left Join TOPIC, OPHTHALMO, VACCINE
-    dfM = dfM.join(dfD[['TOPIC', 'OPHTHALMO', 'VACCINE']].fillna(False), on='MED_NAME', how='left')
-    #
-    # Medication-Drug
-    #
-    # Inner Join (medication_drug)
-    dfMD = dfM.set_index('MED_NAME')[['ID_MEDICATION']].join(dfDd[['ID_DRUG']], on='MED_NAME', how='inner')
-    dfMD['ID_MEDICATION_DRUG'] = np.arange(1, len(dfMD) + 1)
-    dfMD.sort_values('ID_MEDICATION_DRUG').reset_index(inplace=True, drop=True)
+    # Content hash of the normalized order
+    dfM['ROW_HASH'] = row_hash(dfM, ORDER_COLUMNS)
+    return dfM
+
+
+def partition_patients(files, chunksize):
+    """ Splits patients into STUDY_ID ranges of about `chunksize` orders each (a patient is never split).
+    Only STUDY_ID is read, one chunk at a time; one count is kept per patient. Returns the last STUDY_ID of each range.
+    """
+    counts = pd.Series(dtype='int64')
+    for file in files:
+        for df in iter_source(file, chunksize, columns=['STUDY_ID']):
+            counts = counts.add(df['STUDY_ID'].value_counts(), fill_value=0)
+    counts = counts.sort_index().astype('int64')
+    # Each patient goes to the range of its first order
+    ranges = ((counts.cumsum() - counts) // chunksize).to_numpy()
+    return counts.index.to_series().groupby(ranges).max().to_numpy(dtype='int64')
+
+
+def spill_medication_orders(files, bounds, chunksize, spill_dir):
+    """ Writes the orders of all files, one chunk at a time, to a parquet file per range of patients (see `partition_patients`).
+    Orders keep their position across all files in SEQ, and are written in that order.
+    Returns the parquet files in STUDY_ID order, the categorical columns (written as strings) and the number of orders.
+    """
+    paths = [os.path.join(spill_dir, 'medication-{k:05d}.parquet'.format(k=k)) for k in range(len(bounds))]
+    writers = [None] * len(bounds)
+    schema, categorical = None, []
+    seq = 0
+    try:
+        for file in files:
+            for dfM in iter_source(file, chunksize):
+                dfM['SEQ'] = np.arange(seq, seq + len(dfM))
+                seq += len(dfM)
+                table = pa.Table.from_pandas(dfM, preserve_index=False)
+                if schema is None:
+                    # Categories differ from chunk to chunk; a column of missing values only is typed as string
+                    categorical = [field.name for field in table.schema if pa.types.is_dictionary(field.type)]
+                    schema = pa.schema([
+                        pa.field(field.name, pa.string()) if pa.types.is_dictionary(field.type) or pa.types.is_null(field.type) else field
+                        for field in table.schema])
+                table = table.cast(schema)
+                # Rows of each range, in SEQ order
+                ranges = np.searchsorted(bounds, dfM['STUDY_ID'].to_numpy(dtype='int64'))
+                order = np.argsort(ranges, kind='stable')
+                keys, starts = np.unique(ranges[order], return_index=True)
+                for k, rows in zip(keys, np.split(order, starts[1:])):
+                    if writers[k] is None:
+                        writers[k] = pq.ParquetWriter(paths[k], schema, compression='zstd')
+                    writers[k].write_table(table.take(rows))
+    finally:
+        for writer in writers:
+            if writer is not None:
+                writer.close()
+    return [path for path, writer in zip(paths, writers) if writer is not None], categorical, seq
+
+
+def read_partition(path, categorical):
+    """ Orders of a range of patients (see `spill_medication_orders`), with their categorical columns"""
+    return pq.read_table(path, read_dictionary=categorical).to_pandas()
+
+
+def join_medication_flags(dfM, dfD):
+    """ Left Join TOPIC, OPHTHALMO, VACCINE on MED_CODE"""
+    dfF = dfD[['TOPIC', 'OPHTHALMO', 'VACCINE']].fillna(False).reset_index(drop=True)
+    # Code `-1` (not mapped) has no flags
+    dfF = dfF.reindex(dfM['MED_CODE'].to_numpy())
+    dfF.index = dfM.index
+    return pd.concat([dfM, dfF], axis='columns')
+
+
+def map_medication_drug(dfM, dfDd, start=1):
+    """ Inner Join (medication_drug) on MED_CODE. IDs are numbered from `start`, in ID_MEDICATION order.
+    `dfDd` must be sorted by MED_CODE (see `load_mapping`) and `dfM` by ID_MEDICATION.
+    """
+    keys = dfDd['MED_CODE'].to_numpy()
+    codes = dfM['MED_CODE'].to_numpy()
+    # Drugs of each medication are rows `first:last` of `dfDd`
+    first = np.searchsorted(keys, codes, side='left')
+    counts = np.searchsorted(keys, codes, side='right') - first
+    offset = np.cumsum(counts) - counts
+    positions = np.arange(counts.sum()) - np.repeat(offset, counts) + np.repeat(first, counts)
+
+    dfMD = pd.DataFrame({
+        'ID_MEDICATION': np.repeat(dfM['ID_MEDICATION'].to_numpy(), counts),
+        'ID_DRUG': dfDd['ID_DRUG'].to_numpy()[positions],
+    })
+    dfMD['ID_MEDICATION_DRUG'] = np.arange(start, start + len(dfMD))
+    return dfMD
 
-    #
-    # Insert to MysSQL
-    #
-    print('Insert to MySQL (this may take a while)')
 
-    # dfM
-    print('> dfM')
-    dfM.rename(columns={
+def insert_medication(dfM, dfMD, engine, staged=False, method='auto'):
+    """ Renames columns to their table names and inserts `medication` and `medication_drug` (`method`, see `ddiindy/bulkload.py`).
+    With `staged`, rows go through the staging tables of the delta ingest (see `delta.py`).
+    """
+    dfM = dfM.rename(columns={
         'ID_MEDICATION': 'id_medication',
         'STUDY_ID': 'id_patient',
         'ORDERING_DATE': 'dt_start',
@@ -199,23 +242,262 @@ if __name__ == '__main__':
         'TOPIC': 'is_topic',
         'OPHTHALMO': 'is_ophthalmo',
         'VACCINE': 'is_vaccine',
-    }, inplace=True)
+        'ROW_HASH': 'row_hash',
+    })
     cols = [
         'id_medication', 'id_patient', 'id_catalog',
         'dt_start', 'dt_end', 'status', 'name', 'dose_strength', 'dose_strength_unit', 'qt_dispensed', 'qt_dispensed_unit', 'qt_refill', 'nr_refill', 'duration', 'duration_unit',
-        'is_topic', 'is_ophthalmo', 'is_vaccine'
+        'is_topic', 'is_ophthalmo', 'is_vaccine', 'row_hash'
     ]
     dfM = dfM.loc[:, cols]
-    dfM.to_sql(name='medication', con=engine, if_exists='append', index=False, chunksize=5000, method='multi')
+    if staged:
+        apply_upserts(dfM, 'medication', engine, key='id_medication')
+    else:
+        bulk_load(dfM, 'medication', engine, method=method)
 
-    # dfD
-    print('> dfMD')
-    dfMD.rename(columns={
+    dfMD = dfMD.rename(columns={
         'ID_MEDICATION_DRUG': 'id_medication_drug',
         'ID_MEDICATION': 'id_medication',
         'ID_DRUG': 'id_drug'
-    }, inplace=True)
-    dfMD.to_sql(name='medication_drug', con=engine, if_exists='append', index=False, chunksize=5000, method='multi')
+    })
+    dfMD = dfMD.loc[:, ['id_medication_drug', 'id_medication', 'id_drug']]
+    if staged:
+        apply_upserts(dfMD, 'medication_drug', engine, key='id_medication_drug')
+    else:
+        bulk_load(dfMD, 'medication_drug', engine, method=method)
+
+
+def build_patient_ranges(engine):
+    """ Rebuilds `medication_patient_range`: the first and last medication ID of each patient.
+    With a clustered load, each range holds only that patient's orders and is read with a primary-key range scan.
+    """
+    truncate_table(engine, 'medication_patient_range')
+    engine.execute("""
+        INSERT INTO medication_patient_range (id_patient, id_medication_first, id_medication_last, n_medication, is_contiguous)
+        SELECT id_patient, MIN(id_medication), MAX(id_medication), COUNT(*), (MAX(id_medication) - MIN(id_medication) + 1 = COUNT(*))
+        FROM medication
+        GROUP BY id_patient
+    """)
+
+
+def load_medication(engine, files, delta=False, streaming=True, chunksize=500000, resume=True, clustered=True, dedup=True, n_cpu=None, method='auto', phase=no_phase):
+    """ Loads the medication order `files` into `medication` and `medication_drug`, and rebuilds `medication_patient_range`.
+    See the flags of `__main__` for `delta`, `streaming`, `clustered` and `dedup`. `phase` times each step (see `benchmark.py`).
+    Returns the medications loaded.
+    """
+    # Truncate table (a streaming load truncates when it starts over, see `checkpoint.py`)
+    if not delta and not streaming:
+        print('Truncating Table')
+        truncate_table(engine, 'medication')
+        truncate_table(engine, 'medication_drug')
+
+    with phase('read') as record:
+        # Map Dictionary
+        print("Load DrugBank alias index.")
+        version, exported_on, artifacts = load_drugbank(DRUGBANK_FILE, DRUGBANK_MEMBER, artifacts=['drug', 'secondary'])
+        alias = build_alias_index(artifacts)
+
+        print("Load Mapping File.")
+        dfD, dfDd = load_mapping(alias)
+        record['rows'] = len(dfD)
+
+    print("Load Medicine Files.")
+    if delta:
+        # Orders have no stable key: they are matched by the hash of their content
+        with phase('read') as record:
+            dfH = read_hashes(engine, 'medication', ['id_medication', 'id_patient', 'row_hash'])
+            record['rows'] = len(dfH)
+        print('Hashing Data ({n:,d} medications in the table)'.format(n=len(dfH)))
+        with phase('normalize') as record:
+            hashes = np.concatenate([preprocess_medication(dfM)['ROW_HASH'].to_numpy() for file in files for dfM in iter_source(file, chunksize)])
+            if dedup:
+                hashes = hashes[first_occurrences(hashes)]
+            remaining, dfDel = diff_counts(hashes, dfH, 'id_medication')
+            record['rows'] = len(hashes)
+        print('> {n:,d} new medications, {nd:,d} removed'.format(n=int(remaining.sum()), nd=len(dfDel)))
+
+        # IDs continue after the current ones
+        n_medication = int(dfH['id_medication'].max()) if len(dfH) else 0
+        n_medication_drug = int(engine.execute("SELECT COALESCE(MAX(id_medication_drug), 0) FROM medication_drug").scalar())
+        changed = [dfDel['id_patient'].to_numpy(dtype='int64')]
+        n_inserted = 0
+        with phase('load') as record:
+            for file in files:
+                if not len(remaining):
+                    break
+                for dfM in iter_source(file, chunksize):
+                    dfM = preprocess_medication(dfM)
+                    is_insert, remaining = select_inserts(dfM['ROW_HASH'].to_numpy(), remaining)
+                    dfM = dfM.loc[is_insert, :].reset_index(drop=True)
+                    if not len(dfM):
+                        continue
+                    dfM['ID_MEDICATION'] = np.arange(n_medication + 1, n_medication + len(dfM) + 1)
+                    dfM['MED_CODE'] = encode_med_name(dfM['MED_NAME'], dfD.index)
+                    dfM = join_medication_flags(dfM, dfD)
+                    dfMD = map_medication_drug(dfM, dfDd, start=n_medication_drug + 1)
+                    insert_medication(dfM, dfMD, engine, staged=True)
+                    n_medication += len(dfM)
+                    n_medication_drug += len(dfMD)
+                    n_inserted += len(dfM)
+                    changed.append(dfM['STUDY_ID'].to_numpy(dtype='int64'))
+
+            # Removed orders
+            delete_rows(engine, 'medication_drug', 'id_medication', dfDel['id_medication'])
+            delete_rows(engine, 'medication', 'id_medication', dfDel['id_medication'])
+            n = record_changed_patients(engine, np.concatenate(changed))
+            record['rows'] = n_inserted + len(dfDel)
+        print('> {n:,d} patients changed'.format(n=n))
+
+    elif streaming:
+        # IDs continue across chunks, and from the checkpoint on a restart
+        chunk_start, n_rows = start_load(engine, '05-medication', ['medication', 'medication_drug'], chunksize, resume=resume)
+        n_medication, n_medication_drug = n_rows['medication'], n_rows['medication_drug']
+        spill_dir = None
+        if clustered or dedup:
+            # Repeats and clustered IDs only involve the orders of one patient: orders are regrouped by patient ranges
+            # of about CHUNKSIZE orders, and each range is then loaded as a chunk
+            print('Partitioning Medication Orders by Patient')
+            os.makedirs(SPILL_DIR, exist_ok=True)
+            spill_dir = tempfile.mkdtemp(prefix='05-medication-', dir=SPILL_DIR)
+            with phase('read') as record:
+                bounds = partition_patients(files, chunksize)
+                paths, categorical, record['rows'] = spill_medication_orders(files, bounds, chunksize, spill_dir)
+            print('> {n:,d} patient ranges'.format(n=len(paths)))
+            chunks = (read_partition(path, categorical) for path in paths)
+        else:
+            chunks = (dfM for file in files for dfM in iter_source(file, chunksize))
+        chunk = 0
+        n_repeated = 0
+        try:
+            while True:
+                with phase('read') as record:
+                    dfM = next(chunks, None)
+                    record['rows'] = len(dfM) if dfM is not None else 0
+                if dfM is None:
+                    break
+                chunk += 1
+                if chunk <= chunk_start:
+                    # Committed before a restart
+                    continue
+                with phase('normalize') as record:
+                    dfM = preprocess_medication(dfM)
+                    if dedup:
+                        # Rows of a range are in file order (SEQ), so the first occurrence is the same as across all files
+                        is_first = first_occurrences(dfM['ROW_HASH'].to_numpy())
+                        n_repeated += int((~is_first).sum())
+                        dfM = dfM.loc[is_first, :].reset_index(drop=True)
+                    if clustered:
+                        # Ranges are in STUDY_ID order, so IDs are the same as clustered across all files
+                        dfM['ID_MEDICATION'] = clustered_ids(dfM['STUDY_ID'], dfM['ORDERING_DATE'], start=n_medication + 1)
+                        dfM = dfM.sort_values('ID_MEDICATION', kind='mergesort').reset_index(drop=True)
+                    else:
+                        dfM['ID_MEDICATION'] = np.arange(n_medication + 1, n_medication + len(dfM) + 1)
+                    dfM = dfM.drop(columns='SEQ', errors='ignore')
+                    record['rows'] = len(dfM)
+                with phase('join') as record:
+                    dfM['MED_CODE'] = encode_med_name(dfM['MED_NAME'], dfD.index)
+                    dfM = join_medication_flags(dfM, dfD)
+                    dfMD = map_medication_drug(dfM, dfDd, start=n_medication_drug + 1)
+                    record['rows'] = len(dfM)
+                n_medication += len(dfM)
+                n_medication_drug += len(dfMD)
+                # The chunk and its checkpoint are committed together
+                with phase('load') as record:
+                    with engine.begin() as conn:
+                        insert_medication(dfM, dfMD, conn, method=method)
+                        save_checkpoint(conn, '05-medication', chunk, chunksize,
+                                        n_rows={'medication': n_medication, 'medication_drug': n_medication_drug},
+                                        id_last={'medication': int(dfM['ID_MEDICATION'].iloc[-1]) if len(dfM) else None, 'medication_drug': n_medication_drug})
+                    record['rows'] = len(dfM) + len(dfMD)
+                print('> {n:,d} medications ({nd:,d} medication_drug) inserted'.format(n=n_medication, nd=n_medication_drug))
+        finally:
+            if spill_dir is not None:
+                shutil.rmtree(spill_dir, ignore_errors=True)
+        if dedup:
+            print('> {n:,d} repeated orders removed'.format(n=n_repeated))
+        finish_load(engine, '05-medication')
+        n_inserted = n_medication
+    else:
+        print('Loading Data ({n:d} files, {n_cpu:d} cpu)'.format(n=len(files), n_cpu=n_cpu or mp.cpu_count()))
+        with phase('read') as record:
+            ldf = read_sources(files, n_cpu=n_cpu)
+
+            print("Concatenating DataFrames")
+            dfM = concat_categorical(ldf)
+            del ldf
+            record['rows'] = len(dfM)
+
+        # PreProcessing
+        print('PreProcessing')
+        with phase('normalize') as record:
+            dfM = preprocess_medication(dfM)
+            if dedup:
+                is_first = first_occurrences(dfM['ROW_HASH'].to_numpy())
+                print('> {n:,d} repeated orders removed, of {nt:,d}'.format(n=int((~is_first).sum()), nt=len(dfM)))
+                dfM = dfM.loc[is_first, :].reset_index(drop=True)
+            if clustered:
+                dfM['ID_MEDICATION'] = clustered_ids(dfM['STUDY_ID'], dfM['ORDERING_DATE'])
+                dfM = dfM.sort_values('ID_MEDICATION', kind='mergesort').reset_index(drop=True)
+            else:
+                dfM['ID_MEDICATION'] = np.arange(1, len(dfM) + 1)
+            record['rows'] = len(dfM)
+
+        with phase('join') as record:
+            dfM['MED_CODE'] = encode_med_name(dfM['MED_NAME'], dfD.index)
+            dfM = join_medication_flags(dfM, dfD)
+
+            #
+            # Medication-Drug
+            #
+            dfMD = map_medication_drug(dfM, dfDd)
+            record['rows'] = len(dfM)
+
+        #
+        # Insert to MysSQL
+        #
+        print('Insert to MySQL (this may take a while)')
+        with phase('load') as record:
+            insert_medication(dfM, dfMD, engine, method=method)
+            record['rows'] = len(dfM) + len(dfMD)
+        n_inserted = len(dfM)
+
+    print('Building Patient Ranges')
+    with phase('load'):
+        build_patient_ranges(engine)
+    return n_inserted
+
+
+if __name__ == '__main__':
+
+    # DB
+    cfg = configparser.ConfigParser()
+    cfg.read('../config.ini')
+    url = 'mysql+pymysql://%(user)s:%(pass)s@%(host)s:%(port)s/%(db)s?charset=utf8&local_infile=1' % cfg['IU-RDC-MySQL']
+    engine = sqlalchemy.create_engine(url, encoding='utf-8')
+    event.listen(engine, "before_cursor_execute", add_own_encoders)
+
+    # Only apply new and removed orders (see `delta.py`), instead of truncating and reloading the tables
+    DELTA = False
+    # Process medication orders in chunks of CHUNKSIZE rows, instead of all files at once.
+    # Each chunk is committed with its checkpoint; with RESUME, a failed load continues after the last committed chunk.
+    STREAMING = True
+    CHUNKSIZE = 500000
+    RESUME = True
+    # With CLUSTERED or DEDUP, a streaming load first regroups the orders by patient, on disk (see `SPILL_DIR`), and then
+    # loads one range of patients of about CHUNKSIZE orders at a time. Only one count per patient is kept across chunks.
+    # Number medications in (patient, date) order, so each patient's rows are contiguous in `medication` and `medication_drug`
+    CLUSTERED = True
+    # Load each order once: exact repeats (same ROW_HASH), within a file or across files, are dropped.
+    # Streaming without CLUSTERED, IDs then follow the patient ranges, and file order within each range.
+    DEDUP = True
+
+    # File Type
+    ftype = 'u'
+    # Otherwise, read all files at once (csv files without a columnar copy are parsed in a process pool)
+    n_cpu = mp.cpu_count()
+
+    files = ['../data/p2876_meds_{fid:02d}_{ftype:s}.csv'.format(fid=fid, ftype=ftype) for fid in range(1, 13)]
+    load_medication(engine, files, delta=DELTA, streaming=STREAMING, chunksize=CHUNKSIZE, resume=RESUME, clustered=CLUSTERED, dedup=DEDUP, n_cpu=n_cpu)
 
     #
     print('Done.')
@@ -0,0 +1,48 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Benchmarks the ingest stages on synthetic cohorts of increasing size (see `benchmark.py`).
+# Writes wall time, rows/s and peak memory of each phase (read, normalize, join, load), per size and strategy, to a JSON file.
+#
+#
+import time
+import multiprocessing as mp
+from benchmark import run_benchmark, write_results
+
+
+if __name__ == '__main__':
+
+    # Cohorts are generated here; never the real `../data`
+    WORK_DIR = '../data/synthetic/benchmark'
+    RESULTS_FILE = 'results/benchmark-ingest.json'
+    SEED = 0
+    # Number of patients of each cohort
+    SIZES = [10000, 100000, 1000000]
+    # Stages to run, in load order
+    STAGES = ['01-patient', '02-ndc', '03-drug', '05-medication']
+    # A SQLite file stands in for the database; or the URL of a database with the tables already created
+    URL = None
+    n_cpu = mp.cpu_count()
+
+    # Anything in `synthetic.CONFIG`, other than `n_patients`
+    config = {}
+
+    # Strategies to compare (see `benchmark.STRATEGY` for the knobs and their defaults)
+    STRATEGIES = [
+        {'name': 'streaming-500k', 'streaming': True, 'chunksize': 500000},
+        {'name': 'streaming-100k', 'streaming': True, 'chunksize': 100000},
+        {'name': 'streaming-columnar', 'streaming': True, 'chunksize': 500000, 'columnar': True},
+        {'name': 'streaming-unclustered', 'streaming': True, 'chunksize': 500000, 'clustered': False, 'dedup': False},
+        {'name': 'in-memory', 'streaming': False, 'n_cpu': 1},
+        {'name': 'in-memory-parallel', 'streaming': False, 'n_cpu': n_cpu},
+        {'name': 'in-memory-executemany', 'streaming': False, 'n_cpu': n_cpu, 'method': 'executemany'},
+    ]
+
+    print('Benchmarking ingest (sizes: {sizes:s}, strategies: {n:d})'.format(sizes=', '.join('{:,d}'.format(size) for size in SIZES), n=len(STRATEGIES)))
+    t0 = time.time()
+    records = run_benchmark(WORK_DIR, SIZES, STRATEGIES, stages=STAGES, url=URL, seed=SEED, n_cpu=n_cpu, config=config)
+    write_results(RESULTS_FILE, records)
+    print('> {n:,d} records written to {file:s} ({seconds:,.1f}s)'.format(n=len(records), file=RESULTS_FILE, seconds=time.time() - t0))
+
+    print('Done.')
@@ -0,0 +1,36 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Generates a synthetic cohort in the layouts of the raw extracts (see `synthetic.py`).
+# Run the loaders from `<OUT_DIR>/01-insert_to_mysql` to ingest it instead of the real extracts.
+#
+#
+import time
+import multiprocessing as mp
+from synthetic import generate
+
+
+if __name__ == '__main__':
+
+    # Output; never the real `../data`
+    OUT_DIR = '../data/synthetic'
+    SEED = 0
+    n_cpu = mp.cpu_count()
+
+    # Anything in `synthetic.CONFIG`
+    config = {
+        'n_patients': 10000,
+        'meds_median': 8,
+        'meds_tail_share': 0.02,
+        'mapping_coverage': 0.9,
+    }
+
+    print('Generating synthetic cohort (seed: {seed:d}, patients: {n:,d})'.format(seed=SEED, n=config['n_patients']))
+    t0 = time.time()
+    n_rows = generate(OUT_DIR, seed=SEED, n_cpu=n_cpu, **config)
+    for file, n in n_rows.items():
+        print('> {file:s}: {n:,d} rows'.format(file=file, n=n))
+    print('> {seconds:,.1f}s'.format(seconds=time.time() - t0))
+
+    print('Done.')
@@ -9,6 +9,8 @@ import pandas as pd
 pd.set_option('display.max_rows', 50)
 pd.set_option('display.max_columns', 500)
 pd.set_option('display.width', 1000)
+from utils import concat_categorical
+from sources import read_sources
 
 if __name__ == '__main__':
 
@@ -26,23 +28,11 @@ if __name__ == '__main__':
 
 
     print("Load Medicine Files")
-    dtype = {
-        'STRENGTHDOSEUNIT': 'object',
-        'DISPENSEQTYUNIT': 'object',
-        'DURATIONUNIT': 'object'
-    }
-    ldf = []
-    for fid in range(1, 13):
-        file = 'p2876_meds_{fid:02d}_{ftype:s}.csv'.format(fid=fid, ftype=ftype)
-
-        # Load Data
-        print('Loading Data (file: {file:s})'.format(file=file))
-
-        dft = pd.read_csv('../data/{file:s}'.format(file=file), index_col=None, nrows=None, dtype=dtype)
-        ldf.append(dft)
+    files = ['../data/p2876_meds_{fid:02d}_{ftype:s}.csv'.format(fid=fid, ftype=ftype) for fid in range(1, 13)]
+    ldf = read_sources(files)
 
     print("Concatenating DataFrames")
-    df = pd.concat(ldf, axis='index', ignore_index=True, verify_integrity=False)
+    df = concat_categorical(ldf)
 
     # PreProcessing
     print('PreProcessing')
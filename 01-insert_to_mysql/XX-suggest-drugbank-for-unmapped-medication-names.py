@@ -0,0 +1,57 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Lists medication names missing from `map-drug-name-drugbank.csv`, with DrugBank candidates for manual annotation.
+#
+# Only the `MED_NAME` column of the extracts is read, one chunk at a time. Unmapped names are ranked by their
+# number of prescriptions; candidates come from a character n-gram index over DrugBank names and synonyms (see `candidates.py`).
+#
+import numpy as np
+import pandas as pd
+pd.set_option('display.max_rows', 50)
+pd.set_option('display.max_columns', 500)
+pd.set_option('display.width', 1000)
+from sources import count_source_values
+from drugbank import load_drugbank, DRUGBANK_FILE, DRUGBANK_MEMBER
+from candidates import drugbank_terms, suggest_candidates
+
+
+if __name__ == '__main__':
+
+    # File Type
+    ftype = 'u'
+    # Candidates per name
+    K = 5
+
+    # Map Dictionary
+    print("Load Current DrugName-DrugBankID map file")
+    dfM = pd.read_csv('data/map-drug-name-drugbank.csv', usecols=['MED_NAME'])
+    mapped = pd.Index(dfM['MED_NAME'].str.strip().dropna().unique())
+
+    print("Counting Medicine Names")
+    files = ['../data/p2876_meds_{fid:02d}_{ftype:s}.csv'.format(fid=fid, ftype=ftype) for fid in range(1, 13)]
+    counts = count_source_values(files, 'MED_NAME')
+    # Remove name left/right whitespace
+    counts = counts.groupby(counts.index.str.strip()).sum()
+    print('> {n:,d} distinct names in {p:,d} prescriptions'.format(n=len(counts), p=counts.sum()))
+
+    # Unmapped, by prescription volume
+    dfU = counts.loc[~counts.index.isin(mapped)].rename('N_PRESCRIPTIONS').reset_index()
+    dfU = dfU.sort_values(['N_PRESCRIPTIONS', 'MED_NAME'], ascending=[False, True], kind='mergesort').reset_index(drop=True)
+    print('> {n:,d} unmapped names in {p:,d} prescriptions ({pct:.2%})'.format(n=len(dfU), p=dfU['N_PRESCRIPTIONS'].sum(), pct=dfU['N_PRESCRIPTIONS'].sum() / max(counts.sum(), 1)))
+
+    print('Load DrugBank')
+    version, exported_on, artifacts = load_drugbank(DRUGBANK_FILE, DRUGBANK_MEMBER, artifacts=['drug', 'synonym'])
+    dft = drugbank_terms(artifacts)
+
+    print('Suggesting Candidates')
+    dfC = suggest_candidates(dfU['MED_NAME'].tolist(), dft, k=K)
+    dfC = dfU.merge(dfC, on='MED_NAME', how='left', sort=False)
+    dfC['SCORE'] = np.round(dfC['SCORE'], 3)
+    dfC = dfC[['MED_NAME', 'N_PRESCRIPTIONS', 'RANK', 'ID_DRUGBANK', 'DRUGBANK_NAME', 'SOURCE', 'TERM', 'SCORE']]
+
+    print('Exporting unmapped names and candidates')
+    dfC.to_csv('results/unmapped-medication-names-candidates.csv', index=False)
+
+    print('Done.')
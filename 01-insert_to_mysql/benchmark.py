@@ -0,0 +1,266 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Ingest throughput benchmark, on synthetic cohorts (see `synthetic.py`).
+#
+# Each stage (01-patient, 02-ndc, 03-drug, 05-medication) runs in-process through the loader of its script,
+# split into phases: read, normalize, join and load. Each phase records its wall time, rows, rows/s and the
+# peak resident memory of this process while it ran (sampled by a background thread). Phases that repeat
+# (e.g., per chunk) are summed. A strategy sets the knobs being compared: chunk size, bulk-load method,
+# streaming or in-memory medication load, number of reader processes, whether the columnar cache is used, and whether
+# medication IDs are clustered and repeated orders dropped.
+#
+# The stages run through the same loader functions as their scripts (`load_patient`, `load_ndc`, `load_drug` and
+# `load_medication`), which time their steps with the `phase` they are given.
+#
+# The database is a SQLite file (tables from `script_create_table.sql`) unless a URL is given; the tables of
+# another database must already exist.
+#
+import os
+import re
+import sys
+import json
+import time
+import platform
+import importlib.util
+import threading
+import resource
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import sqlalchemy
+from synthetic import generate
+from sources import convert_source, CACHE_DIR
+
+
+PHASES = ['read', 'normalize', 'join', 'load']
+
+STAGES = ['01-patient', '02-ndc', '03-drug', '05-medication']
+
+# Knobs of a strategy, and their defaults
+STRATEGY = {
+    'name': 'default',
+    'chunksize': 500000,
+    'method': 'auto',
+    'streaming': True,
+    'n_cpu': 1,
+    'columnar': False,
+    'clustered': True,
+    'dedup': True,
+}
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'script_create_table.sql')
+
+
+def rss_mb():
+    """ Resident memory of this process, in MB"""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        # Peak so far, where /proc is not available (KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+class PhaseRecorder(object):
+    """ Wall time, rows and peak memory of the phases of one stage"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.phases = {}
+        self.peak = 0.0
+        self.lock = threading.Lock()
+        self.running = True
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+
+    def sample(self):
+        while self.running:
+            rss = rss_mb()
+            with self.lock:
+                self.peak = max(self.peak, rss)
+            time.sleep(self.interval)
+
+    @contextmanager
+    def phase(self, name):
+        """ Times a phase; set `record['rows']` to the rows it handled"""
+        record = {'rows': 0}
+        with self.lock:
+            self.peak = rss_mb()
+        t0 = time.time()
+        yield record
+        seconds = time.time() - t0
+        with self.lock:
+            peak = max(self.peak, rss_mb())
+        total = self.phases.setdefault(name, {'seconds': 0.0, 'rows': 0, 'peak_rss_mb': 0.0})
+        total['seconds'] += seconds
+        total['rows'] += int(record['rows'])
+        total['peak_rss_mb'] = max(total['peak_rss_mb'], peak)
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        return [
+            dict(phase=name, seconds=round(p['seconds'], 4), rows=p['rows'],
+                 rows_per_second=round(p['rows'] / p['seconds'], 1) if p['seconds'] > 0 else None,
+                 peak_rss_mb=round(p['peak_rss_mb'], 1))
+            for name, p in sorted(self.phases.items(), key=lambda item: PHASES.index(item[0]) if item[0] in PHASES else len(PHASES))
+        ]
+
+
+def sqlite_schema(sql):
+    """ The MySQL DDL of `script_create_table.sql` as SQLite statements. Keys become indexes; comments, engines and generated columns are dropped."""
+    sql = re.sub(r'/\*.*?\*/', '', sql, flags=re.S)
+    # Column comments may contain `;`
+    sql = re.sub(r'\s*COMMENT\s+"[^"]*"', '', sql)
+    statements = []
+    for statement in sql.split(';'):
+        statement = statement.strip()
+        if not statement:
+            continue
+        match = re.match(r'CREATE TABLE (\w+)', statement)
+        if match is None:
+            statements.append(statement)
+            continue
+        table = match.group(1)
+        statement = re.sub(r'\)\s*ENGINE=\w+$', ')', statement)
+        lines, indexes = [], []
+        for line in statement.split('\n'):
+            key = re.match(r'\s*(UNIQUE )?KEY (\w+) \(([^)]*)\)', line)
+            if key is not None:
+                indexes.append('CREATE {unique:s}INDEX {name:s} ON {table:s} ({columns:s})'.format(unique=key.group(1) or '', name=key.group(2), table=table, columns=key.group(3)))
+            elif 'GENERATED ALWAYS' not in line:
+                lines.append(line)
+        # The last column definition may have lost its trailing key
+        statement = re.sub(r',\s*\n\)$', '\n)', '\n'.join(lines))
+        statements.append(statement)
+        statements.extend(indexes)
+    return statements
+
+
+def create_sqlite(filep, schema_file=SCHEMA_FILE):
+    """ A new SQLite database with the ingest tables"""
+    if os.path.exists(filep):
+        os.remove(filep)
+    engine = sqlalchemy.create_engine('sqlite:///{filep:s}'.format(filep=os.path.abspath(filep)))
+    with open(schema_file) as file:
+        statements = sqlite_schema(file.read())
+    for statement in statements:
+        engine.execute(statement)
+    return engine
+
+
+def import_stage(name):
+    """ A stage script as a module; its `__main__` block does not run"""
+    if name not in sys.modules:
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        # Its imports (`utils`, `sources`, ...) resolve from any working directory
+        if module_dir not in sys.path:
+            sys.path.append(module_dir)
+        filep = os.path.join(module_dir, '{name:s}.py'.format(name=name))
+        spec = importlib.util.spec_from_file_location(name, filep)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[name] = module
+    return sys.modules[name]
+
+
+def bench_patient(engine, strategy, recorder):
+    stage = import_stage('01-patient')
+    stage.load_patient(engine, chunksize=strategy['chunksize'], resume=False, method=strategy['method'], phase=recorder.phase)
+
+
+def bench_ndc(engine, strategy, recorder):
+    stage = import_stage('02-ndc')
+    stage.load_ndc(engine, method=strategy['method'], phase=recorder.phase)
+
+
+def bench_drug(engine, strategy, recorder):
+    stage = import_stage('03-drug')
+    stage.load_drug(engine, parallel=(strategy['n_cpu'] > 1), n_cpu=strategy['n_cpu'], refresh=True, method=strategy['method'], phase=recorder.phase)
+
+
+def bench_medication(engine, strategy, recorder):
+    stage = import_stage('05-medication')
+    files = ['../data/p2876_meds_{fid:02d}_u.csv'.format(fid=fid) for fid in range(1, 13)]
+    stage.load_medication(
+        engine, files, streaming=strategy['streaming'], chunksize=strategy['chunksize'], resume=False,
+        clustered=strategy['clustered'], dedup=strategy['dedup'], n_cpu=strategy['n_cpu'], method=strategy['method'], phase=recorder.phase)
+
+
+BENCHMARKS = {
+    '01-patient': bench_patient,
+    '02-ndc': bench_ndc,
+    '03-drug': bench_drug,
+    '05-medication': bench_medication,
+}
+
+
+@contextmanager
+def working_dir(path):
+    """ Runs a block from `path`; the stages read their inputs from paths relative to it"""
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+def run_benchmark(work_dir, sizes, strategies, stages=STAGES, url=None, seed=0, n_cpu=None, config=None):
+    """ Generates a cohort of each size and runs the stages on it once per strategy. Returns the records of every phase."""
+    records = []
+    for size in sizes:
+        out_dir = os.path.abspath(os.path.join(work_dir, 'n{size:d}'.format(size=size)))
+        t0 = time.time()
+        n_rows = generate(out_dir, seed=seed, n_cpu=n_cpu, n_patients=size, **(config or {}))
+        seconds = time.time() - t0
+        n_orders = sum(n for file, n in n_rows.items() if file.startswith('p2876_meds'))
+        print('> {size:,d} patients: {n:,d} orders generated in {seconds:.1f}s'.format(size=size, n=n_orders, seconds=seconds))
+
+        for strategy in strategies:
+            strategy = dict(STRATEGY, **strategy)
+            with working_dir(os.path.join(out_dir, '01-insert_to_mysql')):
+                # Each strategy starts from the csv files and an empty database (03-drug parses the XML again, with `refresh`)
+                if os.path.isdir(CACHE_DIR):
+                    for file in os.listdir(CACHE_DIR):
+                        if file.endswith('.parquet'):
+                            os.remove(os.path.join(CACHE_DIR, file))
+                engine = create_sqlite('benchmark.sqlite') if url is None else sqlalchemy.create_engine(url)
+                if strategy['columnar']:
+                    recorder = PhaseRecorder()
+                    with recorder.phase('read') as record:
+                        record['rows'] = sum(convert_source(os.path.join('../data', file)) for file in n_rows if file.startswith('p2876_'))
+                    records.extend(dict(size=size, n_orders=n_orders, strategy=strategy, stage='00-convert-raw-data', **r) for r in recorder.close())
+                for stage in stages:
+                    recorder = PhaseRecorder()
+                    t0 = time.time()
+                    BENCHMARKS[stage](engine, strategy, recorder)
+                    phases = recorder.close()
+                    print('> {size:,d} patients, {strategy:s}, {stage:s}: {seconds:.1f}s ({phases:s})'.format(
+                        size=size, strategy=strategy['name'], stage=stage, seconds=time.time() - t0,
+                        phases=', '.join('{phase:s} {seconds:.1f}s'.format(**p) for p in phases)))
+                    records.extend(dict(size=size, n_orders=n_orders, strategy=strategy, stage=stage, **r) for r in phases)
+                engine.dispose()
+    return records
+
+
+def write_results(filep, records):
+    """ Writes the records, with the environment they ran in, as JSON"""
+    os.makedirs(os.path.dirname(filep) or '.', exist_ok=True)
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sqlalchemy': sqlalchemy.__version__,
+        },
+        'records': records,
+    }
+    with open(filep, 'w') as file:
+        json.dump(results, file, indent=2)
@@ -0,0 +1,156 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: DrugBank candidates for medication names, from a character n-gram inverted index.
+#
+# Names are normalized (lowercase, words only, tokens with digits such as doses removed) and cut into
+# character n-grams, padded with a space at both ends. The index stores, for each n-gram, the sorted list of
+# DrugBank terms (names and synonyms) containing it. A query gathers the lists of its n-grams, counts the
+# n-grams each term shares with it, and ranks terms by their Dice coefficient: 2 * shared / (n-grams of both).
+# Queries run in batches, all with numpy array operations. N-grams found in too many terms do not discriminate
+# and are left out of the coefficient.
+#
+import numpy as np
+import pandas as pd
+
+
+# Dose forms, routes and units, dropped from names before matching
+STOPWORDS = [
+    'mg', 'mcg', 'g', 'kg', 'ml', 'l', 'meq', 'mmol', 'unit', 'units', 'iu', 'hr',
+    'tab', 'tabs', 'tablet', 'tablets', 'cap', 'caps', 'capsule', 'capsules', 'chew', 'chewable',
+    'sol', 'soln', 'solution', 'susp', 'suspension', 'syrup', 'elixir', 'liquid', 'powder', 'packet',
+    'inj', 'injection', 'vial', 'syringe', 'pen', 'ivpb', 'iv', 'im', 'sc', 'subq', 'oral', 'po',
+    'cream', 'ointment', 'oint', 'gel', 'lotion', 'patch', 'spray', 'drops', 'inhaler', 'nebulizer',
+    'er', 'xr', 'sr', 'xl', 'dr', 'ec', 'odt', 'pf',
+]
+
+
+def normalize_names(names):
+    """ Lowercase names, with punctuation, tokens containing digits (doses, strengths) and `STOPWORDS` removed"""
+    x = names.astype(str).str.lower()
+    x = x.str.replace(r'[^a-z0-9]+', ' ', regex=True)
+    x = x.str.replace(r'\b[a-z]*[0-9][a-z0-9]*\b', ' ', regex=True)
+    x = x.str.replace(r'\b(?:{words:s})\b'.format(words='|'.join(STOPWORDS)), ' ', regex=True)
+    x = x.str.replace(r'\s+', ' ', regex=True).str.strip()
+    return x
+
+
+def explode_ngrams(names, n=3):
+    """ (position, n-gram) pairs of the distinct character n-grams of each name"""
+    positions, ngrams = [], []
+    for i, name in enumerate(names):
+        padded = ' {name:s} '.format(name=name)
+        grams = {padded[j:j + n] for j in range(len(padded) - n + 1)}
+        positions.extend([i] * len(grams))
+        ngrams.extend(grams)
+    return np.array(positions, dtype='int64'), ngrams
+
+
+def build_ngram_index(terms, n=3):
+    """ Inverted index of the character n-grams of `terms` (unique, normalized strings).
+    The terms containing n-gram `g` are `postings[indptr[g]:indptr[g + 1]]`.
+    """
+    positions, ngrams = explode_ngrams(terms, n=n)
+    codes, vocabulary = pd.factorize(pd.Series(ngrams, dtype=object))
+    order = np.argsort(codes, kind='mergesort')
+    return {
+        'n': n,
+        'terms': pd.Index(terms),
+        'ngrams': pd.Index(vocabulary),
+        'indptr': np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(vocabulary)))]),
+        'postings': positions[order],
+        'sizes': np.bincount(positions, minlength=len(terms)),
+    }
+
+
+def query_ngram_index(index, names, k=5, max_df=0.01, min_shared=2, batch_postings=20000000):
+    """ Top `k` terms of each name (unique, normalized strings) by Dice coefficient.
+    N-grams found in more than `max_df` of the terms are left out, of the names and of the terms, and terms sharing
+    fewer than `min_shared` n-grams with a name are not candidates. Returns a DataFrame of (query, term, score),
+    where query and term are positions in `names` and `index['terms']`.
+    """
+    n_terms = len(index['terms'])
+    positions, ngrams = explode_ngrams(names, n=index['n'])
+    sizes = np.bincount(positions, minlength=len(names))
+
+    # N-grams too common to discriminate are left out of both sides of the coefficient
+    is_common = (np.diff(index['indptr']) > max(max_df * n_terms, 1))
+    common_postings = np.repeat(is_common, np.diff(index['indptr']))
+    term_sizes = index['sizes'] - np.bincount(index['postings'][common_postings], minlength=n_terms)
+
+    codes = index['ngrams'].get_indexer(ngrams)
+    is_known = (codes >= 0)
+    codes = codes[is_known]
+    is_common_query = is_common[codes]
+    sizes = sizes - np.bincount(positions[is_known][is_common_query], minlength=len(names))
+    # N-grams of the names not in the index share nothing, and only count in their size
+    positions, codes = positions[is_known][~is_common_query], codes[~is_common_query]
+    starts = index['indptr'][codes]
+    lengths = index['indptr'][codes + 1] - starts
+
+    # Batches of whole queries (positions are sorted), with about `batch_postings` postings each
+    totals = np.cumsum(np.bincount(positions, weights=lengths, minlength=len(names)))
+    cuts = np.searchsorted(totals, np.arange(batch_postings, totals[-1] if len(totals) else 0, batch_postings), side='right')
+    bounds = np.unique(np.searchsorted(positions, np.concatenate([[0], cuts, [len(names)]])))
+
+    results = []
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        b_lengths = lengths[first:last]
+        # Expand the postings of every (query, n-gram) pair
+        query = np.repeat(positions[first:last], b_lengths)
+        offset = np.arange(b_lengths.sum()) - np.repeat(np.cumsum(b_lengths) - b_lengths, b_lengths)
+        term = index['postings'][np.repeat(starts[first:last], b_lengths) + offset]
+        # Shared n-grams per (query, term), sorted by query then term
+        pairs, shared = np.unique(query * n_terms + term, return_counts=True)
+        pairs, shared = pairs[shared >= min_shared], shared[shared >= min_shared]
+        query, term = pairs // n_terms, pairs % n_terms
+        score = 2 * shared / (sizes[query] + term_sizes[term])
+        # Top k per query: one stable sort on (query, score rounded to 1e-6) keeps terms in order within ties
+        order = np.argsort(query * 2000000 + np.rint((1 - score) * 1000000).astype('int64'), kind='stable')
+        query, term, score = query[order], term[order], score[order]
+        position = np.arange(len(query))
+        is_first = np.concatenate([[True], query[1:] != query[:-1]])
+        rank = position - np.maximum.accumulate(np.where(is_first, position, 0))
+        is_top = (rank < k)
+        results.append(pd.DataFrame({'query': query[is_top], 'term': term[is_top], 'score': score[is_top]}))
+
+    if not len(results):
+        return pd.DataFrame({'query': pd.Series(dtype='int64'), 'term': pd.Series(dtype='int64'), 'score': pd.Series(dtype='float64')})
+    return pd.concat(results, ignore_index=True)
+
+
+def drugbank_terms(artifacts):
+    """ DrugBank names and synonyms, one row per (term, id_drug), with the normalized term"""
+    dfd = artifacts['drug'][['id_drug', 'name']].assign(source='name')
+    dfs = artifacts['synonym'].rename(columns={'synonym': 'name'}).assign(source='synonym')
+    dft = pd.concat([dfd, dfs], ignore_index=True).dropna(subset=['name'])
+    dft['term'] = normalize_names(dft['name'])
+    dft = dft.loc[dft['term'] != '', :]
+    # A drug's name wins over a synonym with the same term
+    return dft.drop_duplicates(subset=['term', 'id_drug'], keep='first').reset_index(drop=True)
+
+
+def suggest_candidates(names, dft, k=5, n=3, max_df=0.01, min_shared=2):
+    """ Top `k` DrugBank candidates of each name, one row per (name, candidate), with the matched term and score.
+    `dft` are the DrugBank terms (see `drugbank_terms`). Each distinct normalized name is queried once.
+    """
+    terms = pd.Index(dft['term'].unique())
+    index = build_ngram_index(terms.tolist(), n=n)
+
+    codes, queries = pd.factorize(normalize_names(pd.Series(names, dtype=object)))
+    # Several terms (e.g., a name and its synonyms) may point to the same drug, so more than `k` terms are kept
+    dfq = query_ngram_index(index, queries.tolist(), k=3 * k, max_df=max_df, min_shared=min_shared)
+    dfq['term'] = terms[dfq['term'].values]
+    dfq = dfq.merge(dft[['term', 'id_drug', 'name', 'source']], on='term', how='inner')
+    dfq = dfq.sort_values(['query', 'score', 'id_drug'], ascending=[True, False, True], kind='mergesort')
+    dfq = dfq.drop_duplicates(subset=['query', 'id_drug'], keep='first')
+    dfq['rank'] = dfq.groupby('query').cumcount() + 1
+    dfq = dfq.loc[dfq['rank'] <= k, :]
+
+    # Candidates of each distinct normalized name, back to every name
+    dfn = pd.DataFrame({'MED_NAME': pd.Series(names, dtype=object), 'query': codes})
+    dfc = dfn.merge(dfq, on='query', how='left', sort=False).drop(columns='query')
+    # Names without candidates have no rank
+    dfc['rank'] = dfc['rank'].astype('Int64')
+    return dfc.rename(columns={'id_drug': 'ID_DRUGBANK', 'name': 'DRUGBANK_NAME', 'term': 'TERM', 'source': 'SOURCE', 'score': 'SCORE', 'rank': 'RANK'})
@@ -0,0 +1,97 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Checkpoints of chunked loads, so a failed load resumes where it stopped.
+#
+# A load (`job`) inserts its rows in chunks. Each chunk is committed in one transaction together with
+# its checkpoint in `helper_load_progress`: the number of chunks committed and, per table, the rows loaded
+# and the last ID. A restart skips the committed chunks and continues numbering IDs from the checkpoint.
+# Chunks must come out the same on a restart (same sources and chunk size).
+#
+import pandas as pd
+from datetime import datetime
+from ddiindy.bulkload import bulk_load, quote_identifier, PLACEHOLDER
+
+
+PROGRESS_TABLE = 'helper_load_progress'
+
+
+def truncate_table(engine, table):
+    """ Empties a table (DELETE where TRUNCATE is not available, e.g. SQLite)"""
+    verb = 'TRUNCATE TABLE' if engine.dialect.name == 'mysql' else 'DELETE FROM'
+    engine.execute("{verb:s} {table:s}".format(verb=verb, table=quote_identifier(engine, table)))
+
+
+def progress_sql(engine, sql):
+    """ `sql` on `PROGRESS_TABLE` (quoted for the dialect), with a placeholder for the job bound to `{job}`"""
+    return sql.format(progress=quote_identifier(engine, PROGRESS_TABLE), job=PLACEHOLDER[engine.dialect.paramstyle])
+
+
+def read_checkpoint(engine, job):
+    """ Checkpoint of a load, indexed by table. Empty if the load never committed a chunk."""
+    sql = progress_sql(engine, "SELECT tablename, chunk, chunksize, n_rows, id_last, is_done FROM {progress:s} WHERE job = {job:s}")
+    return pd.read_sql(sql, con=engine, params=(job, ), index_col='tablename')
+
+
+def start_load(engine, job, tables, chunksize, resume=True):
+    """ Returns the first chunk to load and the rows already loaded per table.
+    An unfinished load with the same chunk size is resumed; otherwise `tables` are truncated and the load starts over.
+    """
+    dfC = read_checkpoint(engine, job)
+    if resume and len(dfC) and not dfC['is_done'].astype(bool).any() and set(dfC.index) == set(tables):
+        if (dfC['chunksize'] != chunksize).any():
+            raise ValueError("Load '{job:s}' was checkpointed with chunks of {n:d} rows; resume it with the same chunk size or start over.".format(job=job, n=int(dfC['chunksize'].iloc[0])))
+        chunk = int(dfC['chunk'].iloc[0])
+        print('Resuming {job:s} from chunk {chunk:d}'.format(job=job, chunk=chunk))
+        return chunk, {table: int(dfC.at[table, 'n_rows']) for table in tables}
+
+    print('Truncating Table')
+    for table in tables:
+        truncate_table(engine, table)
+    engine.execute(progress_sql(engine, "DELETE FROM {progress:s} WHERE job = {job:s}"), (job, ))
+    return 0, {table: 0 for table in tables}
+
+
+def save_checkpoint(conn, job, chunk, chunksize, n_rows, id_last=None, is_done=False):
+    """ Records that chunks `0..chunk-1` are loaded. Call it on the Connection whose transaction inserted the chunk."""
+    id_last = id_last or {}
+    conn.execute(progress_sql(conn, "DELETE FROM {progress:s} WHERE job = {job:s}"), (job, ))
+    df = pd.DataFrame({
+        'job': job,
+        'tablename': list(n_rows.keys()),
+        'chunk': chunk,
+        'chunksize': chunksize,
+        'n_rows': list(n_rows.values()),
+        'id_last': pd.array([id_last.get(table) for table in n_rows], dtype='Int64'),
+        'is_done': is_done,
+        'dt_committed': datetime.now().replace(microsecond=0),
+    })
+    bulk_load(df, PROGRESS_TABLE, conn, method='executemany', verbose=False)
+
+
+def finish_load(engine, job):
+    """ Marks a load as done; the next run starts over"""
+    engine.execute(progress_sql(engine, "UPDATE {progress:s} SET is_done = 1 WHERE job = {job:s}"), (job, ))
+
+
+def iter_chunks(df, chunksize):
+    """ Chunks of `chunksize` rows of a DataFrame"""
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def load_checkpointed(df, table, engine, job, chunksize, resume=True, id_column=None, method='auto'):
+    """ Loads `df` into `table` in chunks (`method`, see `ddiindy/bulkload.py`), committing each chunk with its checkpoint. Returns the rows in `table`."""
+    chunk_start, n_rows = start_load(engine, job, [table], chunksize, resume=resume)
+    for chunk, dfC in enumerate(iter_chunks(df, chunksize), start=1):
+        if chunk <= chunk_start:
+            # Committed before a restart
+            continue
+        n_rows[table] += len(dfC)
+        id_last = {table: int(dfC[id_column].iloc[-1])} if id_column is not None else None
+        with engine.begin() as conn:
+            bulk_load(dfC, table, conn, method=method)
+            save_checkpoint(conn, job, chunk, chunksize, n_rows, id_last)
+    finish_load(engine, job)
+    return n_rows[table]
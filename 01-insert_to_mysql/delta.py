@@ -0,0 +1,119 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Delta ingest of source rows, by content hash.
+#
+# Loaded rows carry a `row_hash` (a 64-bit hash of their normalized fields). A refresh compares the hashes
+# of the new extract with those in the table, stages only new and changed rows in `<table>_staging`,
+# applies them as upserts, deletes rows that are gone, and records the affected patients in `helper_patient_changed`.
+#
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from ddiindy.bulkload import bulk_load, quote_identifier, PLACEHOLDER
+
+
+def row_hash(df, columns):
+    """ 64-bit hash of the `columns` of each row (signed, to fit a BIGINT column)"""
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy().view('int64')
+
+
+def read_hashes(engine, table, columns):
+    """ Reads `columns` (which include `row_hash`) of every row in `table`"""
+    sql = "SELECT {columns:s} FROM {table:s}".format(
+        columns=', '.join(quote_identifier(engine, column) for column in columns),
+        table=quote_identifier(engine, table))
+    return pd.read_sql(sql, con=engine)
+
+
+def diff_rows(df, dfH, key):
+    """ Compares a keyed extract with the hashes in its table. Returns the new or changed rows, and the keys no longer in the extract."""
+    current = dfH.set_index(key)['row_hash']
+    previous = current.reindex(df[key].to_numpy()).to_numpy()
+    is_upsert = pd.isnull(previous) | (previous != df['row_hash'].to_numpy())
+    deleted = current.index[~current.index.isin(df[key])]
+    return df.loc[is_upsert, :], deleted.to_numpy()
+
+
+def diff_counts(hashes, dfH, id_column):
+    """ Compares an extract without a stable key (rows are identified by content) with the hashes in its table.
+    Returns how many rows of each hash must be inserted, and the rows of `dfH` to delete (the last ones of each hash).
+    """
+    new = pd.Series(hashes).value_counts()
+    current = dfH['row_hash'].value_counts()
+    surplus = new.sub(current, fill_value=0)
+    to_insert = surplus[surplus > 0].astype('int64')
+    to_delete = (-surplus[surplus < 0]).astype('int64')
+
+    dfD = dfH.loc[dfH['row_hash'].isin(to_delete.index), :].sort_values(id_column, ascending=False)
+    rank = dfD.groupby('row_hash').cumcount().to_numpy()
+    dfD = dfD.loc[rank < to_delete.reindex(dfD['row_hash']).to_numpy(), :]
+    return to_insert, dfD
+
+
+def select_inserts(hashes, remaining):
+    """ Marks the rows of a chunk to insert, and decrements the `remaining` counts of their hashes (see `diff_counts`)"""
+    hashes = pd.Series(hashes)
+    occurrence = hashes.groupby(hashes).cumcount().to_numpy()
+    is_insert = occurrence < remaining.reindex(hashes).fillna(0).to_numpy()
+    inserted = hashes[is_insert].value_counts()
+    remaining = remaining.sub(inserted, fill_value=0).astype('int64')
+    return is_insert, remaining[remaining > 0]
+
+
+def first_occurrences(hashes):
+    """ True for the first row of each hash; later rows with the same hash are exact repeats"""
+    return ~pd.Series(hashes).duplicated(keep='first').to_numpy()
+
+
+def upsert_sql(engine, table, staging, columns, key):
+    """ INSERT ... SELECT from the staging table, updating rows whose `key` already exists"""
+    quote = lambda name: quote_identifier(engine, name)
+    columns_sql = ', '.join(quote(column) for column in columns)
+    sql = "INSERT INTO {table:s} ({columns:s}) SELECT {columns:s} FROM {staging:s}".format(table=quote(table), staging=quote(staging), columns=columns_sql)
+    updates = [column for column in columns if column != key]
+    if engine.dialect.name == 'mysql':
+        return sql + " ON DUPLICATE KEY UPDATE " + ', '.join('{c:s} = VALUES({c:s})'.format(c=quote(column)) for column in updates)
+    # SQLite, PostgreSQL
+    return sql + " WHERE true ON CONFLICT ({key:s}) DO UPDATE SET ".format(key=quote(key)) + ', '.join('{c:s} = excluded.{c:s}'.format(c=quote(column)) for column in updates)
+
+
+def apply_upserts(df, table, engine, key):
+    """ Loads `df` into `<table>_staging` and upserts it into `table` on `key`"""
+    if not len(df):
+        return 0
+    quote = lambda name: quote_identifier(engine, name)
+    staging = '{table:s}_staging'.format(table=table)
+    columns = list(df.columns)
+    # Identifiers only, quoted for the dialect; rows are bound by `bulk_load`
+    drop_sql = "DROP TABLE IF EXISTS {staging:s}".format(staging=quote(staging))
+    engine.execute(drop_sql)
+    engine.execute("CREATE TABLE {staging:s} AS SELECT {columns:s} FROM {table:s} WHERE 1 = 0".format(
+        staging=quote(staging), columns=', '.join(quote(column) for column in columns), table=quote(table)))
+    try:
+        bulk_load(df, staging, engine)
+        with engine.begin() as conn:
+            conn.execute(upsert_sql(engine, table, staging, columns, key))
+    finally:
+        engine.execute(drop_sql)
+    return len(df)
+
+
+def delete_rows(engine, table, column, values, batch_size=10000):
+    """ Deletes the rows of `table` whose `column` is in `values`"""
+    values = [(value, ) for value in pd.Series(values).tolist()]
+    sql = "DELETE FROM {table:s} WHERE {column:s} = {placeholder:s}".format(
+        table=quote_identifier(engine, table), column=quote_identifier(engine, column), placeholder=PLACEHOLDER[engine.dialect.paramstyle])
+    with engine.begin() as conn:
+        for start in range(0, len(values), batch_size):
+            conn.execute(sql, values[start:start + batch_size])
+    return len(values)
+
+
+def record_changed_patients(engine, ids):
+    """ Records patients whose rows changed in `helper_patient_changed`, so downstream tables can be recomputed for them"""
+    ids = np.unique(np.asarray(ids, dtype='int64'))
+    df = pd.DataFrame({'id_patient': ids, 'dt_changed': datetime.now().replace(microsecond=0)})
+    apply_upserts(df, 'helper_patient_changed', engine, key='id_patient')
+    return len(ids)
@@ -0,0 +1,477 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Streaming parser for the DrugBank XML.
+#
+# The full DrugBank release is a multi-GB XML file. Instead of building the whole tree
+# with `ET.parse`, drugs are handled one top-level `<drug>` element at a time and then cleared.
+# In parallel mode the file is scanned once for top-level `<drug>` byte offsets, which are split
+# into shards parsed in a process pool and merged back in file order.
+#
+# Parsed drugs are written to the cache in batches, as they are parsed: one parquet file per artifact under
+# `<cache_dir>/<version>/<source>-<checksum>-v<format>/`, where source identifies the XML file (and zip member)
+# and checksum is the CRC-32 of the XML. A changed XML gets a new checksum, and older checksums of the same
+# source are removed. Different releases, and different files of the same release, live side by side.
+# Loaders read the artifacts back from the cache, whole or in batches of rows.
+#
+import os
+import shutil
+import zlib
+from bisect import bisect_left
+import multiprocessing as mp
+from xml.etree import ElementTree as ET
+from zipfile import ZipFile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils import batched
+
+
+ns = {'ns': 'http://www.drugbank.ca'}
+TAG_DRUG = '{http://www.drugbank.ca}drug'
+
+# Top-level drugs always carry attributes (`type`, `created`, ...); nested `<drug>` elements do not.
+DRUG_START = b'<drug '
+ROOT_END = b'</drugbank>'
+
+DRUG_COLUMNS = ['id_drug', 'name', 'type', 'class', 'subclass', 'description', 'groups']
+
+# Artifacts parsed from each drug, and their columns
+ARTIFACTS = {
+    'drug': DRUG_COLUMNS,
+    'secondary': ['id_drug', 'id_secondary'],
+    'group': ['id_drug', 'group'],
+    'synonym': ['id_drug', 'synonym'],
+    'classification': ['id_drug', 'kingdom', 'superclass', 'class', 'subclass', 'direct_parent'],
+    'interaction': ['id_drug_i', 'id_drug_j', 'description'],
+}
+
+CACHE_DIR = '../data/cache/drugbank'
+# Version of the parse; bumped when `parse_drug` changes, so caches of an older parse are rebuilt
+CACHE_FORMAT = 3
+
+# Drugs parsed before their rows are written to the cache (one row group per artifact)
+BATCH_SIZE = 2000
+# Rows read back from the cache at a time
+READ_BATCH_SIZE = 100000
+# Bytes of XML per shard in parallel mode; shards are returned whole by the workers
+SHARD_SIZE = 64 * 1024 * 1024
+
+# DrugBank release used by the loaders
+DRUGBANK_FILE = '../data/drugbank-v5.1.5/drugbank_all_full_database.xml.zip'
+DRUGBANK_MEMBER = 'full database.xml'
+
+
+def open_drugbank(filep, member=None):
+    """ Opens the DrugBank XML, either as a plain file or as a `member` of a zip file"""
+    if member is None:
+        return open(filep, 'rb')
+    zfile = ZipFile(filep, 'r')
+    return zfile.open(member)
+
+
+def read_release(file):
+    """ Returns the (version, exported-on) attributes of the root element, without building the tree"""
+    for event, elem in ET.iterparse(file, events=('start',)):
+        return elem.attrib.get('version'), elem.attrib.get('exported-on')
+    return None, None
+
+
+def read_checksum(filep, member=None):
+    """ CRC-32 of the uncompressed XML. For a zip member it is read from the zip directory."""
+    if member is not None:
+        with ZipFile(filep, 'r') as zfile:
+            return '{crc:08x}'.format(crc=zfile.getinfo(member).CRC)
+    crc = 0
+    with open(filep, 'rb') as file:
+        for block in iter(lambda: file.read(16 * 1024 * 1024), b''):
+            crc = zlib.crc32(block, crc)
+    return '{crc:08x}'.format(crc=crc)
+
+
+def iter_drug_elements(file):
+    """ Yields each top-level `<drug>` element. Elements are cleared once consumed."""
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(file, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+        else:
+            depth -= 1
+            # `<drug>` elements also appear nested (e.g., in pathways); only top-level ones are drugs.
+            if depth == 1 and elem.tag == TAG_DRUG:
+                yield elem
+                elem.clear()
+                root.clear()
+
+
+def findtext(elem, path):
+    """ Text of the first `path` match in `elem`, or None"""
+    found = elem.find(path, ns)
+    return found.text if found is not None else None
+
+
+def parse_drug(drug):
+    """ Parses a `<drug>` element into a dict of artifact rows. Returns None if it has no primary id."""
+    id_drugbank = findtext(drug, "ns:drugbank-id[@primary='true']")
+    if id_drugbank is None:
+        print(drug.findall('ns:drugbank-id', ns))
+        return None
+
+    name = findtext(drug, "ns:name")
+    dtype = drug.attrib['type']
+    description = findtext(drug, "ns:description")
+
+    # Secondary IDs
+    secondary = [
+        (id_drugbank, xml_id.text) for xml_id in drug.findall("ns:drugbank-id", ns)
+        if xml_id.attrib.get('primary') != 'true'
+    ]
+
+    # Synonyms
+    synonyms = [
+        (id_drugbank, xml_synonym.text) for xml_synonym in drug.iterfind("ns:synonyms/ns:synonym", ns)
+        if xml_synonym.text
+    ]
+
+    # Class / SubClass
+    dclass, dsubclass = None, None
+    classification = []
+    xml_classification = drug.find("ns:classification", ns)
+    if xml_classification is not None:
+        dclass = findtext(xml_classification, "ns:class")
+        dsubclass = findtext(xml_classification, "ns:subclass")
+        classification.append((
+            id_drugbank,
+            findtext(xml_classification, "ns:kingdom"),
+            findtext(xml_classification, "ns:superclass"),
+            dclass,
+            dsubclass,
+            findtext(xml_classification, "ns:direct-parent")
+        ))
+
+    # Groups
+    groups = [xml_group.text for xml_group in drug.find("ns:groups", ns)]
+
+    # Interactions, canonically ordered (id_drug_i < id_drug_j)
+    interactions = []
+    for xml_interaction in drug.iterfind("ns:drug-interactions/ns:drug-interaction", ns):
+        id_drugbank_j = findtext(xml_interaction, "ns:drugbank-id")
+        interaction_description = findtext(xml_interaction, "ns:description")
+        if id_drugbank < id_drugbank_j:
+            interactions.append((id_drugbank, id_drugbank_j, interaction_description))
+        else:
+            interactions.append((id_drugbank_j, id_drugbank, interaction_description))
+
+    return {
+        'drug': [(id_drugbank, name, dtype, dclass, dsubclass, description, ','.join(groups))],
+        'secondary': secondary,
+        'group': [(id_drugbank, group) for group in groups],
+        'synonym': synonyms,
+        'classification': classification,
+        'interaction': interactions,
+    }
+
+
+def iter_drug_records(file):
+    """ Yields the parsed artifact rows of every drug in the XML"""
+    for drug in iter_drug_elements(file):
+        record = parse_drug(drug)
+        if record is not None:
+            yield record
+
+
+def scan_drug_offsets(file, blocksize=16 * 1024 * 1024):
+    """ Scans the raw XML bytes once. Returns the top-level `<drug>` offsets and the offset of `</drugbank>`"""
+    offsets = []
+    end = None
+    overlap = len(ROOT_END) - 1
+    position = 0  # file offset of `buffer[0]`
+    buffer = b''
+    while True:
+        block = file.read(blocksize)
+        if not block:
+            break
+        buffer += block
+        i = buffer.find(DRUG_START)
+        while i != -1:
+            offsets.append(position + i)
+            i = buffer.find(DRUG_START, i + 1)
+        i = buffer.rfind(ROOT_END)
+        if i != -1:
+            end = position + i
+        # Keep the tail, in case a tag spans two blocks
+        cut = max(len(buffer) - overlap, 0)
+        if offsets and offsets[-1] >= position + cut:
+            cut = offsets[-1] - position + 1
+        position += cut
+        buffer = buffer[cut:]
+    if end is None:
+        end = position + len(buffer)
+    return offsets, end
+
+
+def make_shards(offsets, end, n_shards):
+    """ Splits drug offsets into at most `n_shards` contiguous (start, end) byte ranges of similar size"""
+    if not len(offsets):
+        return []
+    start = offsets[0]
+    size = (end - start) / n_shards
+    bounds = [start]
+    for k in range(1, n_shards):
+        i = bisect_left(offsets, start + k * size)
+        if i < len(offsets) and offsets[i] > bounds[-1]:
+            bounds.append(offsets[i])
+    bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class ShardFile(object):
+    """ File-like view over a byte range of drugs, wrapped by the original root element"""
+
+    def __init__(self, file, start, end, header):
+        file.seek(start)
+        self.file = file
+        self.remaining = end - start
+        self.header = header
+        self.footer = ROOT_END
+
+    def read(self, size=-1):
+        if self.header:
+            data, self.header = self.header, b''
+            return data
+        if self.remaining > 0:
+            data = self.file.read(self.remaining if size < 0 else min(size, self.remaining))
+            self.remaining -= len(data)
+            if data:
+                return data
+            self.remaining = 0
+        data, self.footer = self.footer, b''
+        return data
+
+
+def parse_shard(args):
+    """ Parses all drugs in a shard. Runs inside a worker process."""
+    filep, member, header, start, end = args
+    with open_drugbank(filep, member) as file:
+        # Symmetric duplicates within the shard are dropped here; across shards, when merged.
+        return list(dedup_interactions(iter_drug_records(ShardFile(file, start, end, header))))
+
+
+def iter_drug_records_parallel(filep, member=None, n_cpu=None, n_shards=None):
+    """ Same records as `iter_drug_records`, but parsed in a process pool over shards of the XML"""
+    n_cpu = n_cpu or mp.cpu_count()
+
+    with open_drugbank(filep, member) as file:
+        offsets, end = scan_drug_offsets(file)
+    if not len(offsets):
+        return
+    # At least one shard per cpu, and none much larger than SHARD_SIZE
+    n_shards = n_shards or max(n_cpu, -(-(end - offsets[0]) // SHARD_SIZE))
+
+    # The prologue up to the first drug holds the XML declaration and the root start tag (namespaces)
+    with open_drugbank(filep, member) as file:
+        header = file.read(offsets[0])
+
+    shards = make_shards(offsets, end, n_shards)
+    print('> {n:,d} drugs in {s:d} shards ({c:d} cpu)'.format(n=len(offsets), s=len(shards), c=n_cpu))
+    tasks = [(filep, member, header, start, stop) for start, stop in shards]
+    with mp.Pool(min(n_cpu, len(tasks))) as pool:
+        # `imap` returns shards in submission order, so the merge is deterministic.
+        for records in pool.imap(parse_shard, tasks):
+            for record in records:
+                yield record
+
+
+def dedup_interactions(records):
+    """ Drops interactions already seen in a previous record. DrugBank lists each pair under both drugs."""
+    seen = set()
+    for record in records:
+        interactions = []
+        for interaction in record['interaction']:
+            pair = interaction[0] + interaction[1]
+            if pair not in seen:
+                seen.add(pair)
+                interactions.append(interaction)
+        record['interaction'] = interactions
+        yield record
+
+
+def parse_drugbank(filep, member=None, parallel=False, n_cpu=None):
+    """ Yields the parsed records of every drug in the XML, in file order, each interaction pair once"""
+    if parallel:
+        yield from dedup_interactions(iter_drug_records_parallel(filep, member, n_cpu=n_cpu))
+    else:
+        with open_drugbank(filep, member) as file:
+            yield from dedup_interactions(iter_drug_records(file))
+
+
+def source_key(filep, member=None):
+    """ Identifies an XML file (and zip member), so parses of different files of a release do not collide"""
+    source = '{filep:s}:{member:s}'.format(filep=os.path.abspath(filep), member=member or '')
+    return '{crc:08x}'.format(crc=zlib.crc32(source.encode('utf-8')))
+
+
+def cache_path(filep, member, version, checksum, cache_dir=CACHE_DIR):
+    """ Cache directory of a parse of the XML"""
+    name = '{source:s}-{checksum:s}-v{format:d}'.format(source=source_key(filep, member), checksum=checksum, format=CACHE_FORMAT)
+    return os.path.join(cache_dir, version, name)
+
+
+def artifact_file(path, artifact):
+    """ Parquet file of an artifact in a cache directory"""
+    return os.path.join(path, '{artifact:s}.parquet'.format(artifact=artifact))
+
+
+def is_cached(path):
+    """ True if every artifact is in the cache directory"""
+    return all(os.path.exists(artifact_file(path, artifact)) for artifact in ARTIFACTS)
+
+
+def write_cache(path, records, batch_size=BATCH_SIZE):
+    """ Writes drug records to a cache directory as they are parsed, `batch_size` drugs at a time,
+    and removes stale checksums of the same source. Returns the rows written of each artifact.
+    """
+    tmp = path + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    schemas = {artifact: pa.schema([(column, pa.string()) for column in columns]) for artifact, columns in ARTIFACTS.items()}
+    writers = {artifact: pq.ParquetWriter(artifact_file(tmp, artifact), schema, compression='zstd') for artifact, schema in schemas.items()}
+    n_rows = {artifact: 0 for artifact in ARTIFACTS}
+    try:
+        for batch in batched(records, batch_size):
+            for artifact, writer in writers.items():
+                rows = [row for record in batch for row in record[artifact]]
+                if len(rows):
+                    columns = [pa.array(column, type=pa.string()) for column in zip(*rows)]
+                    writer.write_table(pa.Table.from_arrays(columns, schema=schemas[artifact]))
+                    n_rows[artifact] += len(rows)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    # Invalidate previous parses of this source
+    release_dir = os.path.dirname(path)
+    prefix = os.path.basename(path).split('-')[0] + '-'
+    for name in os.listdir(release_dir):
+        if name.startswith(prefix) and name != os.path.basename(tmp):
+            shutil.rmtree(os.path.join(release_dir, name), ignore_errors=True)
+    os.rename(tmp, path)
+    return n_rows
+
+
+def read_cache(path, artifacts=ARTIFACTS):
+    """ Reads `artifacts` from a cache directory, as a dict of DataFrames"""
+    return {artifact: pd.read_parquet(artifact_file(path, artifact)) for artifact in artifacts}
+
+
+def iter_cache(path, artifact, batch_size=READ_BATCH_SIZE):
+    """ Yields an artifact from a cache directory in DataFrames of at most `batch_size` rows"""
+    file = pq.ParquetFile(artifact_file(path, artifact))
+    for batch in file.iter_batches(batch_size=batch_size):
+        yield batch.to_pandas()
+
+
+def count_cache(path, artifact):
+    """ Rows of an artifact in a cache directory (from the parquet metadata)"""
+    return pq.ParquetFile(artifact_file(path, artifact)).metadata.num_rows
+
+
+def cache_drugbank(filep, member=None, cache_dir=CACHE_DIR, parallel=False, n_cpu=None, refresh=False):
+    """ Parses the XML into the cache, unless this file was already parsed.
+
+    Returns (version, exported_on, path), where path is the cache directory (see `read_cache` and `iter_cache`).
+    """
+    with open_drugbank(filep, member) as file:
+        version, exported_on = read_release(file)
+    checksum = read_checksum(filep, member)
+    path = cache_path(filep, member, version, checksum, cache_dir)
+
+    if refresh or not is_cached(path):
+        print('> Parsing DrugBank {version:s} ({checksum:s})'.format(version=version, checksum=checksum))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        n_rows = write_cache(path, parse_drugbank(filep, member, parallel=parallel, n_cpu=n_cpu))
+        print('> {drugs:,d} drugs and {interactions:,d} interactions cached'.format(drugs=n_rows['drug'], interactions=n_rows['interaction']))
+    else:
+        print('> Loaded DrugBank {version:s} ({checksum:s}) from cache'.format(version=version, checksum=checksum))
+    return version, exported_on, path
+
+
+def load_drugbank(filep, member=None, cache_dir=CACHE_DIR, parallel=False, n_cpu=None, refresh=False, artifacts=ARTIFACTS):
+    """ Loads DrugBank `artifacts` from cache, parsing (and caching) the XML only when it changed.
+
+    Returns (version, exported_on, artifacts), where artifacts is a dict of DataFrames.
+    """
+    version, exported_on, path = cache_drugbank(filep, member, cache_dir, parallel=parallel, n_cpu=n_cpu, refresh=refresh)
+    return version, exported_on, read_cache(path, artifacts)
+
+
+def build_alias_index(artifacts):
+    """ Maps every secondary DrugBank id to its primary id, as a Series indexed by secondary id"""
+    dfs = artifacts['secondary']
+    # A secondary id must never shadow a primary id, and must point to a single drug
+    dfs = dfs.loc[~dfs['id_secondary'].isin(artifacts['drug']['id_drug']), :]
+    dfs = dfs.drop_duplicates(subset='id_secondary', keep='first')
+    return pd.Series(dfs['id_drug'].values, index=dfs['id_secondary'].values, name='id_drug')
+
+
+def split_aliased(df, alias):
+    """ Splits pairs into those listed by primary ids, and those that reference a secondary id in `alias`"""
+    is_aliased = df['id_drug_i'].isin(alias.index) | df['id_drug_j'].isin(alias.index)
+    return df.loc[~is_aliased, :], df.loc[is_aliased, :]
+
+
+def iter_interactions(path, alias, batch_size=READ_BATCH_SIZE):
+    """ Yields the interactions of a cache directory, as canonical pairs of primary ids, in batches.
+
+    Pairs are unique as parsed (see `dedup_interactions`), but remapping a secondary id may repeat a pair.
+    The few pairs that reference a secondary id are read first, and yielded last, remapped, unless the pair
+    is also listed by primary ids.
+    """
+    dfa = [split_aliased(df, alias)[1] for df in iter_cache(path, 'interaction', batch_size)]
+    dfa = normalize_pairs(pd.concat(dfa, ignore_index=True), alias) if len(dfa) else None
+    for df in iter_cache(path, 'interaction', batch_size):
+        df = normalize_pairs(split_aliased(df, alias)[0])
+        if dfa is not None:
+            listed = pd.MultiIndex.from_frame(df[['id_drug_i', 'id_drug_j']])
+            dfa = dfa.loc[~pd.MultiIndex.from_frame(dfa[['id_drug_i', 'id_drug_j']]).isin(listed), :]
+        yield df
+    if dfa is not None and len(dfa):
+        yield dfa
+
+
+def apply_alias(ids, alias):
+    """ Replaces secondary ids in `ids` by their primary id, in a single hash lookup per row"""
+    return ids.map(alias).fillna(ids)
+
+
+def normalize_pairs(df, alias=None):
+    """ Remaps both ids of each pair to their primary id, orders each pair (i < j) and drops duplicated pairs,
+    and pairs of a drug with itself (a secondary id remapped onto its primary id)
+    """
+    df = df.copy()
+    if alias is not None:
+        df['id_drug_i'] = apply_alias(df['id_drug_i'], alias)
+        df['id_drug_j'] = apply_alias(df['id_drug_j'], alias)
+    i, j = df['id_drug_i'].values, df['id_drug_j'].values
+    swap = (i > j)
+    df['id_drug_i'], df['id_drug_j'] = np.where(swap, j, i), np.where(swap, i, j)
+    df = df.loc[df['id_drug_i'] != df['id_drug_j'], :]
+    return df.drop_duplicates(subset=['id_drug_i', 'id_drug_j'], keep='first')
+
+
+def split_pair_labels(labels, sep=' '):
+    """ Splits pair labels ('DB00001 DB00002') into `id_drug_i` and `id_drug_j` columns, for all rows at once"""
+    dfP = labels.str.split(sep, n=1, expand=True)
+    dfP.columns = ['id_drug_i', 'id_drug_j']
+    return dfP
+
+
+def read_severity(filep, alias=None):
+    """ Reads the drugs.com severity annotation, as a Series indexed by canonical (id_drug_i, id_drug_j)"""
+    dfS = pd.read_csv(filep, index_col=None, usecols=['id_drug_i', 'id_drug_j', 'severity'])
+    dfS = normalize_pairs(dfS, alias)
+    return dfS.set_index(['id_drug_i', 'id_drug_j'])['severity']
@@ -0,0 +1,171 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Secondary indexes and foreign keys of the ingest tables.
+#
+# Bulk loads are faster without them: `load_all.py` drops them before loading, then rebuilds the indexes
+# (one ALTER per table, tables in parallel) and validates and adds the foreign keys.
+# Primary keys are kept, as they define the row layout.
+#
+import time
+from multiprocessing.pool import ThreadPool
+import sqlalchemy
+from ddiindy.bulkload import quote_identifier
+
+
+# Table: [(name, columns, is_unique)]
+SECONDARY_INDEXES = {
+    'ndc': [
+        ('ux_ndc', ['id_catalog', 'ndc'], True),
+    ],
+    'medication': [
+        ('ix_medication_patient', ['id_patient', 'is_topic', 'is_ophthalmo', 'is_vaccine', 'dt_start', 'dt_end'], False),
+        ('ix_medication_id_catalog', ['id_catalog'], False),
+        ('ix_medication_row_hash', ['row_hash'], False),
+    ],
+    'medication_drug': [
+        ('ux_medication_drug_id', ['id_medication_drug'], True),
+        ('ix_medication_drug_id_drug', ['id_drug'], False),
+    ],
+    'drugbank_interaction': [
+        ('ix_drugbank_interaction_id_drug_j', ['id_drug_j'], False),
+    ],
+}
+
+# (table, name, column, referenced table, referenced column, on update, on delete); as in `script_create_fk.sql`
+FOREIGN_KEYS = [
+    ('medication', 'fk_medication_id_patient', 'id_patient', 'patient', 'id_patient', 'CASCADE', 'CASCADE'),
+    ('medication', 'fk_medication_id_catalog', 'id_catalog', 'ndc', 'id_catalog', 'CASCADE', 'CASCADE'),
+    ('medication_drug', 'fk_medication_drug_id_medication', 'id_medication', 'medication', 'id_medication', 'CASCADE', 'RESTRICT'),
+    ('medication_drug', 'fk_medication_drug_id_drug', 'id_drug', 'drug', 'id_drug', 'CASCADE', 'RESTRICT'),
+    ('drugbank_interaction', 'fk_db_interaction_id_drug_i', 'id_drug_i', 'drug', 'id_drug', 'CASCADE', 'CASCADE'),
+    ('drugbank_interaction', 'fk_db_interaction_id_drug_j', 'id_drug_j', 'drug', 'id_drug', 'CASCADE', 'CASCADE'),
+]
+
+
+def existing_indexes(engine, table):
+    """ Names of the secondary indexes (including unique keys) of a table"""
+    return {index['name'] for index in sqlalchemy.inspect(engine).get_indexes(table)}
+
+
+def existing_foreign_keys(engine, table):
+    """ Names of the foreign keys of a table"""
+    return {fk['name'] for fk in sqlalchemy.inspect(engine).get_foreign_keys(table) if fk['name']}
+
+
+def drop_foreign_keys(engine):
+    """ Drops the foreign keys in `FOREIGN_KEYS` that exist. SQLite cannot drop constraints; there they are left as they are."""
+    dropped = []
+    if engine.dialect.name == 'sqlite':
+        return dropped
+    for table, name, *_ in FOREIGN_KEYS:
+        if name in existing_foreign_keys(engine, table):
+            engine.execute("ALTER TABLE {table:s} DROP FOREIGN KEY {name:s}".format(table=quote_identifier(engine, table), name=quote_identifier(engine, name)))
+            dropped.append(name)
+    return dropped
+
+
+def drop_indexes(engine):
+    """ Drops the indexes in `SECONDARY_INDEXES` that exist"""
+    dropped = []
+    for table, indexes in SECONDARY_INDEXES.items():
+        existing = existing_indexes(engine, table)
+        for name, columns, is_unique in indexes:
+            if name not in existing:
+                continue
+            if engine.dialect.name == 'mysql':
+                sql = "ALTER TABLE {table:s} DROP INDEX {name:s}"
+            else:
+                sql = "DROP INDEX {name:s}"
+            engine.execute(sql.format(table=quote_identifier(engine, table), name=quote_identifier(engine, name)))
+            dropped.append(name)
+    return dropped
+
+
+def count_duplicates(engine, table, columns):
+    """ Number of distinct `columns` values that appear in more than one row"""
+    columns = ', '.join(quote_identifier(engine, column) for column in columns)
+    sql = "SELECT COUNT(*) FROM (SELECT {columns:s} FROM {table:s} GROUP BY {columns:s} HAVING COUNT(*) > 1) d".format(columns=columns, table=quote_identifier(engine, table))
+    return int(engine.execute(sql).scalar())
+
+
+def build_table_indexes(args):
+    """ Builds the missing indexes of one table; unique indexes over duplicated values are skipped. Returns (table, built, skipped, seconds)."""
+    engine, table = args
+    t0 = time.time()
+    existing = existing_indexes(engine, table)
+    skipped, definitions = [], []
+    for name, columns, is_unique in SECONDARY_INDEXES[table]:
+        if name in existing:
+            continue
+        if is_unique and count_duplicates(engine, table, columns):
+            skipped.append(name)
+            continue
+        definitions.append((name, columns, is_unique))
+
+    quote = lambda identifier: quote_identifier(engine, identifier)
+    if engine.dialect.name == 'mysql' and len(definitions):
+        # One ALTER builds all indexes of the table in a single pass
+        engine.execute("ALTER TABLE {table:s} ".format(table=quote(table)) + ', '.join(
+            "ADD {unique:s}INDEX {name:s} ({columns:s})".format(unique='UNIQUE ' if is_unique else '', name=quote(name), columns=', '.join(map(quote, columns)))
+            for name, columns, is_unique in definitions))
+    else:
+        for name, columns, is_unique in definitions:
+            engine.execute("CREATE {unique:s}INDEX {name:s} ON {table:s} ({columns:s})".format(unique='UNIQUE ' if is_unique else '', name=quote(name), table=quote(table), columns=', '.join(map(quote, columns))))
+    built = [name for name, columns, is_unique in definitions]
+    return table, built, skipped, time.time() - t0
+
+
+def build_indexes(engine, n_jobs=None):
+    """ Builds the indexes in `SECONDARY_INDEXES`, tables in parallel where the server allows concurrent DDL (not SQLite)"""
+    tasks = [(engine, table) for table in SECONDARY_INDEXES]
+    if engine.dialect.name == 'sqlite':
+        return [build_table_indexes(task) for task in tasks]
+    with ThreadPool(n_jobs or len(tasks)) as pool:
+        return pool.map(build_table_indexes, tasks, chunksize=1)
+
+
+def count_orphans(engine, table, column, ref_table, ref_column):
+    """ Rows whose `column` has no match in `ref_table.ref_column`"""
+    quote = lambda identifier: quote_identifier(engine, identifier)
+    sql = """
+        SELECT COUNT(*) FROM {table:s} c
+        WHERE c.{column:s} IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {ref_table:s} p WHERE p.{ref_column:s} = c.{column:s})
+    """.format(table=quote(table), column=quote(column), ref_table=quote(ref_table), ref_column=quote(ref_column))
+    return int(engine.execute(sql).scalar())
+
+
+def referenced_index(ref_table, ref_column):
+    """ The index in `SECONDARY_INDEXES` a foreign key to `ref_table.ref_column` relies on (its first column), or None for a primary key"""
+    for name, columns, is_unique in SECONDARY_INDEXES.get(ref_table, []):
+        if columns[0] == ref_column:
+            return name
+    return None
+
+
+def add_foreign_keys(engine):
+    """ Validates each foreign key and adds those without orphan rows. Returns ({name: orphans}, {name: missing index}).
+    Keys whose referenced index was not built (e.g., a unique index over duplicated values, see `build_table_indexes`) are neither validated nor added.
+    Validation is explicit, so the server does not check each key again while adding it. SQLite cannot add constraints; there keys are only validated.
+    """
+    quote = lambda identifier: quote_identifier(engine, identifier)
+    orphans, missing = {}, {}
+    for table, name, column, ref_table, ref_column, on_update, on_delete in FOREIGN_KEYS:
+        index = referenced_index(ref_table, ref_column)
+        if index is not None and index not in existing_indexes(engine, ref_table):
+            missing[name] = index
+            continue
+        orphans[name] = count_orphans(engine, table, column, ref_table, ref_column)
+        if orphans[name] or engine.dialect.name == 'sqlite' or name in existing_foreign_keys(engine, table):
+            continue
+        with engine.connect() as conn:
+            conn.execute("SET foreign_key_checks = 0")
+            conn.execute("""
+                ALTER TABLE {table:s}
+                ADD CONSTRAINT {name:s} FOREIGN KEY ({column:s})
+                REFERENCES {ref_table:s} ({ref_column:s})
+                ON UPDATE {on_update:s} ON DELETE {on_delete:s}
+            """.format(table=quote(table), name=quote(name), column=quote(column), ref_table=quote(ref_table), ref_column=quote(ref_column), on_update=on_update, on_delete=on_delete))
+            conn.execute("SET foreign_key_checks = 1")
+    return orphans, missing
@@ -0,0 +1,79 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Runs the full ingest, deferring index and foreign-key maintenance to after the loads.
+#
+# 1. Drops the foreign keys and secondary indexes in `keys.py` (primary keys stay).
+# 2. Runs the loaders in dependency order (referenced tables first).
+# 3. Rebuilds the secondary indexes, tables in parallel.
+# 4. Validates the foreign keys (orphan rows) and adds the valid ones.
+# Reports the time spent in each phase. Tables must exist (`script_create_table.sql`).
+#
+import sys
+import time
+import subprocess
+import configparser
+import sqlalchemy
+from keys import drop_foreign_keys, drop_indexes, build_indexes, add_foreign_keys
+
+
+# Loaders, in dependency order
+STEPS = [
+    '00-convert-raw-data.py',
+    '01-patient.py',
+    '02-ndc.py',
+    '03-drug.py',
+    '05-medication.py',
+]
+
+
+if __name__ == '__main__':
+
+    # DB
+    cfg = configparser.ConfigParser()
+    cfg.read('../config.ini')
+    url = 'mysql+pymysql://%(user)s:%(pass)s@%(host)s:%(port)s/%(db)s?charset=utf8' % cfg['IU-RDC-MySQL']
+    engine = sqlalchemy.create_engine(url, encoding='utf-8')
+
+    # Phase: seconds
+    phases = {}
+
+    print('Dropping Foreign Keys and Secondary Indexes')
+    t0 = time.time()
+    dropped = drop_foreign_keys(engine) + drop_indexes(engine)
+    print('> dropped: {names:s}'.format(names=', '.join(dropped) or '-'))
+    phases['drop keys'] = time.time() - t0
+
+    for step in STEPS:
+        print('Running {step:s}'.format(step=step))
+        t0 = time.time()
+        subprocess.run([sys.executable, step], check=True)
+        phases['load: {step:s}'.format(step=step)] = time.time() - t0
+
+    print('Building Secondary Indexes')
+    t0 = time.time()
+    for table, built, skipped, seconds in build_indexes(engine):
+        print('> {table:s}: {built:s} in {seconds:.1f}s'.format(table=table, built=', '.join(built) or '-', seconds=seconds))
+        for name in skipped:
+            print('> {table:s}: {name:s} NOT built, duplicated values'.format(table=table, name=name))
+    phases['build indexes'] = time.time() - t0
+
+    print('Validating and Adding Foreign Keys')
+    t0 = time.time()
+    orphans, missing = add_foreign_keys(engine)
+    for name, n in orphans.items():
+        if n:
+            print('> {name:s} NOT added, {n:,d} orphan rows'.format(name=name, n=n))
+        else:
+            print('> {name:s}: ok'.format(name=name))
+    for name, index in missing.items():
+        print('> {name:s} NOT added, referenced index {index:s} was not built'.format(name=name, index=index))
+    phases['foreign keys'] = time.time() - t0
+
+    print('Time per phase')
+    for phase, seconds in phases.items():
+        print('> {phase:s}: {seconds:,.1f}s'.format(phase=phase, seconds=seconds))
+    print('> total: {seconds:,.1f}s'.format(seconds=sum(phases.values())))
+
+    print('Done.')
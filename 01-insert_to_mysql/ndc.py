@@ -0,0 +1,65 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: National Drug Codes (NDC) in one canonical format, and the `id_catalog -> ndc` lookup file.
+#
+# A 10-digit NDC is written with one of three hyphenations (4-4-2, 5-3-2 or 5-4-1); padding the short segment
+# with a leading zero gives the 11-digit 5-4-2 format, which is the canonical one here.
+# Unhyphenated 11-digit codes are split as 5-4-2. Unhyphenated 10-digit codes are ambiguous and kept as digits.
+#
+import os
+import numpy as np
+import pandas as pd
+
+
+# Segment lengths of the hyphenations that pad to 5-4-2
+NDC_FORMATS = [(4, 4, 2), (5, 3, 2), (5, 4, 1), (5, 4, 2)]
+
+LOOKUP_FILE = '../data/cache/ndc/ndc-lookup.parquet'
+
+
+def normalize_ndc(ndcs):
+    """ Canonical (5-4-2) NDC of each code, or the code with blanks removed if it has no known format.
+    Only unique raw values are normalized; results are mapped back to every row.
+    """
+    codes, uniques = pd.factorize(ndcs)
+    x = pd.Series(uniques, dtype=str).str.replace(r'\s+', '', regex=True)
+
+    dfS = x.str.extract(r'^(\d+)-(\d+)-(\d+)$')
+    n = dfS.apply(lambda s: s.str.len()).fillna(0).astype(int)
+    is_known = pd.Series(False, index=x.index)
+    for a, b, c in NDC_FORMATS:
+        is_known |= (n[0] == a) & (n[1] == b) & (n[2] == c)
+    hyphenated = dfS[0].str.zfill(5) + '-' + dfS[1].str.zfill(4) + '-' + dfS[2].str.zfill(2)
+
+    is_11 = x.str.fullmatch(r'\d{11}')
+    digits = x.str[:5] + '-' + x.str[5:9] + '-' + x.str[9:]
+
+    canonical = x.where(~is_11, digits).where(~is_known, hyphenated)
+    # Unique values back to rows (`-1` is a missing raw NDC)
+    canonical = np.append(canonical.to_numpy(dtype=object), np.nan)[codes]
+    return pd.Series(canonical, index=ndcs.index, name=ndcs.name)
+
+
+def dedup_ndc(df):
+    """ Canonical NDCs, without repeated (id_catalog, ndc) rows; both exact and normalized repeats are dropped.
+    Sorted by (id_catalog, ndc).
+    """
+    df = df.drop_duplicates(subset=['id_catalog', 'ndc'])
+    df = df.assign(ndc=normalize_ndc(df['ndc']))
+    df = df.drop_duplicates(subset=['id_catalog', 'ndc'])
+    return df.sort_values(['id_catalog', 'ndc'], kind='mergesort').reset_index(drop=True)
+
+
+def write_ndc_lookup(df, path=LOOKUP_FILE):
+    """ Writes the sorted `id_catalog -> ndc` lookup"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df[['id_catalog', 'ndc']].to_parquet(path + '.tmp', index=False, compression='zstd')
+    os.replace(path + '.tmp', path)
+
+
+def read_ndc_lookup(path=LOOKUP_FILE):
+    """ Reads the `id_catalog -> ndc` lookup, as a Series of NDCs indexed by (sorted) id_catalog"""
+    df = pd.read_parquet(path)
+    return df.set_index('id_catalog')['ndc']
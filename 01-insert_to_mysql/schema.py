@@ -0,0 +1,149 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Schema registry of the raw `p2876_*.csv` extracts.
+#
+# Each schema declares the type of every column, the thousands separator, the date formats
+# and the known vocabulary of categorical columns. `read_csv` uses it so values are typed on read.
+# Date columns are read as categoricals and only their unique values are parsed.
+#
+import os
+import re
+import numpy as np
+import pandas as pd
+
+
+# Column types: 'int' (nullable), 'float', 'str', 'category' or 'date'
+SCHEMAS = {
+    'p2876_demographics': {
+        'pattern': r'^p2876_demographics\.csv$',
+        'columns': {
+            'STUDY_ID': 'int',
+            'DOB': 'date',
+            'GENDER': 'category',
+            'ETHNICITY': 'category',
+            'RACE': 'category',
+            'ZIP': 'str',
+        },
+        'thousands': None,
+        'date_format': {
+            'DOB': '%Y-%m-%d',
+        },
+        'vocabulary': {
+            'GENDER': ['Male', 'Female', 'Unknown', 'Unspecified'],
+        },
+    },
+    'p2876_ndc': {
+        'pattern': r'^p2876_ndc\.csv$',
+        'columns': {
+            'CATALOGCVCD': 'int',
+            'NDC': 'str',
+        },
+        'thousands': None,
+        'date_format': {},
+        'vocabulary': {},
+    },
+    'p2876_meds': {
+        'pattern': r'^p2876_meds_\d+_[ut]\.csv$',
+        'columns': {
+            'STUDY_ID': 'int',
+            'ORDERING_DATE': 'date',
+            'ORDER_STATUS': 'category',
+            'MED_NAME': 'str',
+            'CATALOGCVCD': 'int',
+            'STRENGTHDOSE': 'float',
+            'STRENGTHDOSEUNIT': 'category',
+            'DISPENSEQTY': 'float',
+            'DISPENSEQTYUNIT': 'category',
+            'REFILLQTY': 'float',
+            'NBRREFILLS': 'float',
+            'DURATION': 'float',
+            'DURATIONUNIT': 'category',
+        },
+        'thousands': ',',
+        'date_format': {
+            'ORDERING_DATE': '%Y-%m-%d',
+        },
+        'vocabulary': {
+            'ORDER_STATUS': ['Sent', 'Ordered', 'Completed', 'Discontinued'],
+            'DURATIONUNIT': ['Minutes', 'Hours', 'Days', 'Weeks', 'Months', 'Treatments', 'Doses', 'Times'],
+        },
+    },
+}
+
+# Type used by `pd.read_csv` for each column type
+READ_DTYPE = {
+    'int': 'Int64',
+    'float': 'float64',
+    'str': 'object',
+    'category': 'category',
+    'date': 'category',
+}
+
+
+def get_schema(filepath):
+    """ Schema of an extract, matched on the file name. Returns None for unknown files."""
+    name = os.path.basename(filepath)
+    for schema in SCHEMAS.values():
+        if re.match(schema['pattern'], name):
+            return schema
+    return None
+
+
+def to_datetime_cached(x, format):
+    """ Parses a date column by parsing each unique value once"""
+    if pd.api.types.is_datetime64_any_dtype(x):
+        return x
+    x = x.astype('category')
+    dates = pd.to_datetime(x.cat.categories, format=format)
+    codes = x.cat.codes.to_numpy()
+    # Code `-1` is a missing value
+    values = np.append(dates.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT'))[codes]
+    return pd.Series(values, index=x.index, name=x.name)
+
+
+def apply_vocabulary(x, vocabulary):
+    """ Orders categories by the known vocabulary. Unknown values are kept and reported."""
+    unknown = [category for category in x.cat.categories if category not in vocabulary]
+    if len(unknown):
+        print('> {column:s}: values outside vocabulary: {unknown:s}'.format(column=str(x.name), unknown=', '.join(map(str, unknown))))
+    return x.cat.set_categories(list(vocabulary) + unknown)
+
+
+def apply_schema(df, schema):
+    """ Types the columns a csv parse leaves to be done: dates and categorical vocabularies"""
+    for column, format in schema['date_format'].items():
+        if column in df.columns:
+            df[column] = to_datetime_cached(df[column], format)
+    for column, vocabulary in schema['vocabulary'].items():
+        if column in df.columns:
+            df[column] = apply_vocabulary(df[column], vocabulary)
+    return df.reset_index(drop=True)
+
+
+def read_csv_kwargs(schema, columns=None):
+    """ `pd.read_csv` arguments of a schema"""
+    kwargs = {'index_col': None}
+    if schema is None:
+        return kwargs
+    kwargs['dtype'] = {
+        column: READ_DTYPE[ctype] for column, ctype in schema['columns'].items()
+        if columns is None or column in columns
+    }
+    if schema['thousands'] is not None:
+        kwargs['thousands'] = schema['thousands']
+    return kwargs
+
+
+def read_csv(filepath, columns=None, chunksize=None):
+    """ Parses an extract with its schema. With `chunksize`, returns an iterator of typed chunks."""
+    schema = get_schema(filepath)
+    kwargs = read_csv_kwargs(schema, columns)
+    if chunksize is None:
+        df = pd.read_csv(filepath, usecols=columns, **kwargs)
+        return apply_schema(df, schema) if schema is not None else df
+    reader = pd.read_csv(filepath, usecols=columns, chunksize=chunksize, **kwargs)
+    if schema is None:
+        return (df.reset_index(drop=True) for df in reader)
+    return (apply_schema(df, schema) for df in reader)
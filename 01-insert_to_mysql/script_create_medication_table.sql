@@ -9,6 +9,7 @@
  * Drop Views/Tables before creation
 */
 DROP TABLE IF EXISTS medication_drug;
+DROP TABLE IF EXISTS medication_patient_range;
 DROP TABLE IF EXISTS medication;
 
 
@@ -16,7 +17,7 @@ DROP TABLE IF EXISTS medication;
  * Medication
 */
 CREATE TABLE medication (
-	id_medication INT PRIMARY KEY,
+	id_medication INT PRIMARY KEY COMMENT "In (id_patient, dt_start) order with a clustered load",
 	id_patient INT NOT NULL,
 	id_catalog BIGINT COMMENT "CATALOGCVCD",
 	dt_start DATETIME NOT NULL COMMENT "ORDERING_DATE",
@@ -33,7 +34,10 @@ CREATE TABLE medication (
 	duration_unit VARCHAR(15),
 	is_topic BOOLEAN DEFAULT FALSE,
 	is_ophthalmo BOOLEAN DEFAULT FALSE,
-	is_vaccine BOOLEAN DEFAULT FALSE
+	is_vaccine BOOLEAN DEFAULT FALSE,
+	row_hash BIGINT COMMENT "Content hash of the order fields (delta ingest)",
+	KEY ix_medication_patient (id_patient, is_topic, is_ophthalmo, is_vaccine, dt_start, dt_end) COMMENT "Covers per-patient reads",
+	KEY ix_medication_row_hash (row_hash)
 ) ENGINE=InnoDB;
 
 
@@ -41,8 +45,21 @@ CREATE TABLE medication (
  * Medication <-> Drug
 */
 CREATE TABLE medication_drug (
-	id_medication_drug INT PRIMARY KEY AUTO_INCREMENT,
+	id_medication_drug INT NOT NULL,
 	id_medication INT NOT NULL,
 	id_drug VARCHAR(7) NOT NULL,
-	UNIQUE KEY(id_medication, id_drug)
+	PRIMARY KEY (id_medication, id_drug) COMMENT "Clustered with medication",
+	UNIQUE KEY ux_medication_drug_id (id_medication_drug)
+) ENGINE=InnoDB;
+
+
+/*
+ * Medication ID range of each patient (see `05-medication.py`)
+*/
+CREATE TABLE medication_patient_range (
+	id_patient INT PRIMARY KEY,
+	id_medication_first INT NOT NULL,
+	id_medication_last INT NOT NULL,
+	n_medication INT NOT NULL,
+	is_contiguous BOOLEAN COMMENT "IDs first..last are all of this patient"
 ) ENGINE=InnoDB;
@@ -22,5 +22,6 @@ CREATE TABLE patient (
 	ethnicity VARCHAR(50) COMMENT "Not Hispanic/Latino; Not Hispanic/Latino/Spanish; Hispanic/Latino; Unknown",
 	race VARCHAR(25) COMMENT "White; Black; Hispanic; Asian; Indian; Islander; Bi-racial; Unknown",
 	zip5 INT(5) COMMENT "First 5 ZIP numbers",
-	zip4 INT(4) COMMENT "Last 4 ZIP numbers"
+	zip4 INT(4) COMMENT "Last 4 ZIP numbers",
+	row_hash BIGINT COMMENT "Content hash of the source row (delta ingest)"
 ) ENGINE=InnoDB;
@@ -13,6 +13,7 @@ DROP VIEW IF EXISTS dw_interactions;
 /* */
 DROP TABLE IF EXISTS coadministration;
 DROP TABLE IF EXISTS medication_drug;
+DROP TABLE IF EXISTS medication_patient_range;
 /* */
 DROP TABLE IF EXISTS medication;
 DROP TABLE IF EXISTS patient;
@@ -20,6 +21,8 @@ DROP TABLE IF EXISTS ndc;
 DROP TABLE IF EXISTS drug;
 /* */ 
 DROP TABLE IF EXISTS drugbank_interaction;
+DROP TABLE IF EXISTS helper_patient_changed;
+DROP TABLE IF EXISTS helper_load_progress;
 
 
 /*
@@ -33,7 +36,8 @@ CREATE TABLE patient (
 	ethnicity VARCHAR(50) COMMENT "Not Hispanic/Latino; Not Hispanic/Latino/Spanish; Hispanic/Latino; Unknown",
 	race VARCHAR(25) COMMENT "White; Black; Hispanic; Asian; Indian; Islander; Bi-racial; Unknown",
 	zip5 INT(5) COMMENT "First 5 ZIP numbers",
-	zip4 INT(4) COMMENT "Last 4 ZIP numbers"
+	zip4 INT(4) COMMENT "Last 4 ZIP numbers",
+	row_hash BIGINT COMMENT "Content hash of the source row (delta ingest)"
 ) ENGINE=InnoDB;
 
 
@@ -43,7 +47,7 @@ CREATE TABLE patient (
 CREATE TABLE ndc (
 	id_catalog BIGINT COMMENT "CATALOGCVCD",
 	ndc VARCHAR(50) COMMENT "NDC",
-	UNIQUE KEY(id_catalog, ndc)
+	UNIQUE KEY ux_ndc (id_catalog, ndc)
 ) ENGINE=InnoDB;
 
 
@@ -51,7 +55,7 @@ CREATE TABLE ndc (
  * Medication
 */
 CREATE TABLE medication (
-	id_medication INT PRIMARY KEY,
+	id_medication INT PRIMARY KEY COMMENT "In (id_patient, dt_start) order with a clustered load",
 	id_patient INT NOT NULL,
 	id_catalog BIGINT COMMENT "CATALOGCVCD",
 	dt_start DATETIME NOT NULL COMMENT "ORDERING_DATE",
@@ -68,7 +72,10 @@ CREATE TABLE medication (
 	duration_unit VARCHAR(15),
 	is_topic BOOLEAN DEFAULT FALSE,
 	is_ophthalmo BOOLEAN DEFAULT FALSE,
-	is_vaccine BOOLEAN DEFAULT FALSE
+	is_vaccine BOOLEAN DEFAULT FALSE,
+	row_hash BIGINT COMMENT "Content hash of the order fields (delta ingest)",
+	KEY ix_medication_patient (id_patient, is_topic, is_ophthalmo, is_vaccine, dt_start, dt_end) COMMENT "Covers per-patient reads",
+	KEY ix_medication_row_hash (row_hash)
 ) ENGINE=InnoDB;
 
 
@@ -90,10 +97,23 @@ CREATE TABLE drug (
  * Medication <-> Drug
 */
 CREATE TABLE medication_drug (
-	id_medication_drug INT PRIMARY KEY AUTO_INCREMENT,
+	id_medication_drug INT NOT NULL,
 	id_medication INT NOT NULL,
 	id_drug VARCHAR(7) NOT NULL,
-	UNIQUE KEY(id_medication, id_drug)
+	PRIMARY KEY (id_medication, id_drug) COMMENT "Clustered with medication",
+	UNIQUE KEY ux_medication_drug_id (id_medication_drug)
+) ENGINE=InnoDB;
+
+
+/*
+ * Medication ID range of each patient (see `05-medication.py`)
+*/
+CREATE TABLE medication_patient_range (
+	id_patient INT PRIMARY KEY,
+	id_medication_first INT NOT NULL,
+	id_medication_last INT NOT NULL,
+	n_medication INT NOT NULL,
+	is_contiguous BOOLEAN COMMENT "IDs first..last are all of this patient"
 ) ENGINE=InnoDB;
 
 
@@ -107,3 +127,28 @@ CREATE TABLE drugbank_interaction (
 	severity VARCHAR(15),
 	PRIMARY KEY (id_drug_i, id_drug_j)
 ) ENGINE=InnoDB;
+
+
+/*
+ * Patients changed by a delta ingest (see `delta.py`)
+*/
+CREATE TABLE helper_patient_changed (
+	id_patient INT PRIMARY KEY,
+	dt_changed DATETIME
+) ENGINE=InnoDB;
+
+
+/*
+ * Checkpoints of chunked loads (see `checkpoint.py`)
+*/
+CREATE TABLE helper_load_progress (
+	job VARCHAR(64) NOT NULL COMMENT "Loader, e.g. 05-medication",
+	tablename VARCHAR(64) NOT NULL,
+	chunk INT NOT NULL COMMENT "Chunks committed",
+	chunksize INT NOT NULL,
+	n_rows BIGINT NOT NULL COMMENT "Rows loaded",
+	id_last BIGINT COMMENT "Last ID loaded",
+	is_done BOOLEAN DEFAULT FALSE,
+	dt_committed DATETIME,
+	PRIMARY KEY (job, tablename)
+) ENGINE=InnoDB;
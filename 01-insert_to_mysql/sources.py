@@ -0,0 +1,125 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Columnar cache of the raw `p2876_*.csv` extracts.
+#
+# Each extract is parsed once with its schema and written to `<cache_dir>/<name>.parquet`;
+# categorical columns are dictionary-encoded. The parquet metadata records the size, mtime and CRC-32 of the
+# source csv. Loaders read the parquet copy when it is fresh, and fall back to the csv otherwise.
+#
+import os
+import zlib
+import multiprocessing as mp
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from schema import read_csv
+
+
+CACHE_DIR = '../data/cache/raw'
+
+
+def cache_path(filepath, cache_dir=CACHE_DIR):
+    """ Path of the columnar copy of an extract"""
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    return os.path.join(cache_dir, '{name:s}.parquet'.format(name=name))
+
+
+def source_checksum(filepath):
+    """ CRC-32 of a file"""
+    crc = 0
+    with open(filepath, 'rb') as file:
+        for block in iter(lambda: file.read(16 * 1024 * 1024), b''):
+            crc = zlib.crc32(block, crc)
+    return '{crc:08x}'.format(crc=crc)
+
+
+def source_stat(filepath):
+    """ Size and modification time of a file, as stored in the parquet metadata"""
+    stat = os.stat(filepath)
+    return {b'source_size': str(stat.st_size).encode(), b'source_mtime_ns': str(stat.st_mtime_ns).encode()}
+
+
+def is_fresh(filepath, cache_dir=CACHE_DIR):
+    """ True if the columnar copy exists and was built from the current csv"""
+    path = cache_path(filepath, cache_dir)
+    if not os.path.exists(path):
+        return False
+    if not os.path.exists(filepath):
+        # Only the columnar copy is available
+        return True
+    metadata = pq.read_schema(path).metadata or {}
+    stat = source_stat(filepath)
+    if all(metadata.get(key) == value for key, value in stat.items()):
+        return True
+    # The csv was touched; it is still fresh if the content did not change
+    return metadata.get(b'source_checksum') == source_checksum(filepath).encode()
+
+
+def parse_source(filepath, columns=None, chunksize=None):
+    """ Parses an extract csv with its schema (see `schema.py`)"""
+    return read_csv(filepath, columns=columns, chunksize=chunksize)
+
+
+def convert_source(filepath, cache_dir=CACHE_DIR, row_group_size=500000):
+    """ Parses an extract and writes its columnar copy"""
+    df = parse_source(filepath)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata.update(source_stat(filepath))
+    metadata[b'source_checksum'] = source_checksum(filepath).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    path = cache_path(filepath, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path + '.tmp', row_group_size=row_group_size, compression='zstd')
+    os.replace(path + '.tmp', path)
+    return len(df)
+
+
+def read_source(filepath, columns=None, cache_dir=CACHE_DIR):
+    """ Reads an extract, from its columnar copy when it is fresh"""
+    if is_fresh(filepath, cache_dir):
+        return pd.read_parquet(cache_path(filepath, cache_dir), columns=columns)
+    return parse_source(filepath, columns=columns)
+
+
+def iter_source(filepath, chunksize, columns=None, cache_dir=CACHE_DIR):
+    """ Reads an extract in chunks of `chunksize` rows, from its columnar copy when it is fresh"""
+    if is_fresh(filepath, cache_dir):
+        file = pq.ParquetFile(cache_path(filepath, cache_dir))
+        for batch in file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        for df in parse_source(filepath, columns=columns, chunksize=chunksize):
+            yield df
+
+
+def read_sources(filepaths, n_cpu=None, cache_dir=CACHE_DIR):
+    """ Reads several extracts, in file order. Those without a fresh columnar copy are parsed in a process pool."""
+    fresh = [is_fresh(filepath, cache_dir) for filepath in filepaths]
+    stale = [filepath for filepath, is_ok in zip(filepaths, fresh) if not is_ok]
+    parsed = {}
+    if len(stale):
+        n_cpu = min(n_cpu or mp.cpu_count(), len(stale))
+        with mp.Pool(n_cpu) as pool:
+            parsed = dict(zip(stale, pool.map(parse_source, stale, chunksize=1)))
+    return [
+        pd.read_parquet(cache_path(filepath, cache_dir)) if is_ok else parsed[filepath]
+        for filepath, is_ok in zip(filepaths, fresh)
+    ]
+
+
+def count_source_values(filepaths, column, chunksize=1000000, cache_dir=CACHE_DIR):
+    """ Counts the values of one column over several extracts, reading only that column, one chunk at a time"""
+    counts = pd.Series(dtype='int64')
+    for filepath in filepaths:
+        for df in iter_source(filepath, chunksize, columns=[column], cache_dir=cache_dir):
+            # Categorical columns count all categories, including unused ones
+            chunk_counts = df[column].value_counts(sort=False)
+            chunk_counts.index = chunk_counts.index.astype(object)
+            counts = counts.add(chunk_counts, fill_value=0)
+    counts = counts.loc[counts > 0].astype('int64')
+    counts.index.name = column
+    return counts
@@ -0,0 +1,458 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Synthetic EHR cohort in the layouts of the raw `p2876_*.csv` extracts, for testing the pipeline offline.
+#
+# Writes, under `out_dir`, the same tree the loaders read (run them from `<out_dir>/01-insert_to_mysql`):
+#   data/p2876_demographics.csv, data/p2876_ndc.csv, data/p2876_meds_{01..12}_{ftype}.csv,
+#   data/drugbank-v5.1.5/drugbank_all_full_database.xml.zip (a DrugBank-like XML),
+#   01-insert_to_mysql/data/map-drug-name-drugbank.csv, drugs.com-severity.csv and drugbank-interaction.csv.gz.
+#
+# The drug vocabulary (drugs, interactions, medication names and their mapping) is drawn once. Patients are drawn
+# in blocks, each from its own seed (`seed`, block number), so the output depends only on the seed and the
+# configuration, not on the number of processes. Blocks are drawn with numpy array operations, in a process pool,
+# and written in block order with the Arrow csv writer.
+#
+import os
+import gzip
+import zipfile
+import multiprocessing as mp
+from xml.sax.saxutils import escape
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+
+# Configuration; any key can be overridden in `generate`
+CONFIG = {
+    # Patients, drawn in blocks of `block_size`
+    'n_patients': 10000,
+    'block_size': 50000,
+    # Share of patients with a second, partly different, demographics row
+    'duplicated_patients': 0.01,
+    # Medication orders per patient: log-normal body, with a Pareto tail (polypharmacy) for a share of patients
+    'meds_median': 8,
+    'meds_sigma': 1.0,
+    'meds_tail_share': 0.02,
+    'meds_tail_alpha': 1.5,
+    'meds_tail_min': 100,
+    'meds_max': 20000,
+    # Patients without any order
+    'no_meds_share': 0.1,
+    # Orders repeated verbatim in another extract
+    'repeated_orders': 0.005,
+    # Ordering dates, and days between a patient's first and last order (median)
+    'date_start': '2010-01-01',
+    'date_end': '2019-12-31',
+    'active_days_median': 365,
+    # DURATIONUNIT: share of orders with each unit (`None` is a missing unit)
+    'duration_units': {
+        'Days': 0.55, 'Weeks': 0.1, 'Months': 0.1, 'Hours': 0.03, 'Minutes': 0.01,
+        'Treatments': 0.05, 'Doses': 0.05, 'Times': 0.03, None: 0.08,
+    },
+    # DrugBank-like vocabulary
+    'n_drugs': 3000,
+    'interactions_per_drug': 20,
+    'severity_share': 0.5,
+    # Distinct MED_NAMEs, their popularity (Zipf exponent) and the share of combination products
+    'n_med_names': 5000,
+    'name_zipf': 1.1,
+    'combination_share': 0.1,
+    # Share of MED_NAMEs mapped to DrugBank in `map-drug-name-drugbank.csv`, and of those mapped to no drug ('None')
+    'mapping_coverage': 0.9,
+    'mapping_none_share': 0.05,
+    # Share of mapped drugs written with a secondary DrugBank id
+    'secondary_id_share': 0.02,
+    # Extract files (`p2876_meds_{01..n_files}_{ftype}.csv`)
+    'n_files': 12,
+    'ftype': 'u',
+}
+
+DRUGBANK_VERSION = '5.1.5'
+DRUGBANK_PATH = os.path.join('drugbank-v5.1.5', 'drugbank_all_full_database.xml.zip')
+DRUGBANK_MEMBER = 'full database.xml'
+
+SYLLABLES = [
+    'a', 'ba', 'ce', 'ci', 'da', 'de', 'do', 'fa', 'fe', 'ga', 'gli', 'ka', 'la', 'le', 'li', 'lo', 'lu', 'ma', 'me', 'mi',
+    'mo', 'na', 'ne', 'ni', 'no', 'pa', 'pe', 'pi', 'pra', 'pro', 'ra', 're', 'ri', 'ro', 'sa', 'se', 'si', 'so', 'ta',
+    'te', 'ti', 'to', 'tra', 'tri', 'va', 've', 'vi', 'xa', 'xi', 'za', 'zi', 'zo',
+]
+SUFFIXES = [
+    'mab', 'nib', 'pril', 'sartan', 'olol', 'statin', 'azole', 'cillin', 'mycin', 'oxacin', 'dipine', 'tidine', 'prazole',
+    'zepam', 'triptan', 'parin', 'vir', 'cycline', 'sone', 'lone', 'gliptin', 'formin', 'dronate', 'fenac', 'profen',
+]
+
+# Dose forms: (text, STRENGTHDOSEUNIT, DISPENSEQTYUNIT, is_topic, is_ophthalmo, share)
+FORMS = [
+    ('Tablet', 'mg', 'Tablet(s)', False, False, 0.45),
+    ('Capsule', 'mg', 'Capsule(s)', False, False, 0.15),
+    ('Oral Solution', 'mg', 'mL', False, False, 0.06),
+    ('Injection', 'Unit(s)', 'Unit(s)', False, False, 0.06),
+    ('Injection', 'mcg', 'mL', False, False, 0.04),
+    ('Injection', 'IntlUnits', 'Units', False, False, 0.02),
+    ('Inhaler', 'inhalation', 'inhalation', False, False, 0.04),
+    ('Cream', '%', 'g', True, False, 0.05),
+    ('Ointment', '%', 'g', True, False, 0.03),
+    ('Patch', 'mg', 'packet(s)', True, False, 0.02),
+    ('Ophthalmic Solution', '%', 'mL', False, True, 0.04),
+    ('Powder', 'MillionUnits', 'Pack', False, False, 0.02),
+    ('Kit', 'mg', 'kit(s)', False, False, 0.02),
+]
+STRENGTHS = [0.1, 0.5, 1, 2, 2.5, 5, 10, 20, 25, 40, 50, 100, 200, 250, 325, 500, 750, 1000, 1500, 2000, 5000, 10000]
+DISPENSEQTY = [1, 5, 10, 14, 20, 28, 30, 60, 90, 100, 120, 180, 240, 1000]
+
+ORDER_STATUS = {'Sent': 0.45, 'Ordered': 0.3, 'Completed': 0.2, 'Discontinued': 0.05}
+GENDER = {'Female': 0.52, 'Male': 0.46, 'Unknown': 0.015, 'Unspecified': 0.005}
+ETHNICITY = {
+    'Not Hispanic or Latino': 0.8, 'Hispanic or Latino': 0.06, 'Not Hispanic, Latino/a, or Spanish Origin': 0.04,
+    'Unknown': 0.05, 'Unreported/Refused to Report': 0.03, 'Declined': 0.02,
+}
+RACE = {
+    'White': 0.7, 'CAUCASIAN': 0.03, 'Black or African American': 0.12, 'Asian': 0.025, 'Other Asian': 0.005,
+    'HISPANIC': 0.01, 'American Indian or Alaska Native': 0.005, 'Native Hawaiian or Other Pacific Islander': 0.002,
+    'More than one race': 0.02, 'BI-RACIAL': 0.003, 'Unknown': 0.05, 'Refused': 0.01, 'Decline to Answer': 0.02,
+}
+SEVERITY = {'Minor': 0.2, 'Moderate': 0.6, 'Major': 0.2}
+
+
+def draw(rng, shares, size):
+    """ Draws `size` keys of `shares` ({key: share}), as positions in its keys"""
+    p = np.array(list(shares.values()), dtype='float64')
+    return rng.choice(len(p), size=size, p=p / p.sum())
+
+
+def categorical(codes, values):
+    """ `values[codes]` as a categorical, built from the codes only; `None` values (and code `-1`) are missing"""
+    lookup, categories = pd.factorize(pd.Series(list(values), dtype=object))
+    return pd.Categorical.from_codes(np.append(lookup, -1)[codes], categories=categories)
+
+
+def make_words(rng, n, suffixes=False):
+    """ `n` distinct pronounceable words"""
+    words = set()
+    ordered = []
+    while len(ordered) < n:
+        m = 2 * (n - len(ordered))
+        parts = np.array(SYLLABLES, dtype=object)[rng.integers(len(SYLLABLES), size=(m, 3))]
+        n_parts = rng.integers(2, 4, size=m)
+        ends = np.array(SUFFIXES, dtype=object)[rng.integers(len(SUFFIXES), size=m)] if suffixes else np.full(m, '', dtype=object)
+        for row, k, end in zip(parts, n_parts, ends):
+            word = ''.join(row[:k]) + end
+            if word not in words:
+                words.add(word)
+                ordered.append(word)
+    return ordered[:n]
+
+
+def format_number(x):
+    """ Number as written in the extracts: thousands separator, no trailing '.0'"""
+    return '{x:,.0f}'.format(x=x) if float(x).is_integer() else '{x:,g}'.format(x=x)
+
+
+def make_vocabulary(rng, config):
+    """ Drugs, interactions, medication names and their DrugBank mapping"""
+    n_drugs = config['n_drugs']
+    id_drug = np.array(['DB{i:05d}'.format(i=i) for i in range(1, n_drugs + 1)], dtype=object)
+    names = [word.capitalize() for word in make_words(rng, n_drugs, suffixes=True)]
+    dfD = pd.DataFrame({
+        'id_drug': id_drug,
+        'name': names,
+        'type': np.where(rng.random(n_drugs) < 0.85, 'small molecule', 'biotech'),
+        'class': ['Class {k:d}'.format(k=k) for k in rng.integers(1, 60, size=n_drugs)],
+        'subclass': ['Subclass {k:d}'.format(k=k) for k in rng.integers(1, 300, size=n_drugs)],
+        'group': np.array(['approved', 'experimental', 'investigational', 'withdrawn'])[draw(rng, {0: 0.7, 1: 0.15, 2: 0.12, 3: 0.03}, n_drugs)],
+    })
+    # Secondary ids: one legacy (APRD) id per drug, and a few merged DrugBank ids
+    is_merged = rng.random(n_drugs) < 0.05
+    dfD['id_merged'] = None
+    dfD.loc[is_merged, 'id_merged'] = ['DB{i:05d}'.format(i=i) for i in range(n_drugs + 1, n_drugs + 1 + is_merged.sum())]
+    # Synonyms: a brand name, and sometimes an upper-case name
+    dfD['synonym_brand'] = [word.capitalize() for word in make_words(rng, n_drugs)]
+    dfD['synonym_upper'] = np.where(rng.random(n_drugs) < 0.3, dfD['name'].str.upper(), None)
+
+    # Interactions: endpoints drawn with heavy-tailed weights, so a few drugs interact with many
+    weight = rng.pareto(1.2, size=n_drugs) + 1
+    n_pairs = int(n_drugs * config['interactions_per_drug'] / 2)
+    i = rng.choice(n_drugs, size=n_pairs, p=weight / weight.sum())
+    j = rng.choice(n_drugs, size=n_pairs, p=weight / weight.sum())
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    pairs = np.unique((i * n_drugs + j)[i != j])
+    dfI = pd.DataFrame({'i': pairs // n_drugs, 'j': pairs % n_drugs})
+    dfI['id_drug_i'], dfI['id_drug_j'] = id_drug[dfI['i']], id_drug[dfI['j']]
+    dfI['description'] = dfD['name'].values[dfI['i']] + ' may increase the activities of ' + dfD['name'].values[dfI['j']] + '.'
+    has_severity = rng.random(len(dfI)) < config['severity_share']
+    dfI['severity'] = np.where(has_severity, np.array(list(SEVERITY), dtype=object)[draw(rng, SEVERITY, len(dfI))], None)
+
+    # Medication names: one drug, or a combination, with a dose and form
+    n_names = config['n_med_names']
+    n_parts = np.where(rng.random(n_names) < config['combination_share'], rng.integers(2, 4, size=n_names), 1)
+    parts = [rng.choice(n_drugs, size=k, replace=False) for k in n_parts]
+    form = draw(rng, {k: f[5] for k, f in enumerate(FORMS)}, n_names)
+    strength = rng.integers(len(STRENGTHS), size=n_names)
+    # Written with the DrugBank name, the brand synonym or the upper-case name
+    style = draw(rng, {'name': 0.6, 'brand': 0.2, 'upper': 0.2}, n_names)
+    label = {0: dfD['name'].values, 1: dfD['synonym_brand'].values, 2: dfD['name'].str.upper().values}
+    med_names = []
+    for k in range(n_names):
+        drugs = ' / '.join(label[style[k]][parts[k]])
+        med_names.append('{drugs:s} {strength:s} {unit:s} {form:s}'.format(drugs=drugs, strength=format_number(STRENGTHS[strength[k]]), unit=FORMS[form[k]][1], form=FORMS[form[k]][0]))
+    dfN = pd.DataFrame({
+        'MED_NAME': med_names,
+        'CATALOGCVCD': 100000 + rng.permutation(n_names),
+        'form': form,
+        'strength': strength,
+        'parts': parts,
+        # Popularity: Zipf over a random ranking of the names
+        'popularity': 1 / (rng.permutation(n_names) + 1.0) ** config['name_zipf'],
+    })
+    # Names differing only by dose and form are distinct products; exact repeats are not
+    dfN = dfN.drop_duplicates(subset='MED_NAME').reset_index(drop=True)
+    dfN['popularity'] /= dfN['popularity'].sum()
+
+    # Mapping; names not covered are left out of the map, and a few are mapped to no drug
+    is_mapped = rng.random(len(dfN)) < config['mapping_coverage']
+    ids = []
+    for drugs in dfN['parts']:
+        use_secondary = (rng.random(len(drugs)) < config['secondary_id_share']) & dfD['id_merged'].notna().values[drugs]
+        ids.append(','.join(np.where(use_secondary, dfD['id_merged'].values[drugs], id_drug[drugs])))
+    dfM = pd.DataFrame({
+        'ID_DRUGBANK': np.where(rng.random(len(dfN)) < config['mapping_none_share'], 'None', ids),
+        'TOPIC': [FORMS[f][3] for f in dfN['form']],
+        'OPHTHALMO': [FORMS[f][4] for f in dfN['form']],
+        'VACCINE': rng.random(len(dfN)) < 0.01,
+        'MED_NAME': dfN['MED_NAME'],
+    }).loc[is_mapped, :]
+    return dfD, dfI, dfN, dfM
+
+
+def drug_xml(drug, interactions):
+    """ A `<drug>` element (from a `dfD` row, as a dict) in the layout of the DrugBank XML"""
+    synonyms = ''.join(
+        '<synonym language="english" coder="">{s:s}</synonym>'.format(s=escape(s)) for s in (drug['synonym_brand'], drug['synonym_upper']) if s
+    )
+    merged = '\n  <drugbank-id>{id:s}</drugbank-id>'.format(id=drug['id_merged']) if drug['id_merged'] else ''
+    items = ''.join(
+        '<drug-interaction><drugbank-id>{id:s}</drugbank-id><name>{name:s}</name><description>{d:s}</description></drug-interaction>'.format(
+            id=id_drug, name=escape(name), d=escape(description))
+        for id_drug, name, description in interactions
+    )
+    return (
+        '<drug type="{type:s}" created="2005-06-13" updated="2019-12-20">\n'
+        '  <drugbank-id primary="true">{id:s}</drugbank-id>\n'
+        '  <drugbank-id>APRD{num:s}</drugbank-id>{merged:s}\n'
+        '  <name>{name:s}</name>\n'
+        '  <description>{name:s} is a synthetic drug.</description>\n'
+        '  <groups><group>{group:s}</group></groups>\n'
+        '  <classification><description/><direct-parent>{subclass:s}</direct-parent><kingdom>Organic compounds</kingdom>'
+        '<superclass>Synthetic compounds</superclass><class>{dclass:s}</class><subclass>{subclass:s}</subclass></classification>\n'
+        '  <synonyms>{synonyms:s}</synonyms>\n'
+        '  <drug-interactions>{items:s}</drug-interactions>\n'
+        '</drug>\n'
+    ).format(
+        type=drug['type'], id=drug['id_drug'], num=drug['id_drug'][2:], merged=merged, name=escape(drug['name']), group=drug['group'],
+        subclass=escape(drug['subclass']), dclass=escape(drug['class']), synonyms=synonyms, items=items)
+
+
+def write_drugbank(filep, dfD, dfI):
+    """ Writes a DrugBank-like XML, zipped. Each interaction is listed under both drugs, as in DrugBank."""
+    names = dfD['name'].values
+    both = pd.concat([
+        pd.DataFrame({'drug': dfI['i'], 'other': dfI['j'], 'description': dfI['description']}),
+        pd.DataFrame({'drug': dfI['j'], 'other': dfI['i'], 'description': dfI['description']}),
+    ], ignore_index=True).sort_values(['drug', 'other'], kind='mergesort')
+    by_drug = {drug: list(zip(dfD['id_drug'].values[g['other']], names[g['other']], g['description'])) for drug, g in both.groupby('drug', sort=False)}
+
+    os.makedirs(os.path.dirname(filep), exist_ok=True)
+    # Fixed timestamps, so the same seed gives the same bytes
+    member = zipfile.ZipInfo(DRUGBANK_MEMBER, date_time=(2020, 1, 3, 0, 0, 0))
+    member.compress_type = zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(filep, 'w') as zfile:
+        with zfile.open(member, 'w', force_zip64=True) as file:
+            file.write((
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<drugbank xmlns="http://www.drugbank.ca" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                'version="{version:s}" exported-on="2020-01-03">\n'
+            ).format(version=DRUGBANK_VERSION).encode('utf-8'))
+            for k, drug in enumerate(dfD.to_dict('records')):
+                file.write(drug_xml(drug, by_drug.get(k, [])).encode('utf-8'))
+            file.write(b'</drugbank>\n')
+
+
+def make_ndc(rng, catalogs):
+    """ NDCs of each catalog id, written with different hyphenations and with repeated rows"""
+    n = len(catalogs)
+    labeler, product, package = rng.integers(1, 99999, size=n), rng.integers(1, 9999, size=n), rng.integers(1, 99, size=n)
+    style = rng.integers(0, 5, size=n)
+    formats = [
+        '{l:05d}-{p:04d}-{k:02d}',   # 5-4-2
+        '{l:05d}{p:04d}{k:02d}',     # 11 digits
+        '{l4:04d}-{p:04d}-{k:02d}',  # 4-4-2
+        '{l:05d}-{p3:03d}-{k:02d}',  # 5-3-2
+        '{l:05d}-{p:04d}-{k1:d}',    # 5-4-1
+    ]
+    ndcs = [
+        formats[s].format(l=l, p=p, k=k, l4=l % 10000, p3=p % 1000, k1=k % 10)
+        for l, p, k, s in zip(labeler, product, package, style)
+    ]
+    df = pd.DataFrame({'CATALOGCVCD': catalogs, 'NDC': ndcs})
+    # Repeated rows
+    return pd.concat([df, df.sample(frac=0.05, random_state=rng.integers(2 ** 31))], ignore_index=True)
+
+
+def draw_meds_per_patient(rng, config, n):
+    """ Medication orders per patient: log-normal, with a Pareto tail for a share of patients"""
+    n_meds = rng.lognormal(np.log(config['meds_median']), config['meds_sigma'], size=n)
+    is_tail = rng.random(n) < config['meds_tail_share']
+    n_meds[is_tail] = config['meds_tail_min'] * (rng.pareto(config['meds_tail_alpha'], size=is_tail.sum()) + 1)
+    n_meds[rng.random(n) < config['no_meds_share']] = 0
+    return np.minimum(np.rint(n_meds), config['meds_max']).astype('int64')
+
+
+def make_block(args):
+    """ Demographics and medication orders of one block of patients. Runs inside a worker process."""
+    block, first, last, seed, config, dfN = args
+    rng = np.random.default_rng([seed, block])
+    n = last - first
+    study_id = np.arange(first, last, dtype='int64') + 1
+
+    # Demographics
+    dob = np.datetime64('1920-01-01') + rng.integers(0, 365 * 95, size=n).astype('timedelta64[D]')
+    zip5, zip4 = rng.integers(46001, 47998, size=n), rng.integers(1, 9999, size=n)
+    zip_style = rng.integers(0, 4, size=n)
+    zip5, zip4 = zip5.astype(str), np.char.zfill(zip4.astype(str), 4)
+    # As written in the extracts: ZIP, ZIP+4 with and without hyphen, or with a leading zero
+    zips = np.select(
+        [zip_style == 0, zip_style == 1, zip_style == 2],
+        [zip5, np.char.add(np.char.add(zip5, '-'), zip4), np.char.add(zip5, zip4)],
+        np.char.add('0', zip5))
+    dfP = pd.DataFrame({
+        'STUDY_ID': study_id,
+        'DOB': dob,
+        'GENDER': categorical(draw(rng, GENDER, n), GENDER),
+        'ETHNICITY': categorical(draw(rng, ETHNICITY, n), ETHNICITY),
+        'RACE': categorical(draw(rng, RACE, n), RACE),
+        'ZIP': zips,
+    })
+    # Duplicated patients, with another race and ZIP
+    dfP2 = dfP.loc[rng.random(n) < config['duplicated_patients'], :].copy()
+    dfP2['RACE'] = categorical(draw(rng, RACE, len(dfP2)), RACE)
+    dfP2['ZIP'] = rng.integers(46001, 47998, size=len(dfP2)).astype(str)
+    dfP = pd.concat([dfP, dfP2], ignore_index=True)
+
+    # Orders
+    n_meds = draw_meds_per_patient(rng, config, n)
+    patient = np.repeat(np.arange(n), n_meds)
+    n_rows = len(patient)
+    date_start, date_end = np.datetime64(config['date_start']), np.datetime64(config['date_end'])
+    span = int((date_end - date_start) / np.timedelta64(1, 'D'))
+    active = np.minimum(rng.lognormal(np.log(config['active_days_median']), 1.0, size=n), span).astype('int64')
+    first_day = (rng.random(n) * (span - active + 1)).astype('int64')
+    day = first_day[patient] + (rng.random(n_rows) * (active[patient] + 1)).astype('int64')
+
+    name = rng.choice(len(dfN), size=n_rows, p=dfN['popularity'].values)
+    form = dfN['form'].values[name]
+    unit = draw(rng, config['duration_units'], n_rows)
+    has_duration = np.array([u is not None for u in config['duration_units']])[unit]
+    duration = np.where(has_duration, rng.integers(1, 31, size=n_rows), np.nan)
+    # Strength, missing in a few orders
+    strength = np.where(rng.random(n_rows) < 0.02, -1, dfN['strength'].values[name])
+
+    dfM = pd.DataFrame({
+        'STUDY_ID': study_id[patient],
+        'ORDERING_DATE': date_start + day.astype('timedelta64[D]'),
+        'ORDER_STATUS': categorical(draw(rng, ORDER_STATUS, n_rows), ORDER_STATUS),
+        'MED_NAME': categorical(name, dfN['MED_NAME']),
+        'CATALOGCVCD': dfN['CATALOGCVCD'].values[name],
+        'STRENGTHDOSE': categorical(strength, [format_number(x) for x in STRENGTHS]),
+        'STRENGTHDOSEUNIT': categorical(form, [f[1] for f in FORMS]),
+        'DISPENSEQTY': np.array(DISPENSEQTY, dtype='float64')[rng.integers(len(DISPENSEQTY), size=n_rows)],
+        'DISPENSEQTYUNIT': categorical(form, [f[2] for f in FORMS]),
+        'REFILLQTY': np.where(rng.random(n_rows) < 0.7, 1.0, np.nan),
+        'NBRREFILLS': rng.integers(0, 6, size=n_rows).astype('float64'),
+        'DURATION': duration,
+        'DURATIONUNIT': categorical(unit, config['duration_units']),
+    })
+    # Missing values
+    dfM.loc[rng.random(n_rows) < 0.1, 'DISPENSEQTY'] = np.nan
+
+    # Each order goes to one extract; repeated orders go to another extract as well
+    file = rng.integers(config['n_files'], size=n_rows)
+    is_repeated = rng.random(n_rows) < config['repeated_orders']
+    dfR = dfM.loc[is_repeated, :]
+    file_r = (file[is_repeated] + rng.integers(1, max(config['n_files'], 2), size=len(dfR))) % config['n_files']
+    dfM = pd.concat([dfM, dfR], ignore_index=True)
+    file = np.concatenate([file, file_r])
+
+    order = np.argsort(file, kind='stable')
+    bounds = np.searchsorted(file[order], np.arange(config['n_files'] + 1))
+    dfM = dfM.iloc[order]
+    meds = [to_csv_bytes(dfM.iloc[bounds[f]:bounds[f + 1]], header=(block == 0)) for f in range(config['n_files'])]
+    return to_csv_bytes(dfP, header=(block == 0)), meds, len(dfP), bounds[1:] - bounds[:-1]
+
+
+def to_csv_bytes(df, header=True):
+    """ A DataFrame as csv bytes, with the Arrow csv writer (dates as YYYY-MM-DD, missing values empty)"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Timestamps as dates
+    for k, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            table = table.set_column(k, field.name, table.column(k).cast(pa.date32()))
+    sink = pa.BufferOutputStream()
+    pacsv.write_csv(table, sink, write_options=pacsv.WriteOptions(include_header=header, quoting_style='needed'))
+    return sink.getvalue().to_pybytes()
+
+
+def generate(out_dir, seed=0, n_cpu=None, **config):
+    """ Writes a synthetic cohort under `out_dir` (see the module description). Returns the rows written per file."""
+    config = dict(CONFIG, **config)
+    rng = np.random.default_rng(seed)
+    data_dir = os.path.join(out_dir, 'data')
+    map_dir = os.path.join(out_dir, '01-insert_to_mysql', 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(map_dir, exist_ok=True)
+    n_rows = {}
+
+    # Vocabulary
+    dfD, dfI, dfN, dfM = make_vocabulary(rng, config)
+    dfN = dfN[['MED_NAME', 'CATALOGCVCD', 'form', 'strength', 'popularity']]
+
+    write_drugbank(os.path.join(data_dir, DRUGBANK_PATH), dfD, dfI)
+    n_rows['drugbank'] = len(dfD)
+    dfM.to_csv(os.path.join(map_dir, 'map-drug-name-drugbank.csv'), index=False)
+    n_rows['map-drug-name-drugbank.csv'] = len(dfM)
+    dfS = dfI.loc[dfI['severity'].notna(), ['id_drug_i', 'id_drug_j', 'severity']]
+    dfS.to_csv(os.path.join(map_dir, 'drugs.com-severity.csv'), index=False)
+    n_rows['drugs.com-severity.csv'] = len(dfS)
+    dfL = pd.DataFrame({'label': dfI['id_drug_i'] + ' ' + dfI['id_drug_j'], 'interaction': dfI['description']})
+    with gzip.GzipFile(os.path.join(map_dir, 'drugbank-interaction.csv.gz'), 'wb', mtime=0) as file:
+        file.write(dfL.to_csv(index=False).encode('utf-8'))
+    n_rows['drugbank-interaction.csv.gz'] = len(dfL)
+
+    dfC = make_ndc(rng, dfN['CATALOGCVCD'].values)
+    dfC.to_csv(os.path.join(data_dir, 'p2876_ndc.csv'), index=False)
+    n_rows['p2876_ndc.csv'] = len(dfC)
+
+    # Patients, in blocks
+    n, size = config['n_patients'], config['block_size']
+    tasks = [(block, first, min(first + size, n), seed, config, dfN) for block, first in enumerate(range(0, n, size))]
+    demographics = 'p2876_demographics.csv'
+    meds = ['p2876_meds_{fid:02d}_{ftype:s}.csv'.format(fid=fid, ftype=config['ftype']) for fid in range(1, config['n_files'] + 1)]
+    n_rows[demographics] = 0
+    n_rows.update({file: 0 for file in meds})
+    files = [open(os.path.join(data_dir, file), 'wb') for file in [demographics] + meds]
+    try:
+        n_cpu = min(n_cpu or mp.cpu_count(), len(tasks))
+        with mp.Pool(max(n_cpu, 1)) as pool:
+            # `imap` returns blocks in order, so the files do not depend on the number of processes
+            for patients, orders, n_patients, n_orders in pool.imap(make_block, tasks):
+                files[0].write(patients)
+                n_rows[demographics] += n_patients
+                for file, name, data, n_file in zip(files[1:], meds, orders, n_orders):
+                    file.write(data)
+                    n_rows[name] += int(n_file)
+    finally:
+        for file in files:
+            file.close()
+    return n_rows
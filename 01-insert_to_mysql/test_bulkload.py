@@ -0,0 +1,62 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Tests the bulk-load backends of `ddiindy/bulkload.py` on SQLite, where `LOAD DATA` is refused.
+#
+#
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy
+from ddiindy.bulkload import bulk_load
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = sqlalchemy.create_engine('sqlite:///{filep:s}'.format(filep=str(tmp_path / 'bulkload.sqlite')))
+    engine.execute("CREATE TABLE ndc (id_catalog INTEGER, ndc TEXT, dt DATETIME)")
+    return engine
+
+
+def frame(ids):
+    return pd.DataFrame({
+        'id_catalog': pd.array(ids, dtype='Int64'),
+        'ndc': ['00002-3227-30' if i % 3 else None for i in ids],
+        'dt': pd.to_datetime('2020-01-01') + pd.to_timedelta(ids, unit='D'),
+    })
+
+
+def read_ndc(engine):
+    return engine.execute("SELECT id_catalog, ndc FROM ndc ORDER BY id_catalog").fetchall()
+
+
+def test_load_data_falls_back_on_engine(engine):
+    df = frame(np.arange(1, 2501))
+    assert bulk_load(df, 'ndc', engine, method='load_data', batch_size=1000, verbose=False) == len(df)
+    rows = read_ndc(engine)
+    assert [tuple(row) for row in rows] == list(zip(range(1, 2501), df['ndc']))
+
+
+def test_load_data_falls_back_on_connection(engine):
+    # The caller's transaction survives the refused `LOAD DATA`, and commits everything together
+    with engine.begin() as conn:
+        bulk_load(frame([1, 2]), 'ndc', conn, method='executemany', verbose=False)
+        bulk_load(frame([3, 4]), 'ndc', conn, method='load_data', verbose=False)
+        assert conn.in_transaction()
+        bulk_load(frame([5]), 'ndc', conn, verbose=False)
+    assert [row[0] for row in read_ndc(engine)] == [1, 2, 3, 4, 5]
+
+
+def test_connection_rollback(engine):
+    with pytest.raises(RuntimeError):
+        with engine.begin() as conn:
+            bulk_load(frame([1, 2]), 'ndc', conn, method='load_data', verbose=False)
+            raise RuntimeError('Failed after the load')
+    assert read_ndc(engine) == []
+
+
+def test_bulk_load_arguments(engine):
+    with pytest.raises(ValueError):
+        bulk_load(frame([1]), 'ndc', engine, method='multi')
+    assert bulk_load(frame([]), 'ndc', engine, method='load_data') == 0
@@ -0,0 +1,67 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Tests the n-gram candidate scoring of `candidates.py`.
+#
+#
+import numpy as np
+import pandas as pd
+from candidates import normalize_names, build_ngram_index, query_ngram_index, suggest_candidates
+
+
+def ngrams(name, n=3):
+    padded = ' {name:s} '.format(name=name)
+    return {padded[j:j + n] for j in range(len(padded) - n + 1)}
+
+
+def brute_force(terms, names, k, min_shared):
+    """ Dice coefficient of every (name, term), top `k` per name, ties in term order"""
+    rows = []
+    for q, name in enumerate(names):
+        scores = []
+        for t, term in enumerate(terms):
+            shared = len(ngrams(name) & ngrams(term))
+            if shared >= min_shared:
+                score = 2 * shared / (len(ngrams(name)) + len(ngrams(term)))
+                scores.append((-round(score, 6), t, score))
+        rows.extend((q, t, score) for _, t, score in sorted(scores)[:k])
+    return pd.DataFrame(rows, columns=['query', 'term', 'score'])
+
+
+def test_normalize_names():
+    names = pd.Series(['Warfarin Sodium 5 MG Oral Tablet', 'ACETAMINOPHEN-CODEINE 300-30 mg tab', '  Insulin  Glargine (Lantus) 100 unit/mL'])
+    assert normalize_names(names).tolist() == ['warfarin sodium', 'acetaminophen codeine', 'insulin glargine lantus']
+
+
+def test_query_ngram_index_matches_brute_force():
+    terms = ['warfarin', 'warfarin sodium', 'acetaminophen', 'aspirin', 'insulin glargine', 'insulin lispro', 'lisinopril', 'losartan', 'metformin', 'metoprolol']
+    names = ['warfarin', 'warfarn sodium', 'insulin', 'metoprolol tartrate', 'zzz', 'lisinoprl']
+    index = build_ngram_index(terms)
+    result = query_ngram_index(index, names, k=3, max_df=1.0, min_shared=2, batch_postings=7)
+    expected = brute_force(terms, names, k=3, min_shared=2)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_suggest_candidates():
+    dft = pd.DataFrame({
+        'id_drug': ['DB00682', 'DB00682', 'DB00316', 'DB00945', 'DB00047'],
+        'name': ['Warfarin', 'Coumadin', 'Acetaminophen', 'Aspirin', 'Insulin Glargine'],
+        'source': ['name', 'synonym', 'name', 'name', 'name'],
+    })
+    dft['term'] = normalize_names(dft['name'])
+    names = ['WARFARIN 5 MG TAB', 'Coumadin 2 mg', 'warfarin', 'QWXZ 10 MG', 'acetaminophen 325 mg tablet']
+    dfc = suggest_candidates(names, dft, k=2, max_df=1.0)
+
+    # Every name is kept; those without candidates have no rank
+    assert dfc['RANK'].dtype == 'Int64'
+    assert set(dfc['MED_NAME']) == set(names)
+    assert dfc.loc[dfc['MED_NAME'] == 'QWXZ 10 MG', 'RANK'].isna().all()
+    # An exact match ranks first, with score 1
+    for name, id_drug in [('WARFARIN 5 MG TAB', 'DB00682'), ('warfarin', 'DB00682'), ('Coumadin 2 mg', 'DB00682'), ('acetaminophen 325 mg tablet', 'DB00316')]:
+        first = dfc.loc[(dfc['MED_NAME'] == name) & (dfc['RANK'] == 1), :].iloc[0]
+        assert first['ID_DRUGBANK'] == id_drug
+        assert np.isclose(first['SCORE'], 1.0)
+    # A drug is suggested once per name, through its best term
+    assert not dfc.dropna(subset=['ID_DRUGBANK']).duplicated(subset=['MED_NAME', 'ID_DRUGBANK']).any()
+    assert dfc.loc[(dfc['MED_NAME'] == 'Coumadin 2 mg') & (dfc['RANK'] == 1), 'SOURCE'].iloc[0] == 'synonym'
@@ -0,0 +1,68 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Tests that a checkpointed load (see `checkpoint.py`) resumes after a failure and ends as a full load.
+#
+#
+import numpy as np
+import pandas as pd
+import pytest
+import checkpoint
+from benchmark import create_sqlite
+
+
+def read_patients(engine):
+    rows = engine.execute("SELECT id_patient, gender, zip5 FROM patient ORDER BY id_patient").fetchall()
+    return pd.DataFrame([tuple(row) for row in rows], columns=['id_patient', 'gender', 'zip5'])
+
+
+def patients(n):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'id_patient': np.arange(1, n + 1),
+        'gender': rng.choice(['Female', 'Male'], size=n),
+        'zip5': rng.choice([46202, 46203, 46204], size=n),
+    })
+
+
+def test_load_checkpointed_resumes(tmp_path, monkeypatch):
+    df = patients(1000)
+    engine = create_sqlite(str(tmp_path / 'checkpoint.sqlite'))
+
+    # The fourth chunk fails, after three were committed
+    bulk_load, calls, fail = checkpoint.bulk_load, [], [4]
+
+    def failing(df, table, engine, **kwargs):
+        if table == 'patient':
+            calls.append(len(df))
+            if len(calls) in fail:
+                raise RuntimeError('Connection lost')
+        return bulk_load(df, table, engine, **kwargs)
+
+    monkeypatch.setattr(checkpoint, 'bulk_load', failing)
+    with pytest.raises(RuntimeError):
+        checkpoint.load_checkpointed(df, 'patient', engine, job='test', chunksize=150, id_column='id_patient', method='executemany')
+    # The failed chunk was rolled back with its checkpoint
+    assert engine.execute("SELECT COUNT(*) FROM patient").scalar() == 450
+    dfC = checkpoint.read_checkpoint(engine, 'test')
+    assert int(dfC.at['patient', 'chunk']) == 3
+    assert int(dfC.at['patient', 'id_last']) == 450
+
+    # A different chunk size cannot resume
+    with pytest.raises(ValueError):
+        checkpoint.start_load(engine, 'test', ['patient'], 100)
+
+    # Resumed, only the remaining chunks are loaded
+    calls.clear()
+    fail.clear()
+    n = checkpoint.load_checkpointed(df, 'patient', engine, job='test', chunksize=150, id_column='id_patient', method='executemany')
+    assert n == len(df)
+    assert calls == [150, 150, 150, 100]
+    pd.testing.assert_frame_equal(read_patients(engine), df, check_dtype=False)
+    assert checkpoint.read_checkpoint(engine, 'test')['is_done'].astype(bool).all()
+
+    # A finished load starts over
+    n = checkpoint.load_checkpointed(df, 'patient', engine, job='test', chunksize=150, id_column='id_patient', method='executemany')
+    assert n == len(df)
+    pd.testing.assert_frame_equal(read_patients(engine), df, check_dtype=False)
@@ -0,0 +1,76 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Tests that a delta refresh (see `delta.py`) leaves a table as a full reload of the new extract would.
+#
+#
+import numpy as np
+import pandas as pd
+import sqlalchemy
+from ddiindy.bulkload import bulk_load
+from delta import row_hash, diff_rows, apply_upserts, delete_rows, diff_counts, select_inserts
+
+
+def create_engine(tmp_path):
+    engine = sqlalchemy.create_engine('sqlite:///{filep:s}'.format(filep=str(tmp_path / 'delta.sqlite')))
+    engine.execute("CREATE TABLE patient (id_patient INTEGER PRIMARY KEY, gender TEXT, zip5 INTEGER, row_hash BIGINT)")
+    return engine
+
+
+def read_table(engine, columns):
+    """ The rows of `patient`, read without pandas' SQL I/O"""
+    rows = engine.execute("SELECT {columns:s} FROM patient ORDER BY id_patient".format(columns=', '.join(columns))).fetchall()
+    return pd.DataFrame([tuple(row) for row in rows], columns=columns)
+
+
+def extract(ids, rng):
+    df = pd.DataFrame({
+        'id_patient': ids,
+        'gender': rng.choice(['Female', 'Male'], size=len(ids)),
+        'zip5': rng.choice([46202, 46203, 46204], size=len(ids)),
+    })
+    df['row_hash'] = row_hash(df, ['id_patient', 'gender', 'zip5'])
+    return df
+
+
+def test_delta_equals_full_reload(tmp_path):
+    rng = np.random.default_rng(0)
+    engine = create_engine(tmp_path)
+    df1 = extract(np.arange(1, 1001), rng)
+    bulk_load(df1, 'patient', engine, verbose=False)
+
+    # Some rows change, some are gone and some are new
+    df2 = df1.loc[df1['id_patient'] > 100, ['id_patient', 'gender', 'zip5']].copy()
+    changed = df2.sample(n=50, random_state=0).index
+    df2.loc[changed, 'gender'] = np.where(df2.loc[changed, 'gender'] == 'Female', 'Male', 'Female')
+    df2 = pd.concat([df2, extract(np.arange(1001, 1101), rng)[['id_patient', 'gender', 'zip5']]], ignore_index=True)
+    df2['row_hash'] = row_hash(df2, ['id_patient', 'gender', 'zip5'])
+
+    dfU, deleted = diff_rows(df2, read_table(engine, ['id_patient', 'row_hash']), key='id_patient')
+    assert len(dfU) == 50 + 100
+    assert sorted(deleted) == list(range(1, 101))
+    apply_upserts(dfU, 'patient', engine, key='id_patient')
+    delete_rows(engine, 'patient', 'id_patient', deleted)
+
+    result = read_table(engine, list(df2.columns))
+    pd.testing.assert_frame_equal(result, df2.sort_values('id_patient').reset_index(drop=True), check_dtype=False)
+    # The staging table is dropped
+    assert 'patient_staging' not in sqlalchemy.inspect(engine).get_table_names()
+
+
+def test_diff_counts_without_key():
+    # Rows identified by content only: 'a' x3 -> x1, 'b' x1 -> x3, 'c' gone, 'd' new
+    dfH = pd.DataFrame({'id': [1, 2, 3, 4, 5], 'row_hash': ['a', 'a', 'a', 'b', 'c']})
+    hashes = ['a', 'b', 'b', 'b', 'd']
+    to_insert, dfD = diff_counts(hashes, dfH, 'id')
+    assert to_insert.to_dict() == {'b': 2, 'd': 1}
+    # The last rows of each hash are deleted
+    assert sorted(dfD['id']) == [2, 3, 5]
+
+    # Inserts split across chunks are selected once
+    is_insert, remaining = select_inserts(hashes[:3], to_insert)
+    assert is_insert.tolist() == [False, True, True]
+    is_insert, remaining = select_inserts(hashes[3:], remaining)
+    assert is_insert.tolist() == [False, True]
+    assert len(remaining) == 0
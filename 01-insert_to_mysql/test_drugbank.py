@@ -0,0 +1,72 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Tests the parsing of DrugBank `<drug>` elements and the handling of interaction pairs (see `drugbank.py`).
+#
+#
+from xml.etree import ElementTree as ET
+import numpy as np
+import pandas as pd
+from drugbank import parse_drug, split_pair_labels, normalize_pairs
+
+
+DRUG_XML = """
+<drug xmlns="http://www.drugbank.ca" type="small molecule" created="2005-06-13" updated="2019-12-20">
+  <drugbank-id primary="true">DB00001</drugbank-id>
+  <drugbank-id>APRD00001</drugbank-id>
+  <name>Lepirudin</name>
+  <description>Lepirudin is a recombinant hirudin.</description>
+  <groups><group>approved</group></groups>
+  <synonyms><synonym>Hirudin variant-1</synonym></synonyms>
+  <drug-interactions>
+    <drug-interaction><drugbank-id>DB00002</drugbank-id><name>Cetuximab</name><description>First interaction.</description></drug-interaction>
+    <drug-interaction><drugbank-id>DB00000</drugbank-id><name>Other</name><description>Last interaction.</description></drug-interaction>
+  </drug-interactions>
+</drug>
+"""
+
+
+def test_parse_drug_keeps_description():
+    record = parse_drug(ET.fromstring(DRUG_XML))
+    (id_drug, name, dtype, dclass, dsubclass, description, groups), = record['drug']
+    assert id_drug == 'DB00001'
+    assert description == 'Lepirudin is a recombinant hirudin.'
+
+
+def test_parse_drug_interactions():
+    record = parse_drug(ET.fromstring(DRUG_XML))
+    assert record['interaction'] == [
+        ('DB00001', 'DB00002', 'First interaction.'),
+        ('DB00000', 'DB00001', 'Last interaction.'),
+    ]
+
+
+def split_drugbank_ids(x):
+    """ The original row-wise split of a pair label, to compare against"""
+    i, j = tuple(x.split(' '))
+    if i > j:
+        i, j = j, i
+    return pd.Series({'id_drug_i': i, 'id_drug_j': j})
+
+
+def test_split_pair_labels():
+    rng = np.random.default_rng(0)
+    ids = np.array(['DB{:05d}'.format(i) for i in rng.integers(1, 100, size=2000)])
+    labels = pd.Series([i + ' ' + j for i, j in ids.reshape(-1, 2)], index=rng.permutation(1000))
+    result = normalize_pairs(split_pair_labels(labels))
+
+    expected = labels.apply(split_drugbank_ids)
+    expected = expected.loc[expected['id_drug_i'] != expected['id_drug_j'], :].drop_duplicates(keep='first')
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_normalize_pairs_alias():
+    alias = pd.Series(['DB00313', 'DB09363'], index=['DB00510', 'DB00386'])
+    df = pd.DataFrame({
+        'id_drug_i': ['DB00510', 'DB00313', 'DB00510', 'DB00001'],
+        'id_drug_j': ['DB00001', 'DB00001', 'DB00313', 'DB00386'],
+    })
+    result = normalize_pairs(df, alias)
+    # The second pair repeats the first once remapped; the third is a drug with itself
+    assert list(zip(result['id_drug_i'], result['id_drug_j'])) == [('DB00001', 'DB00313'), ('DB00001', 'DB09363')]
@@ -0,0 +1,72 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Tests the medication preprocessing and the dedup of repeated orders of `05-medication.py`.
+#
+#
+import numpy as np
+import pandas as pd
+from benchmark import import_stage
+from synthetic import generate
+from sources import iter_source
+from delta import first_occurrences
+
+
+medication = import_stage('05-medication')
+
+
+def row_wise_date_end(r):
+    """ The original row-wise end date, to compare against"""
+    start, duration, unit = r['ORDERING_DATE'], r['DURATION'], r['DURATIONUNIT']
+    if pd.isnull(duration) or pd.isnull(unit):
+        return start
+    if unit == 'Minutes':
+        timedelta = pd.Timedelta(value=duration, unit='minutes')
+    elif unit == 'Hours':
+        timedelta = pd.Timedelta(value=duration, unit='hours')
+    elif unit == 'Weeks':
+        timedelta = pd.Timedelta(value=duration * 7, unit='days')
+    elif unit == 'Months':
+        timedelta = pd.Timedelta(value=duration * 30, unit='days')
+    # Days, Treatments, Doses, Times
+    else:
+        timedelta = pd.Timedelta(value=duration, unit='days')
+    return start + timedelta
+
+
+def test_calculates_date_end():
+    rng = np.random.default_rng(0)
+    n = 2000
+    dfM = pd.DataFrame({
+        'ORDERING_DATE': pd.to_datetime('2015-01-01') + pd.to_timedelta(rng.integers(0, 3650, size=n), unit='D'),
+        'DURATION': rng.choice([0, 1, 1.5, 2, 7, 30, 90, np.nan], size=n),
+        'DURATIONUNIT': pd.Categorical(rng.choice(['Minutes', 'Hours', 'Days', 'Weeks', 'Months', 'Treatments', 'Doses', 'Times', None], size=n)),
+    })
+    expected = dfM.apply(row_wise_date_end, axis='columns')
+    pd.testing.assert_series_equal(medication.calculates_date_end(dfM), expected, check_names=False)
+
+
+def test_spilled_dedup_equals_global_dedup(tmp_path):
+    # Repeated orders are exact copies in other files, of the same patient
+    generate(str(tmp_path), n_cpu=1, n_patients=300, repeated_orders=0.05)
+    files = [str(tmp_path / 'data' / 'p2876_meds_{fid:02d}_u.csv'.format(fid=fid)) for fid in range(1, 13)]
+    chunksize = 500
+
+    # All orders at once, in file order
+    dfM = medication.preprocess_medication(pd.concat([dfM for file in files for dfM in iter_source(file, chunksize)], ignore_index=True))
+    expected = np.flatnonzero(first_occurrences(dfM['ROW_HASH'].to_numpy()))
+    assert len(expected) < len(dfM)
+
+    # One range of patients at a time
+    bounds = medication.partition_patients(files, chunksize)
+    paths, categorical, n = medication.spill_medication_orders(files, bounds, chunksize, str(tmp_path))
+    assert n == len(dfM) and len(paths) > 1
+    kept, patients = [], []
+    for path in paths:
+        dfP = medication.preprocess_medication(medication.read_partition(path, categorical))
+        kept.append(dfP['SEQ'].to_numpy()[first_occurrences(dfP['ROW_HASH'].to_numpy())])
+        patients.append(set(dfP['STUDY_ID']))
+    # A patient is never split across ranges
+    assert sum(len(p) for p in patients) == len(set.union(*patients))
+    assert np.array_equal(np.sort(np.concatenate(kept)), expected)
@@ -0,0 +1,51 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Tests the NDC canonicalization and dedup of `ndc.py`.
+#
+#
+import numpy as np
+import pandas as pd
+from ndc import normalize_ndc, dedup_ndc
+
+
+def test_normalize_ndc():
+    ndcs = pd.Series({
+        '4-4-2': '0002-3227-30',
+        '5-3-2': '50090-347-01',
+        '5-4-1': '00006-0074-3',
+        '5-4-2': '00006-0074-31',
+        '11 digits': '00006007431',
+        '10 digits': '0006007431',
+        'blanks': ' 0002-3227 -30 ',
+        'unknown': '12-34',
+        'missing': np.nan,
+        'repeat': '0002-3227-30',
+    }, name='ndc')
+    expected = pd.Series({
+        '4-4-2': '00002-3227-30',
+        '5-3-2': '50090-0347-01',
+        '5-4-1': '00006-0074-03',
+        '5-4-2': '00006-0074-31',
+        '11 digits': '00006-0074-31',
+        '10 digits': '0006007431',
+        'blanks': '00002-3227-30',
+        'unknown': '12-34',
+        'missing': np.nan,
+        'repeat': '00002-3227-30',
+    }, name='ndc')
+    pd.testing.assert_series_equal(normalize_ndc(ndcs), expected)
+
+
+def test_dedup_ndc():
+    df = pd.DataFrame({
+        'id_catalog': [2, 1, 1, 1, 2, 2],
+        'ndc': ['00006-0074-3', '0002-3227-30', '00002-3227-30', '0002-3227-30', '00006007431', '0002-3227-30'],
+    })
+    # Exact and normalized repeats of a catalog id are dropped; the same NDC under two ids is kept
+    expected = pd.DataFrame({
+        'id_catalog': [1, 2, 2, 2],
+        'ndc': ['00002-3227-30', '00002-3227-30', '00006-0074-03', '00006-0074-31'],
+    })
+    pd.testing.assert_frame_equal(dedup_ndc(df), expected)
@@ -0,0 +1,99 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Tests the vectorized patient preprocessing of `01-patient.py` against the original row-wise functions.
+#
+#
+import numpy as np
+import pandas as pd
+from benchmark import import_stage
+
+
+patient = import_stage('01-patient')
+
+
+def preprocessing_zip(x):
+    """ The original row-wise ZIP normalization, to compare against"""
+    x = str(x)
+    x = x.replace("\\X00", '')
+    x = x.replace(" ", '')
+    x = x.replace("-", '')
+    while x.startswith('0'):
+        x = x[1:]
+    if len(x) < 5:
+        x = ''
+    elif len(x) == 5:
+        if x == '00000':
+            x = ''
+    elif len(x) in [6, 7, 8]:
+        x = x[:5]
+    elif len(x) == 9:
+        if x[-4:] == '0000':
+            x = x[:5]
+    if len(x) == 9:
+        x = x[:5] + '-' + x[-4:]
+    return x
+
+
+def row_wise_zip(zips):
+    """ ZIP5 and ZIP4 as the original loader split them from `preprocessing_zip`"""
+    x = zips.map(preprocessing_zip)
+    zip5 = pd.to_numeric(x.str.split('-').str[0], errors='coerce')
+    zip4 = pd.to_numeric(x.str.split('-').str[1], errors='coerce')
+    return pd.DataFrame({'ZIP5': zip5.astype('Int64'), 'ZIP4': zip4.astype('Int64')}, index=zips.index)
+
+
+def test_normalize_zip_edge_cases():
+    zips = pd.Series([
+        '46202', '46202-1234', '462021234', '462020000', '046202', '0462021234', '4620', ' 46 202 ',
+        '46202\\X00', '1234567890', '4620212', '00000', None, np.nan, '46202', '46202-1234',
+    ])
+    pd.testing.assert_frame_equal(patient.normalize_zip(zips), row_wise_zip(zips))
+
+
+def test_normalize_zip_random():
+    rng = np.random.default_rng(0)
+    digits = rng.integers(0, 10, size=(2000, 11)).astype(str)
+    lengths = rng.integers(3, 12, size=2000)
+    zips = pd.Series([''.join(row[:n]) for row, n in zip(digits, lengths)])
+    # Some with a leading zero, a hyphen or blanks
+    zips[::7] = '0' + zips[::7]
+    zips[::5] = zips[::5].str[:5] + '-' + zips[::5].str[5:]
+    zips[::11] = ' ' + zips[::11] + ' '
+    pd.testing.assert_frame_equal(patient.normalize_zip(zips), row_wise_zip(zips))
+
+
+def handle_duplicated_patients(dfg):
+    """ The original row-wise consolidation of the rows of one STUDY_ID, to compare against"""
+    if len(dfg) > 1:
+        values = {'STUDY_ID': dfg['STUDY_ID'].iloc[0]}
+        for column in ['DOB', 'GENDER', 'ETHNICITY', 'RACE', 'ZIP5', 'ZIP4']:
+            vc = dfg[column].value_counts()
+            values[column] = vc.index[0] if len(vc) else None
+        return pd.Series(values).to_frame().T
+    else:
+        return dfg
+
+
+def test_consolidate_duplicated_patients():
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame({
+        # About half the ids repeat, some several times
+        'STUDY_ID': rng.integers(1, 1500, size=n),
+        'DOB': rng.choice(['1950-01-01', '1960-06-15', '1970-12-31', None], size=n),
+        'GENDER': rng.choice(['Female', 'Male', None], size=n),
+        'ETHNICITY': rng.choice(['Hispanic/Latino', 'Not Hispanic/Latino', None], size=n),
+        'RACE': rng.choice(['White', 'Black', 'Asian', None], size=n),
+        'ZIP5': pd.array(rng.choice([46202, 46203, 46204, np.nan], size=n), dtype='Int64'),
+        'ZIP4': pd.array(rng.choice([1234, 5678, np.nan, np.nan], size=n), dtype='Int64'),
+    })
+    result = patient.consolidate_duplicated_patients(df)
+
+    expected = df.groupby('STUDY_ID', group_keys=False).apply(handle_duplicated_patients).reset_index(drop=True)
+    assert result['STUDY_ID'].is_unique
+    assert len(result) == df['STUDY_ID'].nunique()
+    # Compared as objects, with any missing value as None
+    result, expected = [d.astype(object).where(d.notna(), None).reset_index(drop=True) for d in (result, expected[result.columns])]
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,33 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Tests `normalize_categories` of `vocabulary.py` against `Series.replace`, as the loaders normalized before.
+#
+#
+import numpy as np
+import pandas as pd
+import vocabulary
+from vocabulary import normalize_categories
+
+
+def test_normalize_categories():
+    x = pd.Series(['White', 'CAUCASIAN', 'Refused', 'Asian', 'Other Asian', 'Martian', None, 'White', np.nan], name='RACE')
+    result = normalize_categories(x, vocabulary.RACE)
+
+    assert result.dtype == 'category'
+    assert result.name == 'RACE'
+    # Merged labels, no category for values mapped to NaN, unknown values kept
+    assert sorted(result.cat.categories) == ['Asian', 'Martian', 'White']
+    assert result.isna().tolist() == [False, False, True, False, False, False, True, False, True]
+    assert result.dropna().tolist() == ['White', 'White', 'Asian', 'Asian', 'Martian', 'White']
+
+
+def test_normalize_categories_matches_replace():
+    rng = np.random.default_rng(0)
+    for mapping in [vocabulary.GENDER, vocabulary.ETHNICITY, vocabulary.RACE, vocabulary.STRENGTHDOSEUNIT, vocabulary.DISPENSEQTYUNIT]:
+        values = list(mapping) + ['Unmapped A', 'Unmapped B', None]
+        x = pd.Series(rng.choice(np.array(values, dtype=object), size=1000), index=rng.permutation(1000))
+        result = normalize_categories(x, mapping)
+        expected = x.replace(mapping)
+        pd.testing.assert_series_equal(result.astype(object).where(result.notna(), None), expected.where(expected.notna(), None).astype(object))
@@ -5,9 +5,39 @@
 # Description: utility functions
 #
 #
+from contextlib import contextmanager
 import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
 
 
 def add_own_encoders(conn, cursor, query, *args):
     cursor.connection.encoders[np.float64] = lambda value, encoders: float(value)
     cursor.connection.encoders[np.int64] = lambda value, encoders: int(value)
+
+
+def concat_categorical(ldf):
+    """ Concatenates DataFrames, keeping categorical columns categorical (categories are unioned)"""
+    columns = [column for column, dtype in ldf[0].dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    for column in columns:
+        categories = union_categoricals([df[column] for df in ldf]).categories
+        ldf = [df.assign(**{column: df[column].cat.set_categories(categories)}) for df in ldf]
+    return pd.concat(ldf, axis='index', ignore_index=True, verify_integrity=False)
+
+
+def batched(iterable, size):
+    """ Yields lists of at most `size` items from `iterable`"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if len(batch):
+        yield batch
+
+
+@contextmanager
+def no_phase(name):
+    """ A phase that is not timed (see `benchmark.PhaseRecorder.phase`); the loaders run through it outside the benchmark"""
+    yield {}
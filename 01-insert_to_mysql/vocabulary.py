@@ -0,0 +1,96 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Normalization tables of the categorical columns of the raw extracts.
+#
+# Each table maps a raw value to its normalized label; `np.nan` marks a value as missing.
+# Values not in a table are kept as they are. `normalize_categories` applies a table to the
+# categories of a column only, so its cost does not depend on the number of rows.
+#
+import numpy as np
+import pandas as pd
+
+
+#
+# Demographics (`p2876_demographics.csv`)
+#
+GENDER = {
+    'Unknown': np.nan,
+    'Unspecified': np.nan
+}
+
+ETHNICITY = {
+    'Not Hispanic or Latino': 'Not Hispanic/Latino',
+    'Not Hispanic, Latino/a, or Spanish Origin': 'Not Hispanic/Latino/Spanish',
+    'Hispanic or Latino': 'Hispanic/Latino',
+    'Unknown': np.nan,
+    'Unreported/Refused to Report': np.nan,
+    'Declined': np.nan
+}
+
+RACE = {
+    # White
+    'White': 'White',
+    'CAUCASIAN': 'White',
+    # Black/AA
+    'Black or African American': 'Black',
+    # Hispanic
+    'HISPANIC': 'Hispanic',
+    # Asian
+    'Asian': 'Asian',
+    'Other Asian': 'Asian',
+    # Native
+    'American Indian or Alaska Native': 'Indian',
+    'NATIVE ALASKAN': 'Indian',
+    # Islander
+    'Native Hawaiian': 'Islander',
+    'Other Pacific Islander': 'Islander',
+    'Native Hawaiian or Other Pacific Islande': 'Islander',
+    'Native Hawaiian or Other Pacific Islander': 'Islander',
+    # >1 Race
+    'More than one race': 'Bi-racial',
+    'BI-RACIAL': 'Bi-racial',
+    # Other
+    'Unknown': np.nan,
+    'Refused': np.nan,
+    'Unreported/Refused to report race': np.nan,
+    'Decline to Answer': np.nan,
+}
+
+#
+# Medication orders (`p2876_meds_{d}_{u,t}.csv`)
+#
+# Dose Strength Unit
+STRENGTHDOSEUNIT = {
+    'inhalation': 'Inhalation',
+    'IntlUnits': 'Intl Units',
+    'Unit(s)': 'Units',
+    'MillionUnits': 'Million Units',
+    'Milliunits/m': 'Million Units/m'
+}
+
+# Quantity dispensed unit
+DISPENSEQTYUNIT = {
+    'AUC(Carboplatin)': 'AUC (Carboplatin)',
+    'inhalation': 'Inhalation',
+    'Pack': 'Packet',
+    'packet(s)': 'Packet',
+    'kit(s)': 'Kit',
+    'Units': 'Unit',
+    'Unit(s)': 'Unit',
+    'MillionUnits': 'Million Units'
+}
+
+
+def normalize_categories(x, mapping):
+    """ Applies a normalization table to the categories of `x`, returning a categorical.
+    Categories mapped to the same label are merged into one; categories mapped to NaN are removed (their rows become missing).
+    """
+    x = x.astype('category')
+    labels = pd.Series([mapping.get(category, category) for category in x.cat.categories], dtype=object)
+    # New categories in the order their labels first appear
+    codes, categories = pd.factorize(labels)
+    # Code `-1` is a missing value, before and after
+    codes = np.append(codes, -1)[x.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=x.index, name=x.name)
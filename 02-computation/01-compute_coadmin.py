@@ -14,6 +14,7 @@ import sqlalchemy
 from sqlalchemy import event
 from sqlalchemy.exc import SQLAlchemyError
 from utils import add_own_encoders
+from ddiindy.bulkload import bulk_load
 from itertools import combinations
 from time import sleep
 from datetime import datetime
@@ -32,19 +33,41 @@ def parallel_query_worker(data):
     engine = sqlalchemy.create_engine(url, pool_size=24, max_overflow=0, encoding='utf-8')
     event.listen(engine, "before_cursor_execute", add_own_encoders)
 
+    # A contiguous ID range (see `medication_patient_range`) turns the lookup into primary-key range scans.
+    # A range that is not contiguous (e.g., orders appended by a delta load) may span most of the table;
+    # those patients, and patients without a range, are looked up by `id_patient` (ix_medication_patient).
     sqld = """
         SELECT
             md.id_medication_drug,
             m.id_medication, m.id_patient, m.dt_start, m.dt_end,
             d.id_drug, d.name
-        FROM medication_drug md
-            JOIN medication m ON md.id_medication = m.id_medication
+        FROM medication_patient_range r
+            JOIN medication m ON m.id_medication BETWEEN r.id_medication_first AND r.id_medication_last
+            JOIN medication_drug md ON md.id_medication = m.id_medication
             JOIN drug d ON md.id_drug = d.id_drug
         WHERE
+            r.id_patient = {id_patient:d} AND
+            r.is_contiguous = TRUE AND
             m.is_topic = FALSE AND
             m.is_ophthalmo = FALSE AND
             m.is_vaccine = FALSE AND
             m.id_patient = {id_patient:d}
+        UNION ALL
+        SELECT
+            md.id_medication_drug,
+            m.id_medication, m.id_patient, m.dt_start, m.dt_end,
+            d.id_drug, d.name
+        FROM medication m
+            JOIN medication_drug md ON md.id_medication = m.id_medication
+            JOIN drug d ON md.id_drug = d.id_drug
+        WHERE
+            m.id_patient = {id_patient:d} AND
+            m.is_topic = FALSE AND
+            m.is_ophthalmo = FALSE AND
+            m.is_vaccine = FALSE AND
+            NOT EXISTS (
+                SELECT 1 FROM medication_patient_range r WHERE r.id_patient = {id_patient:d} AND r.is_contiguous = TRUE
+            )
     """.format(id_patient=id_patient)
 
     # Load patient medication_drug
@@ -112,7 +135,7 @@ def parallel_query_worker(data):
             dfR = pd.DataFrame(r, columns=['id_patient', 'id_medication_drug_i', 'id_medication_drug_j', 'id_drug_i', 'id_drug_j', 'dt_start', 'dt_end', 'length', 'is_ddi'])
             for attempt in range(10):
                 try:
-                    dfR.to_sql(name='coadmin', con=engine, if_exists='append', index=False, chunksize=5000, method='multi')
+                    bulk_load(dfR, 'coadmin', engine, method='executemany', verbose=False)
                     break
                 except SQLAlchemyError as e:
                     error = str(e.__dict__['orig'])
@@ -148,6 +171,14 @@ if __name__ == '__main__':
     print('Truncating Table')
     #Q = engine.execute("TRUNCATE TABLE coadmin")
     #Q = engine.execute("TRUNCATE TABLE helper_patient_parsed")
+
+    # Patients changed by a delta ingest (see `01-insert_to_mysql/delta.py`) are computed again
+    print('Invalidating Changed Patients')
+    # `coadmin` is created by `script_create_table.sql`; before the first run there is nothing to invalidate
+    if 'coadmin' in sqlalchemy.inspect(engine).get_table_names():
+        Q = engine.execute("DELETE FROM coadmin WHERE id_patient IN (SELECT id_patient FROM helper_patient_changed)")
+    Q = engine.execute("DELETE FROM helper_patient_parsed WHERE id_patient IN (SELECT id_patient FROM helper_patient_changed)")
+    Q = engine.execute("DELETE FROM helper_patient_changed")
     #
     for loop in range(25):
         print('Load Patient IDs - loop {loop:d}'.format(loop=loop))
@@ -159,6 +190,7 @@ if __name__ == '__main__':
                 p.id_patient NOT IN (
                     SELECT DISTINCT hp.id_patient FROM helper_patient_parsed hp
                 )
+            ORDER BY p.id_patient
             LIMIT 50000
         """
         dfP = pd.read_sql(sql=sqlp, con=engine)
@@ -8,6 +8,7 @@
  * Drop Views/Tables before creation
 */
 DROP TABLE IF EXISTS coadministration;
+DROP TABLE IF EXISTS coadmin;
 DROP TABLE IF EXISTS helper_patient_parsed;
 
 /*
@@ -26,6 +27,22 @@ CREATE TABLE coadministration (
 	PRIMARY KEY (id_patient, id_drug_i, id_drug_j)
 ) ENGINE=InnoDB;
 
+/*
+ * Co-Administration, per pair of medication orders (see `01-compute_coadmin.py`)
+*/
+CREATE TABLE coadmin (
+	id_patient INT NOT NULL,
+	id_medication_drug_i INT NOT NULL,
+	id_medication_drug_j INT NOT NULL,
+	id_drug_i VARCHAR(7) NOT NULL,
+	id_drug_j VARCHAR(7) NOT NULL,
+	dt_start DATETIME NOT NULL COMMENT "start of the overlap",
+	dt_end DATETIME NOT NULL COMMENT "end of the overlap",
+	length INT(4) UNSIGNED COMMENT "in days",
+	is_ddi BOOLEAN DEFAULT FALSE,
+	KEY idx_coadmin_id_patient (id_patient) COMMENT "rows of changed patients are deleted and computed again"
+) ENGINE=InnoDB;
+
 /*
  * helper_coadmin_parsed
 */
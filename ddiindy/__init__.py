@@ -0,0 +1,9 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Modules shared by the stages (`01-insert_to_mysql`, `02-computation`, ...).
+#
+# Each stage directory links to this package (`<stage>/ddiindy -> ../ddiindy`), so its scripts import it
+# as `ddiindy.<module>` from their own directory, next to the stage's own `utils.py`.
+#
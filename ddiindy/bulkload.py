@@ -0,0 +1,163 @@
+# coding=utf-8
+# Author: Rion B Correia
+# Date: October 18, 2026
+#
+# Description: Bulk-load of DataFrames into existing tables.
+#
+# On MySQL/MariaDB servers with `local_infile` enabled (the client must also connect with `local_infile=1`),
+# a frame is written to a tab-delimited file and loaded with `LOAD DATA LOCAL INFILE`.
+# Otherwise, rows are inserted with batched `executemany`, which works on any DBAPI driver (e.g., SQLite).
+#
+import os
+import csv
+import time
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+
+
+# Cells (rows x columns) per `executemany` batch
+BATCH_CELLS = 100000
+
+# Placeholder of each DBAPI paramstyle
+PLACEHOLDER = {
+    'format': '%s',
+    'pyformat': '%s',
+    'qmark': '?',
+}
+
+
+def batch_size_of(df, batch_cells=BATCH_CELLS):
+    """ Rows per `executemany` batch, so batches carry about the same number of cells for narrow and wide tables"""
+    return max(1000, batch_cells // max(1, len(df.columns)))
+
+
+def quote_identifier(engine, name):
+    """ Quotes a table or column name for the engine's dialect"""
+    return engine.dialect.identifier_preparer.quote_identifier(name)
+
+
+@contextmanager
+def transaction(engine, savepoint=False):
+    """ Begins a transaction on an Engine. On a Connection, joins the transaction its caller has begun;
+    with `savepoint`, inside a SAVEPOINT, so a failed statement is rolled back without ending that transaction.
+    """
+    if isinstance(engine, Connection):
+        with (engine.begin_nested() if savepoint and engine.in_transaction() else engine.begin()):
+            yield engine
+    else:
+        with engine.begin() as conn:
+            yield conn
+
+
+def supports_load_data(engine):
+    """ True if the server is MySQL/MariaDB and allows `LOAD DATA LOCAL INFILE`"""
+    if engine.dialect.name != 'mysql':
+        return False
+    try:
+        row = engine.execute("SHOW GLOBAL VARIABLES LIKE 'local_infile'").fetchone()
+    except DBAPIError:
+        return False
+    return row is not None and str(row[1]).upper() in ('ON', '1')
+
+
+def to_records(df):
+    """ Rows of `df` as tuples of Python values; missing values are None"""
+    columns = []
+    for column, x in df.items():
+        if pd.api.types.is_datetime64_any_dtype(x):
+            values = x.dt.to_pydatetime().tolist()
+        elif pd.api.types.is_extension_array_dtype(x):
+            # Nullable dtypes (e.g., Int64) list numpy scalars, which not every driver binds
+            values = x.astype(object).tolist()
+        else:
+            values = x.tolist()
+        for i in np.flatnonzero(x.isna().to_numpy()):
+            values[i] = None
+        columns.append(values)
+    return list(zip(*columns))
+
+
+def to_delimited(df):
+    """ `df` with values written as `LOAD DATA` reads them: booleans as 0/1 and backslash, tab and newline escaped"""
+    df = df.copy()
+    for column, x in df.items():
+        if pd.api.types.is_bool_dtype(x) or pd.api.types.infer_dtype(x, skipna=True) == 'boolean':
+            df[column] = x.map({True: 1, False: 0}).astype('Int8')
+        elif pd.api.types.is_datetime64_any_dtype(x):
+            df[column] = x.dt.strftime('%Y-%m-%d %H:%M:%S')
+        elif pd.api.types.is_object_dtype(x) or isinstance(x.dtype, pd.CategoricalDtype):
+            x = x.astype(object)
+            is_str = x.map(type).eq(str)
+            df[column] = x.where(~is_str, x[is_str].str.replace('\\', '\\\\', regex=False).str.replace('\t', '\\t', regex=False).str.replace('\n', '\\n', regex=False).str.replace('\r', '\\r', regex=False))
+    return df
+
+
+def load_data_infile(df, table, engine, chunksize=500000):
+    """ Writes `df` to a tab-delimited file and loads it with `LOAD DATA LOCAL INFILE`"""
+    columns = ', '.join(quote_identifier(engine, column) for column in df.columns)
+    fd, path = tempfile.mkstemp(suffix='.tsv')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as file:
+            for start in range(0, len(df), chunksize):
+                to_delimited(df.iloc[start:start + chunksize]).to_csv(
+                    file, sep='\t', header=False, index=False, na_rep='\\N',
+                    quoting=csv.QUOTE_NONE, escapechar=None)
+        sql = """
+            LOAD DATA LOCAL INFILE '{path:s}' INTO TABLE {table:s}
+            CHARACTER SET utf8
+            FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+            LINES TERMINATED BY '\\n'
+            ({columns:s})
+        """.format(path=path.replace('\\', '/'), table=quote_identifier(engine, table), columns=columns)
+        # A refused `LOAD DATA` only rolls back to the savepoint: `bulk_load` can fall back within the caller's transaction
+        with transaction(engine, savepoint=True) as conn:
+            conn.execute(sql)
+    finally:
+        os.remove(path)
+
+
+def execute_many(df, table, engine, batch_size=None):
+    """ Inserts `df` with batched `executemany`, in a single transaction"""
+    batch_size = batch_size or batch_size_of(df)
+    placeholder = PLACEHOLDER[engine.dialect.paramstyle]
+    sql = "INSERT INTO {table:s} ({columns:s}) VALUES ({values:s})".format(
+        table=quote_identifier(engine, table),
+        columns=', '.join(quote_identifier(engine, column) for column in df.columns),
+        values=', '.join([placeholder] * len(df.columns)))
+    with transaction(engine) as conn:
+        for start in range(0, len(df), batch_size):
+            conn.execute(sql, to_records(df.iloc[start:start + batch_size]))
+
+
+def bulk_load(df, table, engine, method='auto', batch_size=None, verbose=True):
+    """ Appends `df` to an existing `table`; columns are matched by name.
+    `engine` may be a Connection, to load within the transaction it has begun.
+    `method` is 'load_data', 'executemany' or 'auto' (`LOAD DATA` where the server allows it, `executemany` otherwise).
+    Returns the number of rows loaded.
+    """
+    if method not in ('auto', 'load_data', 'executemany'):
+        raise ValueError("Unknown bulk-load method '{method:s}'".format(method=method))
+    if not len(df):
+        return 0
+    t0 = time.time()
+    if method == 'auto':
+        method = 'load_data' if supports_load_data(engine) else 'executemany'
+    if method == 'load_data':
+        try:
+            load_data_infile(df, table, engine)
+        except DBAPIError as e:
+            # e.g., the client did not connect with `local_infile=1`
+            print('> {table:s}: LOAD DATA not allowed, falling back to executemany ({error:s})'.format(table=table, error=str(e.orig)))
+            method = 'executemany'
+    if method == 'executemany':
+        execute_many(df, table, engine, batch_size=batch_size)
+
+    if verbose:
+        seconds = time.time() - t0
+        print('> {table:s}: {n:,d} rows in {seconds:.1f}s ({rate:,.0f} rows/s, {method:s})'.format(
+            table=table, n=len(df), seconds=seconds, rate=len(df) / max(seconds, 1e-9), method=method))
+    return len(df)